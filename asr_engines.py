@@ -0,0 +1,371 @@
+import os
+import json
+import time
+import queue
+import threading
+from urllib.parse import urlencode
+import numpy as np
+from audio_utils import to_float, to_pcm16
+from resampler import resample
+from whisper_cache import warm_model, get_model
+
+
+class ASRError(Exception):
+  """Recognition backend failed (network, model, protocol)"""
+
+
+class Transcript:
+  """One recognition result; partials may be revised, finals are not"""
+
+  def __init__(self, text, is_final=True, engine=None, latency_ms=0.0):
+    self.text = text
+    self.is_final = is_final
+    self.engine = engine
+    self.latency_ms = latency_ms
+
+  def __repr__(self):
+    kind = "final" if self.is_final else "partial"
+    return f"Transcript({self.text!r}, {kind}, {self.engine}, {self.latency_ms:.0f}ms)"
+
+
+class ASREngine:
+  """Common interface for every speech-to-text backend
+
+  Subclasses implement _transcribe(samples) on float32 audio at
+  self.sample_rate and may override stream() for real partial results.
+  """
+
+  name = "base"
+  sample_rate = 16000
+
+  def __init__(self):
+    self.latencies_ms = []
+    self.audio_seconds = []
+    self.failures = 0
+
+  def available(self):
+    return True
+
+  def warm(self):
+    """Start any slow setup (model load, connection) ahead of the first utterance"""
+
+  def load(self):
+    """Block until warm() has finished, so a timing is decode only"""
+
+  def _prepare(self, samples, sample_rate):
+    return resample(to_float(samples), sample_rate, self.sample_rate)
+
+  def _transcribe(self, samples):
+    raise NotImplementedError
+
+  def transcribe(self, samples, sample_rate=16000):
+    """Return the final text for one utterance ("" when nothing was recognised)"""
+    samples = self._prepare(samples, sample_rate)
+    if samples.size == 0:
+      return ""
+    start = time.perf_counter()
+    try:
+      text = self._transcribe(samples)
+    except ASRError:
+      self.failures += 1
+      raise
+    except Exception as e:
+      self.failures += 1
+      raise ASRError(f"{self.name}: {e}") from e
+    self._record(start, samples.size)
+    return (text or "").strip()
+
+  def stream(self, blocks, sample_rate=16000):
+    """Yield Transcript partials while blocks arrive, then one final
+
+    The default buffers everything and decodes once at the end.
+    """
+    collected = [to_float(b) for b in blocks]
+    samples = np.concatenate(collected) if collected else np.zeros(0, dtype=np.float32)
+    text = self.transcribe(samples, sample_rate)
+    yield Transcript(text, True, self.name, self.latencies_ms[-1] if self.latencies_ms else 0.0)
+
+  def _record(self, start, n_samples):
+    self.latencies_ms.append((time.perf_counter() - start) * 1000)
+    self.audio_seconds.append(n_samples / self.sample_rate)
+
+  def stats(self):
+    if not self.latencies_ms:
+      return {"engine": self.name, "calls": 0, "failures": self.failures}
+    latencies = np.array(self.latencies_ms)
+    audio = np.array(self.audio_seconds)
+    return {
+      "engine": self.name,
+      "calls": len(self.latencies_ms),
+      "failures": self.failures,
+      "latency_ms_mean": float(latencies.mean()),
+      "latency_ms_p50": float(np.percentile(latencies, 50)),
+      "latency_ms_p95": float(np.percentile(latencies, 95)),
+      "rtf": float(latencies.sum() / 1000 / max(audio.sum(), 1e-9)),
+    }
+
+
+class GoogleEngine(ASREngine):
+  """speech_recognition's free Google Web Speech endpoint"""
+
+  name = "google"
+
+  def __init__(self, recognizer=None, language="en-US"):
+    super().__init__()
+    self.recognizer = recognizer
+    self.language = language
+
+  def available(self):
+    try:
+      import speech_recognition
+      return True
+    except ImportError:
+      return False
+
+  def _transcribe(self, samples):
+    import speech_recognition as sr
+    if self.recognizer is None:
+      self.recognizer = sr.Recognizer()
+    audio = sr.AudioData(to_pcm16(samples), self.sample_rate, 2)
+    try:
+      return self.recognizer.recognize_google(audio, language=self.language)
+    except sr.UnknownValueError:
+      return ""
+    except sr.RequestError as e:
+      raise ASRError(f"google: {e}") from e
+
+
+class WhisperEngine(ASREngine):
+  """Local openai-whisper model, as used by the speech_to_txt scripts"""
+
+  name = "whisper"
+
+  def __init__(self, model_size="small", device="cpu", language="en", grammar=None, **decode_options):
+    super().__init__()
+    self.model_size = model_size
+    self.device = device
+    self.language = language
+    self.grammar = grammar
+    self.decode_options = dict(fp16=False, condition_on_previous_text=False, temperature=0.0)
+    self.decode_options.update(decode_options)
+
+  def available(self):
+    try:
+      import whisper
+      return True
+    except ImportError:
+      return False
+
+  def warm(self):
+    warm_model(self.model_size, self.device)
+
+  def load(self):
+    get_model(self.model_size, self.device)
+
+  def _transcribe(self, samples):
+    model = get_model(self.model_size, self.device)
+    # Commands fit in one 30s window; try the command grammar first
+    if self.grammar is not None and samples.size <= 30 * self.sample_rate:
+      text = self.grammar.decode(model, samples, language=self.language)
+      if text is not None:
+        return text
+    result = model.transcribe(samples, language=self.language, **self.decode_options)
+    return result["text"]
+
+  def stats(self):
+    stats = super().stats()
+    if self.grammar is not None:
+      stats["grammar"] = self.grammar.stats()
+    return stats
+
+
+class AssemblyAIEngine(ASREngine):
+  """AssemblyAI v3 realtime websocket; the only backend with true partials"""
+
+  name = "assemblyai"
+  base_url = "wss://streaming.assemblyai.com/v3/ws"
+
+  def __init__(self, api_key=None, frame_ms=50, url=None):
+    super().__init__()
+    self.api_key = api_key or os.environ.get("ASSEMBLYAI_API_KEY")
+    self.frame = int(self.sample_rate * frame_ms / 1000)
+    self.url = url or f"{self.base_url}?{urlencode({'sample_rate': self.sample_rate, 'format_turns': True})}"
+
+  def available(self):
+    try:
+      import websocket
+    except ImportError:
+      return False
+    return bool(self.api_key)
+
+  def _transcribe(self, samples):
+    final = ""
+    for result in self._session([samples]):
+      if result.is_final:
+        final = result.text
+    return final
+
+  def stream(self, blocks, sample_rate=16000):
+    start = time.perf_counter()
+    n_samples = [0]
+
+    def prepared():
+      for block in blocks:
+        block = self._prepare(block, sample_rate)
+        n_samples[0] += block.size
+        yield block
+
+    try:
+      for result in self._session(prepared()):
+        result.latency_ms = (time.perf_counter() - start) * 1000
+        yield result
+    except ASRError:
+      self.failures += 1
+      raise
+    except Exception as e:
+      self.failures += 1
+      raise ASRError(f"{self.name}: {e}") from e
+    self._record(start, n_samples[0])
+
+  def _session(self, blocks):
+    import websocket
+    try:
+      ws = websocket.create_connection(self.url, header={"Authorization": self.api_key}, timeout=10)
+    except Exception as e:
+      raise ASRError(f"assemblyai: could not connect: {e}") from e
+
+    messages = queue.Queue()
+
+    def receive():
+      try:
+        while True:
+          data = json.loads(ws.recv())
+          messages.put(data)
+          if data.get("type") == "Termination":
+            break
+      except Exception:
+        pass
+      messages.put(None)
+
+    reader = threading.Thread(target=receive, daemon=True)
+    reader.start()
+    turns = []
+    try:
+      for block in blocks:
+        pcm = to_pcm16(block)
+        step = self.frame * 2
+        for offset in range(0, len(pcm), step):
+          ws.send(pcm[offset:offset + step], websocket.ABNF.OPCODE_BINARY)
+        yield from self._drain(messages, turns, block=False)
+      ws.send(json.dumps({"type": "Terminate"}))
+      yield from self._drain(messages, turns, block=True)
+    finally:
+      ws.close()
+      reader.join(timeout=1.0)
+    yield Transcript(" ".join(turns).strip(), True, self.name)
+
+  def _drain(self, messages, turns, block):
+    while True:
+      try:
+        data = messages.get(timeout=10) if block else messages.get_nowait()
+      except queue.Empty:
+        return
+      if data is None or data.get("type") == "Termination":
+        return
+      if data.get("type") != "Turn":
+        continue
+      text = data.get("transcript", "")
+      if data.get("turn_is_formatted"):
+        turns.append(text)
+      else:
+        yield Transcript(" ".join(turns + [text]).strip(), False, self.name)
+
+
+ENGINES = {
+  "google": GoogleEngine,
+  "whisper": WhisperEngine,
+  "assemblyai": AssemblyAIEngine,
+}
+
+def create_engine(name, **kwargs):
+  try:
+    return ENGINES[name](**kwargs)
+  except KeyError:
+    raise ValueError(f"Unknown ASR engine '{name}'. Choose from: {', '.join(ENGINES)}")
+
+
+class EngineSelector:
+  """Runs whichever available engine has been fastest on this machine
+
+  Each utterance is answered by the first engine (fastest measured first)
+  that succeeds. Engines not measured yet are then timed on a copy of the
+  same utterance on a background thread, after their model has loaded, so
+  the ranking is built from real commands without the user waiting on it.
+  """
+
+  def __init__(self, engines):
+    self.engines = [e for e in engines if e.available()]
+    if not self.engines:
+      raise ASRError("No ASR engine available")
+    self._measuring = None
+
+  @classmethod
+  def from_names(cls, names, options=None):
+    """options maps an engine name to extra constructor arguments"""
+    options = options or {}
+    return cls([create_engine(n, **options.get(n, {})) for n in names])
+
+  def ranked(self):
+    def key(engine):
+      stats = engine.stats()
+      return (engine.failures > stats["calls"], stats.get("latency_ms_mean", float("inf")))
+    return sorted(self.engines, key=key)
+
+  @property
+  def current(self):
+    return self.ranked()[0]
+
+  def transcribe(self, samples, sample_rate=16000):
+    last_error = None
+    for engine in self.ranked():
+      try:
+        text = engine.transcribe(samples, sample_rate)
+      except ASRError as e:
+        last_error = e
+        continue
+      self._measure_others(engine, samples, sample_rate)
+      return text
+    raise last_error
+
+  def _measure_others(self, used, samples, sample_rate):
+    unmeasured = [e for e in self.engines if e is not used and not e.latencies_ms and not e.failures]
+    if not unmeasured or (self._measuring is not None and self._measuring.is_alive()):
+      return
+
+    def measure():
+      for engine in unmeasured:
+        try:
+          engine.load()
+        except Exception as e:
+          engine.failures += 1
+          print(f"⚠️ {engine.name} couldn't be loaded: {e}")
+          continue
+        try:
+          engine.transcribe(samples, sample_rate)
+        except ASRError as e:
+          print(f"⚠️ {engine.name} couldn't be measured: {e}")
+
+    self._measuring = threading.Thread(target=measure, daemon=True)
+    self._measuring.start()
+
+  def wait_measured(self, timeout=None):
+    """Block until a background measurement in flight has finished"""
+    if self._measuring is not None:
+      self._measuring.join(timeout)
+
+  def warm(self):
+    for engine in self.engines:
+      engine.warm()
+
+  def stats(self):
+    return [e.stats() for e in self.ranked()]
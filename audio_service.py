@@ -0,0 +1,201 @@
+import time
+import threading
+from collections import deque
+import numpy as np
+import speech_recognition as sr
+from vad import VoiceActivityDetector
+from preprocessing import Preprocessor
+from audio_utils import to_float, to_pcm16
+
+
+class AudioService:
+  """Owns the single microphone stream shared by every input mode
+
+  Utterances are endpointed by our own VAD rather than Recognizer.listen, so
+  capture stops as soon as speech does and silence is trimmed before any
+  ASR engine sees the audio.
+
+  With a profile_store the noise calibration is saved per device and
+  reused on the next start. While listening, every recalibrate_interval
+  seconds a stretch of uninterrupted silence refreshes the saved profile.
+
+  Every block is also conditioned (high-pass, noise suppression, AGC) as
+  it is read, so engines get clean audio without a pass at the end. The
+  VAD and trimming still look at the raw signal.
+  """
+
+  def __init__(self, device_index=None, sample_rate=None, chunk_size=1024, pre_roll_ms=300,
+               profile_store=None, recalibrate_interval=120, recalibrate_seconds=2.0, preprocess=True):
+    self.microphone = sr.Microphone(device_index=device_index, sample_rate=sample_rate, chunk_size=chunk_size)
+    self.source = None
+    self.vad = None
+    self.preprocess = preprocess
+    self.preprocessor = None
+    self.pre_roll_ms = pre_roll_ms
+    self.calibrated = False
+    self.profile_store = profile_store
+    self.profile_loaded = False
+    self.recalibrate_interval = recalibrate_interval
+    self.recalibrate_seconds = recalibrate_seconds
+    self.recalibrations = 0
+    self._idle = []
+    self._last_calibration = 0.0
+    self._lock = threading.Lock()
+
+  def open(self):
+    """Open the device once and keep it open until close()"""
+    if self.source is None:
+      self.source = self.microphone.__enter__()
+      self.vad = VoiceActivityDetector(self.source.SAMPLE_RATE)
+      if self.preprocess:
+        self.preprocessor = Preprocessor(self.source.SAMPLE_RATE)
+      self._load_profile()
+    return self.source
+
+  @property
+  def device_key(self):
+    """Stable name for the open input device, used to key noise profiles"""
+    try:
+      audio = self.source.audio
+      if self.source.device_index is None:
+        info = audio.get_default_input_device_info()
+      else:
+        info = audio.get_device_info_by_index(self.source.device_index)
+      name = info["name"]
+    except Exception:
+      name = f"device-{self.source.device_index}"
+    return f"{name}@{self.source.SAMPLE_RATE}"
+
+  def _load_profile(self):
+    if self.profile_store is None:
+      return
+    profile = self.profile_store.load(self.device_key)
+    if profile is None:
+      return
+    self.vad.noise_floor = profile["noise_floor"]
+    self.vad.noise_spectrum = profile["spectrum"]
+    if self.preprocessor:
+      self.preprocessor.set_noise(profile["spectrum"])
+    self.calibrated = self.profile_loaded = True
+    self._last_calibration = time.monotonic()
+
+  def _save_profile(self):
+    if self.profile_store is None:
+      return
+    floor, spectrum = self.vad.noise_floor, self.vad.noise_spectrum
+    # Disk writes stay off the capture loop
+    threading.Thread(target=self.profile_store.save, args=(self.device_key, floor, spectrum),
+                     daemon=True).start()
+
+  def close(self):
+    if self.source is not None:
+      try:
+        self.microphone.__exit__(None, None, None)
+      except Exception:
+        pass
+      self.source = None
+
+  def _read(self):
+    return np.frombuffer(self.source.stream.read(self.source.CHUNK), dtype=np.int16)
+
+  def calibrate(self, duration=1.0):
+    """Measure ambient noise; the floor is kept on the VAD and adapts afterwards"""
+    source = self.open()
+    with self._lock:
+      chunks = int(np.ceil(duration * source.SAMPLE_RATE / source.CHUNK))
+      noise = np.concatenate([self._read() for _ in range(chunks)])
+      self.vad.calibrate(noise)
+      if self.preprocessor:
+        self.preprocessor.set_noise(self.vad.noise_spectrum)
+    self.calibrated = True
+    self._last_calibration = time.monotonic()
+    self._save_profile()
+    return self.vad.noise_floor
+
+  def _note_idle(self, block):
+    """Collect uninterrupted silence and refresh the profile from it now and then"""
+    if self.vad.speech_pending:
+      self._idle.clear()
+      return
+    self._idle.append(block)
+    rate = self.source.SAMPLE_RATE
+    if sum(len(b) for b in self._idle) < self.recalibrate_seconds * rate:
+      return
+    noise = np.concatenate(self._idle)
+    self._idle.clear()
+    if time.monotonic() - self._last_calibration < self.recalibrate_interval:
+      return
+    # Blend rather than replace, the live floor already tracks short-term changes
+    self.vad.recalibrate(noise)
+    self.recalibrations += 1
+    self._last_calibration = time.monotonic()
+    self._save_profile()
+
+  def flush(self):
+    """Drop audio that piled up in the device buffer while nobody was reading"""
+    source = self.open()
+    try:
+      stream = source.stream.pyaudio_stream
+      available = stream.get_read_available()
+      if available > 0:
+        stream.read(available, exception_on_overflow=False)
+    except Exception:
+      pass
+
+  def listen(self, timeout=None, phrase_time_limit=None, on_speech=None):
+    """Capture one utterance from the open stream and return it as sr.AudioData
+
+    on_speech(block, first) sees each block once the utterance has started
+    (the pre-roll arrives with the first one), while capture is still going.
+    """
+    source = self.open()
+    if not self.calibrated:
+      self.calibrate(duration=0.5)
+    rate, chunk = source.SAMPLE_RATE, source.CHUNK
+    pre_roll = deque(maxlen=max(1, int(self.pre_roll_ms * rate / 1000 / chunk)))
+    frames, clean = [], []
+    waited = 0.0
+    with self._lock:
+      self.vad.reset()
+      while True:
+        block = self._read()
+        # Conditioned every block, silence included, so the filters stay settled
+        conditioned = self.preprocessor.process(to_float(block)) if self.preprocessor else block
+        self.vad.feed(block)
+        if not self.vad.in_speech:
+          pre_roll.append((block, conditioned))
+          self._note_idle(block)
+          waited += chunk / rate
+          if timeout and waited > timeout:
+            raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+          continue
+        first = not frames
+        if first:
+          frames.extend(raw for raw, _ in pre_roll)
+          clean.extend(c for _, c in pre_roll)
+        frames.append(block)
+        clean.append(conditioned)
+        if on_speech:
+          on_speech(np.concatenate(clean) if first else conditioned, first)
+        if self.vad.ended:
+          break
+        if phrase_time_limit and len(frames) * chunk / rate > phrase_time_limit:
+          break
+    # Find the speech on the raw signal, then take the same span of the conditioned one
+    lo, hi = self.vad.bounds(np.concatenate(frames))
+    if self.preprocessor is None:
+      pcm = np.concatenate(frames)[lo:hi].tobytes()
+    else:
+      delay = self.preprocessor.delay
+      pcm = to_pcm16(np.concatenate(clean)[lo + delay:hi + delay]) if hi > lo else b""
+    return sr.AudioData(pcm, rate, source.SAMPLE_WIDTH)
+
+  def stats(self):
+    if not self.vad:
+      return {}
+    stats = self.vad.stats()
+    stats["profile_loaded"] = self.profile_loaded
+    stats["recalibrations"] = self.recalibrations
+    if self.preprocessor:
+      stats["preprocessing"] = self.preprocessor.stats()
+    return stats
@@ -0,0 +1,16 @@
+import numpy as np
+
+
+def to_float(samples):
+  """Accept int16 PCM (bytes or array) or float audio and return float32 in [-1, 1]"""
+  if isinstance(samples, (bytes, bytearray)):
+    return np.frombuffer(samples, dtype=np.int16).astype(np.float32) / 32768.0
+  samples = np.asarray(samples)
+  if samples.dtype == np.int16:
+    return samples.astype(np.float32) / 32768.0
+  return samples.astype(np.float32, copy=False)
+
+def to_pcm16(samples):
+  """Float audio in [-1, 1] to little-endian int16 bytes"""
+  samples = np.clip(to_float(samples), -1.0, 1.0)
+  return (samples * 32767.0).astype("<i2").tobytes()
@@ -0,0 +1,216 @@
+"""Replay recorded utterances through every available ASR engine
+
+Each *.wav in the corpus directory (e.g. the recorded_audio_*.wav files the
+AssemblyAI client writes) is decoded by each engine. A sidecar .txt with the
+same name holds the reference transcript. The JSON report has per-engine
+latency percentiles, real-time factor, peak RSS and word/command accuracy,
+plus every utterance, so two runs can be diffed or compared with --baseline.
+
+Each engine runs in its own process so peak RSS belongs to that engine.
+
+Run from the repo root:
+  python benchmarks/asr_replay.py recordings/ --out report.json
+  python benchmarks/asr_replay.py recordings/ --engines whisper --baseline report.json
+"""
+import os
+import re
+import sys
+import glob
+import json
+import time
+import wave
+import platform
+import argparse
+import subprocess
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from asr_engines import ASRError, ENGINES, create_engine
+
+
+def load_wav(path):
+  with wave.open(path, "rb") as f:
+    width, channels, rate = f.getsampwidth(), f.getnchannels(), f.getframerate()
+    raw = f.readframes(f.getnframes())
+  if width != 2:
+    raise ValueError(f"{path}: only 16-bit PCM is supported")
+  samples = np.frombuffer(raw, dtype="<i2").reshape(-1, channels)
+  return samples.mean(axis=1).astype(np.int16) if channels > 1 else samples[:, 0], rate
+
+def load_corpus(directory, pattern="*.wav"):
+  corpus = []
+  for path in sorted(glob.glob(os.path.join(directory, pattern))):
+    reference = None
+    sidecar = os.path.splitext(path)[0] + ".txt"
+    if os.path.exists(sidecar):
+      with open(sidecar, encoding="utf-8") as f:
+        reference = f.read().strip()
+    corpus.append((path, reference))
+  return corpus
+
+def normalize(text):
+  return re.sub(r"[^\w\s]", " ", text.lower()).split()
+
+def word_errors(reference, hypothesis):
+  """Levenshtein distance over words"""
+  ref, hyp = normalize(reference), normalize(hypothesis)
+  row = np.arange(len(hyp) + 1)
+  for i, word in enumerate(ref, 1):
+    prev, row = row, np.empty_like(row)
+    row[0] = i
+    for j, other in enumerate(hyp, 1):
+      row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (word != other))
+  return int(row[-1]), len(ref)
+
+def command_of(text):
+  words = normalize(text)
+  return " ".join(words[1:] if words[:1] == ["jj"] else words)
+
+def peak_rss_mb():
+  try:
+    import psutil
+    info = psutil.Process().memory_info()
+    return getattr(info, "peak_wset", info.rss) / 2 ** 20
+  except ImportError:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+def percentiles(values):
+  values = np.array(values or [0.0])
+  return {f"p{q}": float(np.percentile(values, q)) for q in (50, 90, 95, 99)} | {
+    "mean": float(values.mean()), "max": float(values.max())}
+
+
+def run_engine(name, corpus, grammar=False):
+  options = {}
+  if grammar and name == "whisper":
+    from command_grammar import CommandGrammar
+    options["grammar"] = CommandGrammar.for_jj(os.path.join(os.path.expanduser("~"), ".jj"))
+  engine = create_engine(name, **options)
+  if not engine.available():
+    return {"engine": name, "available": False}
+
+  engine.warm()
+  rss_before = peak_rss_mb()
+  utterances = []
+  errors = words = commands_right = commands = 0
+  for path, reference in corpus:
+    samples, rate = load_wav(path)
+    entry = {"file": os.path.basename(path), "seconds": len(samples) / rate, "reference": reference}
+    start = time.perf_counter()
+    try:
+      entry["text"] = engine.transcribe(samples, rate)
+    except ASRError as e:
+      entry["error"] = str(e)
+      entry["text"] = ""
+    entry["latency_ms"] = (time.perf_counter() - start) * 1000
+    if reference is not None:
+      e, n = word_errors(reference, entry["text"])
+      entry["wer"] = e / max(n, 1)
+      entry["command_ok"] = command_of(reference) == command_of(entry["text"])
+      errors, words = errors + e, words + n
+      commands_right += entry["command_ok"]
+      commands += 1
+    utterances.append(entry)
+
+  latencies = [u["latency_ms"] for u in utterances if "error" not in u]
+  audio_seconds = sum(u["seconds"] for u in utterances if "error" not in u)
+  return {
+    "engine": name,
+    "available": True,
+    "utterances": len(utterances),
+    "failures": sum("error" in u for u in utterances),
+    "latency_ms": percentiles(latencies),
+    # The first decode includes any warm-up still in flight
+    "first_latency_ms": utterances[0]["latency_ms"] if utterances else None,
+    "rtf": sum(latencies) / 1000 / max(audio_seconds, 1e-9),
+    "peak_rss_mb": peak_rss_mb(),
+    "rss_before_mb": rss_before,
+    "wer": errors / words if words else None,
+    "command_accuracy": commands_right / commands if commands else None,
+    "details": utterances,
+  }
+
+def run_isolated(name, args):
+  """Run one engine in a fresh interpreter and read its JSON result back"""
+  cmd = [sys.executable, os.path.abspath(__file__), args.corpus, "--pattern", args.pattern,
+         "--worker", name] + (["--grammar"] if args.grammar else [])
+  proc = subprocess.run(cmd, capture_output=True, text=True)
+  if proc.returncode != 0:
+    return {"engine": name, "available": False, "error": proc.stderr.strip().splitlines()[-1:]}
+  return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(report, baseline):
+  print(f"\n{'engine':<12} {'metric':<18} {'baseline':>10} {'now':>10} {'change':>9}")
+  for name, now in report["engines"].items():
+    old = baseline.get("engines", {}).get(name)
+    if not old or not old.get("available") or not now.get("available"):
+      continue
+    rows = [("latency p50 ms", old["latency_ms"]["p50"], now["latency_ms"]["p50"]),
+            ("latency p95 ms", old["latency_ms"]["p95"], now["latency_ms"]["p95"]),
+            ("rtf", old["rtf"], now["rtf"]),
+            ("peak rss mb", old["peak_rss_mb"], now["peak_rss_mb"])]
+    if old.get("wer") is not None and now.get("wer") is not None:
+      rows.append(("wer", old["wer"], now["wer"]))
+      rows.append(("command accuracy", old["command_accuracy"], now["command_accuracy"]))
+    for metric, a, b in rows:
+      change = (b - a) / a * 100 if a else 0.0
+      print(f"{name:<12} {metric:<18} {a:>10.3f} {b:>10.3f} {change:>+8.1f}%")
+
+def summarize(report):
+  print(f"{'engine':<12} {'n':>4} {'p50 ms':>8} {'p95 ms':>8} {'rtf':>6} {'rss MB':>7} {'wer':>6} {'cmd acc':>8}")
+  for name, r in report["engines"].items():
+    if not r.get("available"):
+      print(f"{name:<12} unavailable")
+      continue
+    wer = f"{r['wer']:.3f}" if r["wer"] is not None else "-"
+    acc = f"{r['command_accuracy']:.2f}" if r["command_accuracy"] is not None else "-"
+    print(f"{name:<12} {r['utterances']:>4} {r['latency_ms']['p50']:>8.0f} {r['latency_ms']['p95']:>8.0f} "
+          f"{r['rtf']:>6.2f} {r['peak_rss_mb']:>7.0f} {wer:>6} {acc:>8}")
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("corpus", help="directory of .wav utterances with optional .txt references")
+  parser.add_argument("--pattern", default="*.wav")
+  parser.add_argument("--engines", default=",".join(ENGINES), help="comma-separated engine names")
+  parser.add_argument("--grammar", action="store_true", help="decode Whisper against the JJ command grammar")
+  parser.add_argument("--out", help="write the JSON report here")
+  parser.add_argument("--baseline", help="earlier report to compare against")
+  parser.add_argument("--in-process", action="store_true", help="don't isolate engines (RSS is then cumulative)")
+  parser.add_argument("--worker", help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  corpus = load_corpus(args.corpus, args.pattern)
+  if args.worker:
+    print(json.dumps(run_engine(args.worker, corpus, args.grammar)))
+    return
+  if not corpus:
+    sys.exit(f"No files matching {args.pattern} in {args.corpus}")
+
+  report = {
+    "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+    "corpus": {"path": os.path.abspath(args.corpus), "files": len(corpus),
+               "with_reference": sum(r is not None for _, r in corpus)},
+    "engines": {},
+  }
+  for name in args.engines.split(","):
+    name = name.strip()
+    print(f"Replaying {len(corpus)} utterances through {name}...")
+    result = run_engine(name, corpus, args.grammar) if args.in_process else run_isolated(name, args)
+    report["engines"][name] = result
+
+  summarize(report)
+  if args.out:
+    with open(args.out, "w", encoding="utf-8") as f:
+      json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.out}")
+  if args.baseline:
+    with open(args.baseline, encoding="utf-8") as f:
+      compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+  main()
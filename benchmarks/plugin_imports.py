@@ -0,0 +1,85 @@
+"""Cold import cost of jj's startup and of each command plugin
+
+Every measurement runs in a fresh interpreter, so nothing is already in
+sys.modules and each plugin is charged for all of its own dependencies
+(the in-app report only sees what the first plugin to need them paid).
+
+Run from the repo root:
+  python benchmarks/plugin_imports.py
+  python benchmarks/plugin_imports.py --repeat 5 --out imports.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from jj_plugins import PLUGINS
+
+# What jj_automation imports before the mode prompt
+STARTUP = ["output_bus", "tts", "command_router", "command_grammar", "fuzzy_intent", "plugin_loader", "jj_plugins"]
+VOICE = ["keyboard", "speech_recognition", "audio_service", "wake_word", "asr_engines",
+         "noise_profile", "command_listener", "resampler"]
+
+WORKER = """
+import sys, time, json, importlib
+sys.path.insert(0, sys.argv[1])
+timings = {}
+for name in sys.argv[2:]:
+  start = time.perf_counter()
+  try:
+    importlib.import_module(name)
+    timings[name] = (time.perf_counter() - start) * 1000
+  except Exception as e:
+    timings[name] = repr(e)
+print(json.dumps(timings))
+"""
+
+
+def measure(modules, repeat):
+  """Median import time per module (ms) over `repeat` fresh interpreters"""
+  runs = []
+  for _ in range(repeat):
+    out = subprocess.run([sys.executable, "-c", WORKER, ROOT] + modules,
+                         capture_output=True, text=True, check=True).stdout
+    runs.append(json.loads(out))
+  result = {}
+  for name in modules:
+    values = [run[name] for run in runs]
+    failed = [v for v in values if isinstance(v, str)]
+    result[name] = failed[0] if failed else float(np.median(values))
+  return result
+
+def total(timings):
+  return sum(v for v in timings.values() if not isinstance(v, str))
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--repeat", type=int, default=3)
+  parser.add_argument("--out", help="write the report as JSON")
+  args = parser.parse_args()
+
+  groups = {"startup": STARTUP, "voice": VOICE}
+  for plugin in PLUGINS:
+    groups[plugin.name] = plugin.requires + [plugin.module]
+
+  report = {}
+  for name, modules in groups.items():
+    timings = measure(modules, args.repeat)
+    report[name] = {"total_ms": total(timings), "modules": timings}
+    print(f"{name:<10} {total(timings):8.1f} ms")
+    for module, value in timings.items():
+      shown = f"{value:8.1f} ms" if not isinstance(value, str) else f"unavailable: {value}"
+      print(f"    {module:<24} {shown}")
+
+  if args.out:
+    with open(args.out, "w", encoding="utf-8") as f:
+      json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.out}")
+
+
+if __name__ == "__main__":
+  main()
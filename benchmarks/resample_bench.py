@@ -0,0 +1,77 @@
+"""Compare the polyphase resampler with the np.interp resample_audio it replaced
+
+Run from the repo root: python benchmarks/resample_bench.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from resampler import Resampler
+
+TARGET_SR = 16000
+
+
+def resample_audio(audio, orig_sr, target_sr=16000):
+  """The original implementation from speech_to_txt/somethinbg2.0.py"""
+  if orig_sr == target_sr:
+    return audio, target_sr
+
+  duration = len(audio) / orig_sr
+  target_length = int(duration * target_sr)
+  resampled = np.interp(
+    np.linspace(0, len(audio), target_length),
+    np.arange(len(audio)),
+    audio
+  )
+  return resampled, target_sr
+
+def timed(fn, repeat=10):
+  best = float("inf")
+  for _ in range(repeat):
+    start = time.perf_counter()
+    fn()
+    best = min(best, time.perf_counter() - start)
+  return best * 1000
+
+def peak_bytes(fn):
+  tracemalloc.start()
+  fn()
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return peak
+
+def alias_level(resample_fn, orig_sr):
+  """RMS left behind by a 10 kHz tone, which should vanish above the 8 kHz Nyquist"""
+  t = np.arange(orig_sr * 2) / orig_sr
+  out = resample_fn(np.sin(2 * np.pi * 10000 * t).astype(np.float32))
+  return float(np.sqrt(np.mean(out[500:-500] ** 2)))
+
+def main(seconds=5.0, block=1024):
+  rng = np.random.default_rng(0)
+  print(f"{'rate':>6} {'method':<18} {'ms':>8} {'peak KiB':>9} {'alias rms':>10}")
+  for orig_sr in (44100, 48000):
+    audio = (0.1 * rng.standard_normal(int(seconds * orig_sr))).astype(np.float32)
+    resampler = Resampler(orig_sr, TARGET_SR)
+    blocks = [audio[i:i + block] for i in range(0, audio.size, block)]
+
+    def streamed():
+      resampler.reset()
+      out = [resampler.process(b) for b in blocks]
+      out.append(resampler.flush())
+      return out
+
+    rows = [
+      ("np.interp", lambda: resample_audio(audio, orig_sr)[0],
+       lambda x: resample_audio(x, orig_sr)[0]),
+      ("polyphase", lambda: resampler.resample(audio), resampler.resample),
+      ("polyphase stream", streamed, resampler.resample),
+    ]
+    for name, run, fn in rows:
+      print(f"{orig_sr:>6} {name:<18} {timed(run):>8.2f} {peak_bytes(run) / 1024:>9.0f} {alias_level(fn, orig_sr):>10.4f}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,227 @@
+import os
+import numpy as np
+from jj_plugins import PLUGINS
+
+FREE = "*"
+
+APPS = ["chrome", "msedge", "firefox", "spotify", "youtube", "whatsapp"]
+
+# Whisper likes to end sentences with these
+ENDINGS = ["", ".", "!", "?"]
+
+
+def commands_from(plugins):
+  """Grammar phrases for every route in the jj_plugins manifest
+
+  A slot becomes "*" (free text), {app}/{contact} for those slot types, or
+  each word a choice() slot accepts. The grammar decodes freely after a
+  slot, so literal words after it are dropped, and suffix-only patterns
+  ("{query} in spotify") are left out: they have no literal to anchor on,
+  and "play {query} in spotify" covers them.
+  """
+  routes = []
+  for plugin in plugins:
+    for pattern in plugin.routes:
+      prefix = []
+      slot = None
+      for word in pattern.split():
+        if word.startswith("{"):
+          slot = word.strip("{}").partition(":")[2]
+          break
+        prefix.append(word)
+      routes.append((" ".join(prefix), slot, plugin.slot_types.get(slot)))
+  # "spotify {action}" only exists to report unknown actions; keep the choices strict
+  typed = {prefix for prefix, _, convert in routes if hasattr(convert, "values")}
+
+  commands = []
+  for prefix, slot, convert in routes:
+    if not prefix:
+      continue
+    if slot is None:
+      commands.append(prefix)
+    elif hasattr(convert, "values"):
+      commands.extend(f"{prefix} {value}" for value in convert.values)
+    elif slot in ("app", "contact"):
+      commands.extend([f"{prefix} {{{slot}}}", f"{prefix} {FREE}"])
+    elif prefix not in typed:
+      commands.append(f"{prefix} {FREE}")
+  return list(dict.fromkeys(commands))
+
+
+def load_names(path):
+  """One name per line; missing file means no names"""
+  try:
+    with open(path, encoding="utf-8") as f:
+      return [line.strip().lower() for line in f if line.strip()]
+  except FileNotFoundError:
+    return []
+
+
+def expand(commands, slots):
+  """Substitute every {slot} with each of its names"""
+  phrases = []
+  for command in commands:
+    if "{" not in command:
+      phrases.append(command)
+    for slot, values in slots.items():
+      key = "{" + slot + "}"
+      if key in command:
+        phrases.extend(command.replace(key, value) for value in values)
+  return list(dict.fromkeys(phrases))
+
+
+class _Node:
+  __slots__ = ("children", "end", "free")
+
+  def __init__(self):
+    self.children = {}
+    self.end = False
+    self.free = False
+
+
+class GrammarFilter:
+  """whisper LogitFilter that keeps decoding inside the command trie
+
+  Outside slots only tokens that continue some command (or end one) keep
+  their logits. Inside a free slot anything goes, but tokens that would
+  spell a known name are boosted.
+  """
+
+  def __init__(self, root, sample_begin, eot, bias=2.0):
+    self.root = root
+    self.sample_begin = sample_begin
+    self.eot = eot
+    self.bias = bias
+    self._states = {(): root}
+    self.constrained_steps = 0
+
+  def _state(self, tokens):
+    key = tuple(tokens)
+    if key in self._states:
+      return self._states[key]
+    parent = self._state(key[:-1])
+    state = FREE
+    if parent is not FREE:
+      state = parent.children.get(key[-1], FREE)
+    self._states[key] = state
+    return state
+
+  def allowed(self, tokens):
+    """(next tokens, strict) after the sampled `tokens`, or None once decoding is free
+
+    Strict steps mask out every other token; otherwise these are only
+    boosted.
+    """
+    node = self._state(tokens)
+    if node is FREE:
+      return None
+    allowed = list(node.children)
+    if node.free:
+      return allowed, False
+    if node.end:
+      allowed.append(self.eot)
+    return allowed, True
+
+  def apply(self, logits, tokens):
+    import torch
+    for i in range(tokens.shape[0]):
+      step = self.allowed(tokens[i, self.sample_begin:].tolist())
+      if step is None:
+        continue
+      allowed, strict = step
+      if not strict:
+        logits[i, allowed] += self.bias
+        continue
+      mask = torch.full_like(logits[i], -np.inf)
+      mask[allowed] = 0
+      logits[i] += mask
+      self.constrained_steps += 1
+
+
+class CommandGrammar:
+  """Token trie over the JJ command vocabulary for constrained Whisper decoding
+
+  Fixed commands ("jj spotify next") are decoded strictly inside the trie
+  and stop as soon as the phrase is complete; commands with slot text are
+  constrained up to the slot and decode freely from there. If the
+  constrained result is less likely than Whisper's own logprob threshold,
+  the caller should fall back to unconstrained decoding (the audio probably
+  wasn't a command, e.g. a message body).
+  """
+
+  def __init__(self, commands=None, slots=None, prefix="jj", max_tokens=64, logprob_threshold=-1.0):
+    commands = commands if commands is not None else commands_from(PLUGINS)
+    self.phrases = [f"{prefix} {p}".strip() for p in expand(commands, slots or {})]
+    self.max_tokens = max_tokens
+    self.logprob_threshold = logprob_threshold
+    self._tries = {}
+
+    self.decodes = 0
+    self.accepted = 0
+    self.fallbacks = 0
+    self.decoded_tokens = []
+
+  @classmethod
+  def for_jj(cls, data_dir):
+    """Commands plus known apps and the contacts listed in data_dir/contacts.txt"""
+    contacts = load_names(os.path.join(data_dir, "contacts.txt"))
+    return cls(slots={"app": APPS, "contact": contacts})
+
+  def trie(self, tokenizer):
+    key = (tokenizer.encoding.name, tokenizer.language)
+    if key not in self._tries:
+      self._tries[key] = self._build(tokenizer)
+    return self._tries[key]
+
+  def _build(self, tokenizer):
+    root = _Node()
+    for phrase in self.phrases:
+      literal, slot, _ = phrase.partition(FREE)
+      endings = [""] if slot else ENDINGS
+      for ending in endings:
+        node = root
+        for token in tokenizer.encode(" " + literal.strip() + ending):
+          node = node.children.setdefault(token, _Node())
+        if slot:
+          node.free = True
+        else:
+          node.end = True
+    self._soften(root, False)
+    return root
+
+  def _soften(self, node, free):
+    """Names under a free slot ("message dhruv") are only boosted, never forced"""
+    node.free = node.free or free
+    for child in node.children.values():
+      self._soften(child, node.free)
+
+  def decode(self, model, samples, language="en"):
+    """Constrained decode of one short utterance; returns text, or None to fall back"""
+    import whisper
+    from whisper.decoding import DecodingTask, DecodingOptions
+
+    mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(samples), model.dims.n_mels).to(model.device)
+    options = DecodingOptions(language=language, without_timestamps=True, fp16=False,
+                              temperature=0.0, sample_len=self.max_tokens)
+    task = DecodingTask(model, options)
+    grammar = GrammarFilter(self.trie(task.tokenizer), task.sample_begin, task.tokenizer.eot)
+    task.logit_filters.append(grammar)
+    result = task.run(mel[None])[0]
+
+    self.decodes += 1
+    self.decoded_tokens.append(len(result.tokens))
+    if result.avg_logprob < self.logprob_threshold or result.no_speech_prob > 0.6:
+      self.fallbacks += 1
+      return None
+    self.accepted += 1
+    return result.text
+
+  def stats(self):
+    tokens = np.array(self.decoded_tokens or [0])
+    return {
+      "phrases": len(self.phrases),
+      "decodes": self.decodes,
+      "accepted": self.accepted,
+      "fallbacks": self.fallbacks,
+      "tokens_mean": float(tokens.mean()),
+    }
@@ -0,0 +1,103 @@
+import time
+import queue
+import threading
+from collections import deque
+import numpy as np
+
+
+class CommandListener:
+  """Runs capture + recognition on its own thread and queues what was heard
+
+  capture() is called in a loop and returns the next recognised command, or
+  None to stop listening (the None is queued too, so the consumer sees it).
+  The executor takes commands with get() while the listener keeps capturing,
+  so speech during a slow command isn't lost. A prompt takes its answer with
+  answer(), which holds back commands said before the prompt for get().
+  """
+
+  def __init__(self, capture, setup=None, maxsize=0):
+    self.capture = capture
+    self.setup = setup
+    self.commands = queue.Queue(maxsize)
+    self._thread = None
+    self._stopping = threading.Event()
+    # Commands answer() skipped over; only the consumer thread touches this
+    self._held = deque()
+
+    self.heard = 0
+    self.max_depth = 0
+    self.queue_ms = []
+
+  def start(self):
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._thread.start()
+    return self
+
+  @property
+  def running(self):
+    return self._thread is not None and self._thread.is_alive()
+
+  def _run(self):
+    try:
+      if self.setup:
+        self.setup()
+      while not self._stopping.is_set():
+        text = self.capture()
+        self.commands.put((text, time.perf_counter()))
+        if text is None:
+          return
+        self.heard += 1
+        self.max_depth = max(self.max_depth, self.commands.qsize())
+    except Exception as e:
+      print(f"❌ Listener stopped: {e}")
+      self.commands.put((None, time.perf_counter()))
+
+  def get(self, timeout=None):
+    """Next command (None once listening has stopped); raises queue.Empty on timeout"""
+    if self._held:
+      text, heard_at = self._held.popleft()
+    else:
+      text, heard_at = self.commands.get(timeout=timeout)
+    if text is None:
+      # Leave the sentinel for the next caller; a prompt may have taken it first
+      self.commands.put((None, heard_at))
+      return None
+    waited = (time.perf_counter() - heard_at) * 1000
+    self.queue_ms.append(waited)
+    if waited > 500:
+      print(f"⏳ Heard {waited / 1000:.1f}s ago, while the last command was running")
+    return text
+
+  def answer(self, since, timeout=None):
+    """First thing heard after `since` (a perf_counter() time), for prompts
+
+    Commands queued while the previous one ran were said before the prompt
+    and aren't its answer; they're held and get() returns them afterwards.
+    """
+    while True:
+      text, heard_at = self.commands.get(timeout=timeout)
+      if text is None:
+        self.commands.put((None, heard_at))
+        return None
+      if heard_at >= since:
+        return text
+      print(f"⏸️ '{text}' was said before the prompt, running it afterwards")
+      self._held.append((text, heard_at))
+
+  @property
+  def pending(self):
+    return self.commands.qsize() + len(self._held)
+
+  def stop(self):
+    self._stopping.set()
+
+  def stats(self):
+    waits = np.array(self.queue_ms or [0.0])
+    return {
+      "heard": self.heard,
+      "pending": self.pending,
+      "max_queue_depth": self.max_depth,
+      "queue_ms_mean": float(waits.mean()),
+      "queue_ms_p95": float(np.percentile(waits, 95)),
+      "queue_ms_max": float(waits.max()),
+    }
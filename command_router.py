@@ -0,0 +1,201 @@
+import time
+import re
+from collections import Counter
+import numpy as np
+
+_SLOT = re.compile(r"^\{(\w+)(?::(\w+))?\}$")
+
+
+def _text(value):
+  return value
+
+
+def _word(value):
+  if " " in value:
+    raise ValueError(f"expected one word, got {value!r}")
+  return value
+
+
+# Slot types turn the matched words into a value or raise ValueError
+SLOT_TYPES = {"text": _text, "word": _word, "int": int}
+
+
+def choice(*values, **aliases):
+  """Slot type accepting only `values`, with aliases mapped onto them"""
+  allowed = dict(aliases)
+  allowed.update((v, v) for v in values)
+
+  def convert(value):
+    if value not in allowed:
+      raise ValueError(f"{value!r} is not one of {sorted(allowed)}")
+    return allowed[value]
+  convert.values = sorted(allowed)
+  return convert
+
+
+class Route:
+  def __init__(self, pattern, handler, order, slot_types):
+    self.pattern = pattern
+    self.handler = handler
+    self.order = order
+    self.prefix = []
+    self.suffix = []
+    self.slot = None
+    self.convert = None
+    for word in pattern.split():
+      m = _SLOT.match(word)
+      if m:
+        if self.slot is not None:
+          raise ValueError(f"only one slot per pattern: {pattern!r}")
+        self.slot = m.group(1)
+        kind = m.group(2) or "text"
+        if kind not in slot_types:
+          raise ValueError(f"unknown slot type {kind!r} in {pattern!r}")
+        self.convert = slot_types[kind]
+      elif self.slot is None:
+        self.prefix.append(word)
+      else:
+        self.suffix.append(word)
+    self.prefix = tuple(self.prefix)
+    self.suffix = tuple(self.suffix)
+    if self.slot is None and not self.prefix:
+      raise ValueError("empty pattern")
+    if self.slot is not None and not self.prefix and not self.suffix:
+      raise ValueError(f"a lone slot would match everything, use fallback(): {pattern!r}")
+
+
+class _Node:
+  __slots__ = ("children", "routes")
+
+  def __init__(self):
+    self.children = {}
+    self.routes = []
+
+
+class CommandRouter:
+  """Dispatches commands from declarative patterns instead of an if/elif chain
+
+  A pattern is literal words with at most one `{name}` or `{name:type}`
+  slot, e.g. "message {contact}", "play {query} on spotify" or
+  "spotify {action:spotify_action}". A slot takes one or more words.
+  Patterns with a leading literal go into a word trie walked from the
+  front of the command; the rest are suffix patterns in a trie walked from
+  the back. When several match, the one registered first wins, just as
+  the earlier branch of the old chain did. A slot that fails its type
+  conversion rejects that route and the next candidate is tried.
+  """
+
+  def __init__(self):
+    self.routes = []
+    self.slot_types = dict(SLOT_TYPES)
+    self._fallback = None
+    self._prefix = None
+    self._suffix = None
+
+    self.calls = Counter()
+    self.unmatched = 0
+    self.slot_errors = 0
+    self.parse_us = []
+
+  def slot_type(self, name, convert):
+    self.slot_types[name] = convert
+
+  def add(self, pattern, handler):
+    self.routes.append(Route(pattern, handler, len(self.routes), self.slot_types))
+    self._prefix = None
+    return handler
+
+  def route(self, *patterns):
+    """Decorator form of add() for one or more patterns"""
+    def register(handler):
+      for pattern in patterns:
+        self.add(pattern, handler)
+      return handler
+    return register
+
+  def fallback(self, handler):
+    """Called with the whole command when nothing matches"""
+    self._fallback = handler
+    return handler
+
+  def keywords(self):
+    """Every literal word in the patterns, plus the words choice() slots accept"""
+    words = set()
+    for route in self.routes:
+      words.update(route.prefix)
+      words.update(route.suffix)
+      words.update(getattr(route.convert, "values", ()))
+    return sorted(words)
+
+  def compile(self):
+    self._prefix = _Node()
+    self._suffix = _Node()
+    for route in self.routes:
+      if route.prefix:
+        node, words = self._prefix, route.prefix
+      else:
+        node, words = self._suffix, reversed(route.suffix)
+      for word in words:
+        node = node.children.setdefault(word, _Node())
+      node.routes.append(route)
+
+  def _candidates(self, words):
+    n = len(words)
+    found = []
+    node = self._prefix
+    for depth, word in enumerate(words):
+      node = node.children.get(word)
+      if node is None:
+        break
+      for route in node.routes:
+        if route.slot is None:
+          if depth + 1 == n:
+            found.append((route, None))
+          continue
+        end = n - len(route.suffix)
+        if end > depth + 1 and tuple(words[end:]) == route.suffix:
+          found.append((route, words[depth + 1:end]))
+    node = self._suffix
+    for depth, word in enumerate(reversed(words)):
+      node = node.children.get(word)
+      if node is None:
+        break
+      if depth + 1 < n:
+        found.extend((route, words[:n - depth - 1]) for route in node.routes)
+    found.sort(key=lambda c: c[0].order)
+    return found
+
+  def match(self, command):
+    """(route, kwargs) for the winning route, or (None, None)"""
+    if self._prefix is None:
+      self.compile()
+    for route, slot_words in self._candidates(command.split()):
+      if route.slot is None:
+        return route, {}
+      try:
+        return route, {route.slot: route.convert(" ".join(slot_words))}
+      except ValueError:
+        self.slot_errors += 1
+    return None, None
+
+  def dispatch(self, command):
+    start = time.perf_counter()
+    route, kwargs = self.match(command)
+    self.parse_us.append((time.perf_counter() - start) * 1e6)
+    if route is None:
+      self.unmatched += 1
+      return self._fallback(command) if self._fallback else None
+    self.calls[route.handler.__name__] += 1
+    return route.handler(**kwargs)
+
+  def stats(self):
+    parse = np.array(self.parse_us or [0.0])
+    return {
+      "routes": len(self.routes),
+      "dispatched": len(self.parse_us),
+      "unmatched": self.unmatched,
+      "slot_errors": self.slot_errors,
+      "parse_us_mean": float(parse.mean()),
+      "parse_us_p95": float(np.percentile(parse, 95)),
+      "calls": dict(self.calls),
+    }
@@ -0,0 +1,173 @@
+import os
+import time
+import threading
+import numpy as np
+from whisper_cache import warm_model, get_model
+
+
+class DecodingProfile:
+  """One point on the Whisper speed/accuracy curve"""
+
+  def __init__(self, name, model_size, beam_size=1, sample_len=224, threads=None):
+    self.name = name
+    self.model_size = model_size
+    self.beam_size = beam_size
+    self.sample_len = sample_len      # max tokens decoded per 30s window
+    self.threads = threads or os.cpu_count() or 1
+
+  def options(self):
+    options = dict(fp16=False, condition_on_previous_text=False, temperature=0.0,
+                   sample_len=self.sample_len, task="transcribe")
+    if self.beam_size > 1:
+      options.update(beam_size=self.beam_size, best_of=1, patience=1.0)
+    return options
+
+  def __repr__(self):
+    return f"DecodingProfile({self.name}: {self.model_size}, beam={self.beam_size}, threads={self.threads})"
+
+
+# Cheapest first. Tiny models stop scaling past a few threads.
+PROFILES = [
+  DecodingProfile("command", "tiny", beam_size=1, sample_len=24, threads=min(4, os.cpu_count() or 1)),
+  DecodingProfile("fast", "base", beam_size=1, sample_len=96),
+  DecodingProfile("balanced", "small", beam_size=2),
+  DecodingProfile("accurate", "small", beam_size=5),
+]
+
+# Roughly what conversational speech turns into, plus the special tokens
+TOKENS_PER_SECOND = 4.0
+TOKEN_OVERHEAD = 4
+
+
+class ProfileSelector:
+  """Picks a decoding profile per utterance so decodes fit target_ms
+
+  calibrate() measures, on this host, what one encoder pass and one decoder
+  step cost for each profile; an utterance's latency is then estimated from
+  its length and corrected by how far off past estimates were. Utterances
+  shorter than short_seconds ("jj next") always get the cheapest profile.
+  The first detected language is kept for the rest of the session so
+  detection doesn't run on every decode.
+  """
+
+  def __init__(self, profiles=PROFILES, target_ms=1500, device="cpu", default="balanced",
+               short_seconds=1.5, language=None):
+    self.profiles = list(profiles)
+    self.target_ms = target_ms
+    self.device = device
+    self.default = next(p for p in self.profiles if p.name == default)
+    self.short_seconds = short_seconds
+    self.language = language
+    self.calibrated = False
+
+    self.encode_ms = {}
+    self.step_ms = {}
+    self.correction = {p.name: 1.0 for p in self.profiles}
+    self.chosen = {p.name: 0 for p in self.profiles}
+    self.latencies_ms = []
+    self.overruns = 0
+    self._calibrating = None
+    # torch's thread count is process-wide: whoever sets it holds this until done
+    self._torch_lock = threading.Lock()
+
+  # ---------- calibration ----------
+  def warm(self, calibrate=True):
+    """Load the default and command models now and calibrate in the background"""
+    warm_model(self.default.model_size, self.device)
+    warm_model(self.profiles[0].model_size, self.device)
+    if calibrate and not self.calibrated and self._calibrating is None:
+      self._calibrating = threading.Thread(target=self.calibrate, daemon=True)
+      self._calibrating.start()
+
+  def calibrate(self, repeats=3):
+    """Time the encoder and a decoder step for every profile on this host
+
+    Runs one profile at a time under the torch lock, so a live decode waits
+    for at most one profile's timing and never runs at the wrong thread count.
+    """
+    import torch
+    import whisper
+    noise = (np.random.default_rng(0).standard_normal(16000 * 2) * 0.01).astype(np.float32)
+    for profile in self.profiles:
+      model = get_model(profile.model_size, self.device)
+      mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(noise), model.dims.n_mels)
+      with self._torch_lock, torch.no_grad():
+        torch.set_num_threads(profile.threads)
+        batch = mel[None].to(model.device)
+        model.embed_audio(batch)    # first call pays one-off allocation costs
+        start = time.perf_counter()
+        for _ in range(repeats):
+          features = model.embed_audio(batch)
+        self.encode_ms[profile.name] = (time.perf_counter() - start) * 1000 / repeats
+
+        sot = whisper.tokenizer.get_tokenizer(model.is_multilingual).sot_sequence
+        tokens = torch.tensor([list(sot)] * profile.beam_size, device=model.device)
+        features = features.repeat(profile.beam_size, 1, 1)
+        start = time.perf_counter()
+        for _ in range(repeats):
+          model.logits(tokens, features)
+        self.step_ms[profile.name] = (time.perf_counter() - start) * 1000 / repeats
+    self.calibrated = True
+    print("⏱️  Whisper profiles calibrated: " + ", ".join(
+      f"{p.name} ~{self.estimate_ms(p, 3.0):.0f}ms/3s" for p in self.profiles))
+
+  # ---------- selection ----------
+  def estimate_ms(self, profile, seconds):
+    if profile.name not in self.encode_ms:
+      return float("inf")
+    tokens = min(profile.sample_len, TOKEN_OVERHEAD + TOKENS_PER_SECOND * seconds)
+    raw = self.encode_ms[profile.name] + tokens * self.step_ms[profile.name]
+    return raw * self.correction[profile.name]
+
+  def choose(self, seconds):
+    """Most accurate profile expected to finish within target_ms"""
+    if seconds <= self.short_seconds:
+      return self.profiles[0]
+    if not self.calibrated:
+      return self.default
+    fitting = [p for p in self.profiles if self.estimate_ms(p, seconds) <= self.target_ms]
+    return fitting[-1] if fitting else self.profiles[0]
+
+  def decode(self, samples, profile=None):
+    """Transcribe 16kHz float32 audio with the chosen profile; returns Whisper's result dict"""
+    import torch
+    seconds = len(samples) / 16000
+    profile = profile or self.choose(seconds)
+    model = get_model(profile.model_size, self.device)
+    estimate = self.estimate_ms(profile, seconds)
+
+    with self._torch_lock:
+      torch.set_num_threads(profile.threads)
+      start = time.perf_counter()
+      result = model.transcribe(samples, language=self.language, **profile.options())
+      elapsed = (time.perf_counter() - start) * 1000
+
+    self.chosen[profile.name] += 1
+    self.latencies_ms.append(elapsed)
+    if elapsed > self.target_ms:
+      self.overruns += 1
+    if np.isfinite(estimate) and estimate > 0:
+      # Nudge the estimate towards what this host actually delivered
+      ratio = elapsed / (estimate / self.correction[profile.name])
+      self.correction[profile.name] = 0.8 * self.correction[profile.name] + 0.2 * ratio
+    if self.language is None and result.get("language"):
+      self.language = result["language"]
+    result["profile"] = profile.name
+    result["latency_ms"] = elapsed
+    return result
+
+  def reset_language(self):
+    """Detect the language again on the next decode"""
+    self.language = None
+
+  def stats(self):
+    latencies = np.array(self.latencies_ms or [0.0])
+    return {
+      "calibrated": self.calibrated,
+      "target_ms": self.target_ms,
+      "language": self.language,
+      "chosen": dict(self.chosen),
+      "latency_ms_p50": float(np.percentile(latencies, 50)),
+      "latency_ms_p95": float(np.percentile(latencies, 95)),
+      "over_target": self.overruns,
+    }
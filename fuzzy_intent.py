@@ -0,0 +1,201 @@
+import time
+from difflib import SequenceMatcher
+from collections import defaultdict
+import numpy as np
+
+_SOUNDEX = {c: d for d, letters in
+            {"1": "bfpv", "2": "cgjkqsxz", "3": "dt", "4": "l", "5": "mn", "6": "r"}.items()
+            for c in letters}
+
+
+def soundex(word):
+  """Four-character Soundex key; "spotify" and "spotty fly" both give s131"""
+  letters = [c for c in word.lower() if c.isalpha()]
+  if not letters:
+    return ""
+  key = letters[0]
+  last = _SOUNDEX.get(letters[0], "")
+  for c in letters[1:]:
+    code = _SOUNDEX.get(c, "")
+    if code and code != last:
+      key += code
+    # h and w don't separate repeated codes, vowels do
+    if c not in "hw":
+      last = code
+  return (key + "000")[:4]
+
+
+def ngrams(word, n=3):
+  padded = f" {word} "
+  return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class FuzzyIndex:
+  """Known words indexed by character trigrams and Soundex key
+
+  lookup() only scores words that share a key or at least `min_shared`
+  trigrams with the query, so a miss costs a few dict lookups rather than
+  a scan of the whole vocabulary. The score is difflib's similarity ratio
+  plus `phonetic_bonus` when the Soundex keys agree.
+  """
+
+  def __init__(self, words=(), n=3, min_shared=2, phonetic_bonus=0.1):
+    self.n = n
+    self.min_shared = min_shared
+    self.phonetic_bonus = phonetic_bonus
+    self.words = set()
+    self._grams = defaultdict(set)
+    self._sounds = defaultdict(set)
+    for word in words:
+      self.add(word)
+
+  def add(self, word):
+    word = word.lower()
+    # Multi-word names are matched with their spaces removed
+    key = word.replace(" ", "")
+    if not key or word in self.words:
+      return
+    self.words.add(word)
+    for gram in ngrams(key, self.n):
+      self._grams[gram].add(word)
+    self._sounds[soundex(key)].add(word)
+
+  def __contains__(self, word):
+    return word in self.words
+
+  def lookup(self, text):
+    """(word, score) for the closest known word, or (None, 0.0)"""
+    key = text.lower().replace(" ", "")
+    shared = defaultdict(int)
+    for gram in ngrams(key, self.n):
+      for word in self._grams.get(gram, ()):
+        shared[word] += 1
+    sound = soundex(key)
+    candidates = {w for w, count in shared.items() if count >= self.min_shared}
+    candidates.update(self._sounds.get(sound, ()))
+
+    best, best_score = None, 0.0
+    for word in candidates:
+      compact = word.replace(" ", "")
+      score = SequenceMatcher(None, key, compact).ratio()
+      if soundex(compact) == sound:
+        score = min(1.0, score + self.phonetic_bonus)
+      if score > best_score:
+        best, best_score = word, score
+    return best, best_score
+
+
+class IntentMatcher:
+  """Recovers misheard commands that no route matched
+
+  Every word not already in the keyword index, and every pair of
+  neighbours ("spotty fly"), is looked up. Corrections are tried alone,
+  most confident first, and then stacked, stopping as soon as the router
+  matches, so song names and queries are left alone as far as possible.
+  The result is run when the weakest correction used scores at least
+  `accept`, and only offered as a suggestion down to `suggest`.
+  `accept_for` overrides `accept` per handler name ("core.goodbye"); None
+  there means the intent is only ever suggested, never run from a guess.
+  """
+
+  def __init__(self, router, keywords, accept=0.7, suggest=0.6, min_length=3, accept_for=None):
+    self.router = router
+    self.keywords = keywords
+    self.accept = accept
+    self.accept_for = accept_for or {}
+    self.suggest = suggest
+    self.min_length = min_length
+
+    self.attempts = 0
+    self.recovered = 0
+    self.suggested = 0
+    self.failed = 0
+    self.match_us = []
+
+  def _corrections(self, words):
+    found = []
+    for i in range(len(words)):
+      for width in (2, 1):
+        span = words[i:i + width]
+        if len(span) < width:
+          continue
+        text = " ".join(span)
+        # Only unknown words get corrected, never a keyword already heard right
+        if any(w in self.keywords for w in span) or len(text) < self.min_length:
+          continue
+        word, score = self.keywords.lookup(text)
+        if word is not None and score >= self.suggest and word != text:
+          found.append((score, i, width, word))
+    found.sort(key=lambda c: -c[0])
+    return found
+
+  def _apply(self, words, corrections):
+    slots = [[w] for w in words]
+    for _, i, width, word in corrections:
+      slots[i] = [word]
+      for j in range(i + 1, i + width):
+        slots[j] = []
+    return " ".join(w for slot in slots for w in slot)
+
+  def _plans(self, corrections):
+    # Each correction on its own first ("spotty fly" as a pair can beat
+    # "spotty" alone), then the most confident non-overlapping ones stacked up
+    for correction in corrections:
+      yield [correction]
+    used, stacked = set(), []
+    for correction in corrections:
+      _, i, width, _ = correction
+      span = set(range(i, i + width))
+      if span & used:
+        continue
+      used |= span
+      stacked.append(correction)
+      if len(stacked) > 1:
+        yield list(stacked)
+
+  def _runs(self, route, confidence):
+    threshold = self.accept_for.get(route.handler.__name__, self.accept)
+    return threshold is not None and confidence >= threshold
+
+  def match(self, command):
+    """(corrected command, confidence, run it?), or (None, 0.0, False) if nothing routes"""
+    start = time.perf_counter()
+    self.attempts += 1
+    words = command.split()
+    result = (None, 0.0, False)
+    for plan in self._plans(self._corrections(words)):
+      corrected = self._apply(words, plan)
+      route, _ = self.router.match(corrected)
+      if route is not None:
+        confidence = min(c[0] for c in plan)
+        result = (corrected, confidence, self._runs(route, confidence))
+        break
+    self.match_us.append((time.perf_counter() - start) * 1e6)
+    if result[0] is None:
+      self.failed += 1
+    elif result[2]:
+      self.recovered += 1
+    else:
+      self.suggested += 1
+    return result
+
+  def stats(self):
+    times = np.array(self.match_us or [0.0])
+    return {
+      "attempts": self.attempts,
+      "recovered": self.recovered,
+      "suggested": self.suggested,
+      "failed": self.failed,
+      "match_us_mean": float(times.mean()),
+      "match_us_p95": float(np.percentile(times, 95)),
+    }
+
+
+def snap_to(index, threshold=0.8):
+  """Router slot type that replaces a near-miss with the known name"""
+  def convert(value):
+    if value in index:
+      return value
+    word, score = index.lookup(value)
+    return word if score >= threshold else value
+  return convert
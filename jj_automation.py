@@ -1,85 +1,211 @@
-import os
-import webbrowser
-import shutil
-import winreg
 import time
-import speech_recognition as sr
-import keyboard
-import pyttsx3
-import urllib.parse
-import pyautogui
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+# Before anything heavy is imported, so the report shows what startup costs
+_import_start = time.perf_counter()
+import os
+from output_bus import OutputBus, ConsoleSink, SpeechSink, JsonlSink, MetricsSink
+from tts import Speaker, PhraseCache
+from command_router import CommandRouter
+from command_grammar import APPS, load_names
+from fuzzy_intent import FuzzyIndex, IntentMatcher, snap_to
+from plugin_loader import PluginLoader
+from jj_plugins import PLUGINS, FUZZY_ACCEPT, Context
+STARTUP_IMPORT_MS = (time.perf_counter() - _import_start) * 1000
+
+JJ_DATA_DIR = os.path.join(os.path.expanduser("~"), ".jj")
+WAKE_WORD_PATH = os.path.join(JJ_DATA_DIR, "wake_word.npz")
+NOISE_PROFILE_PATH = os.path.join(JJ_DATA_DIR, "noise_profiles.json")
+TTS_CACHE_DIR = os.path.join(JJ_DATA_DIR, "tts_cache")
+OUTPUT_LOG_PATH = os.path.join(JJ_DATA_DIR, "output.jsonl")
 
-CHROME_PATH = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
-USER_DATA_DIR = os.path.join(os.path.expanduser("~"), "ChromeAutomation")
+# Fixed confirmations; rendered once and then played from memory
+FIXED_PHRASES = [
+  "An error occurred", "Calibrating microphone, please wait", "Contact selected",
+  "Error controlling Spotify", "Error during search", "Error opening Spotify",
+  "Error opening Spotify. Make sure it's installed.", "Error opening WhatsApp",
+  "Error opening YouTube", "Error playing video", "Error sending WhatsApp message",
+  "Failed to open Chrome", "Goodbye", "Hello I am Jamnalaal Jamdaas in short JJ",
+  "Message cancelled", "Message sent", "No contact provided", "No search query provided",
+  "No song name provided", "No video name provided", "Opened Spotify", "Opened YouTube",
+  "Opening WhatsApp", "Opening WhatsApp Web", "Please scan QR code", "Ready. I'm listening",
+  "Recognition service error", "Say jj after each beep", "Search results displayed",
+  "Unknown command", "WhatsApp logged in", "WhatsApp ready",
+]
 
-driver = None
+# google, whisper, assemblyai, or auto to use whichever is fastest here
+ASR_ENGINE = os.environ.get("JJ_ASR_ENGINE", "google")
+
+audio = None
+spotter = None
+asr = None
+listener = None
 input_mode = None
-whatsapp_logged_in = False
 
-def speak(text):
+# One engine on its own thread; handlers queue speech and carry on, and
+# saying "jj" cuts it off
+speaker = Speaker(rate=175, volume=0.9, cache=PhraseCache(TTS_CACHE_DIR, FIXED_PHRASES))
+
+def speak(text, wait=False):
+  print(text)
+  speaker.speak(text, wait=wait)
+
+# Handlers report through here; the speech sink is added in continuous voice mode
+os.makedirs(JJ_DATA_DIR, exist_ok=True)
+bus = OutputBus([ConsoleSink(), JsonlSink(OUTPUT_LOG_PATH), MetricsSink()])
+
+def notify(text, spoken=None, level="result", topic=None):
+  """Report progress/results/errors without waiting for speech or logging to finish
+
+  level is "error", "result" or "progress"; a newer message on the same
+  topic drops progress messages for it that haven't been said yet; the console
+  prints everything, in order, before this returns.
+  """
+  bus.notify(text, spoken, level, topic)
+
+def get_audio_service():
+  """Create the shared microphone service on first use"""
+  global audio
+  if audio is None:
+    # Reuses the saved noise calibration for this mic and keeps it fresh while idle
+    audio = AudioService(profile_store=NoiseProfileStore(NOISE_PROFILE_PATH))
+    audio.open()
+  return audio
+
+def get_asr():
+  """Pick the recognition backend(s) configured by JJ_ASR_ENGINE"""
+  global asr
+  if asr is None:
+    names = list(ENGINES) if ASR_ENGINE == "auto" else [ASR_ENGINE]
+    # Whisper decodes against the command grammar (plus ~/.jj/contacts.txt)
+    asr = EngineSelector.from_names(names, {"whisper": {"grammar": CommandGrammar.for_jj(JJ_DATA_DIR)}})
+  return asr
+
+def recognize(audio_data):
+  return get_asr().transcribe(audio_data.get_raw_data(convert_width=2), audio_data.sample_rate)
+
+def get_spotter():
+  """Load the on-device "jj" spotter and its saved templates"""
+  global spotter
+  if spotter is None:
+    spotter = KeywordSpotter(template_path=WAKE_WORD_PATH)
+  return spotter
+
+def beep(frequency=880, duration_ms=150):
+  """Short cue tone; falls back to the terminal bell where winsound doesn't exist"""
   try:
-    engine = pyttsx3.init()
-    engine.setProperty('rate', 175)
-    engine.setProperty('volume', 0.9)
-    print(text)
-    engine.say(text)
-    engine.runAndWait()
-    engine.stop()
-  except Exception as e:
-    print(f"Speech error: {e}")
+    import winsound
+    winsound.Beep(frequency, duration_ms)
+  except ImportError:
+    print("\a", end="", flush=True)
 
-def get_voice_input_continuous(first_run=False):
-  r = sr.Recognizer()
-  mic = sr.Microphone()
-  
-  if first_run:
-    speak("Hello I am Jamnalaal Jamdaas in short JJ")
-    time.sleep(0.1)
+def enroll_wake_word(service, kws, count=3):
+  """Record a few samples of "jj" so the spotter can gate cloud recognition"""
+  speak("Say jj after each beep", wait=True)
+  for i in range(count):
+    print(f"🎙️ Say 'jj' ({i + 1}/{count})...")
+    beep()
+    # Don't enroll the beep (or anything heard before it)
+    service.flush()
+    try:
+      sample = service.listen(timeout=5, phrase_time_limit=2)
+      kws.enroll(sample.get_raw_data(convert_rate=kws.sample_rate, convert_width=2))
+    except Exception as e:
+      print(f"⚠️ Skipped sample: {e}")
+  if kws.enrolled:
+    kws.save()
+    print(f"✅ Wake word saved ({len(kws.templates)} samples)")
+
+def prepare_continuous():
+  """One-off setup for continuous mode, run on the listener thread"""
+  # Model loads overlap with the greeting and calibration below
+  get_asr().warm()
+  service = get_audio_service()
+  kws = get_spotter()
+  
+  speak("Hello I am Jamnalaal Jamdaas in short JJ")
+  time.sleep(0.1)
+  if service.profile_loaded:
+    print("🔇 Using saved noise profile for this microphone")
+  else:
     print("Calibrating microphone for ambient noise... Please wait...")
-    speak("Calibrating microphone, please wait")
-    
-    with mic as source:
-      r.adjust_for_ambient_noise(source, duration=2)
-    
-    print("Calibration complete! Listening continuously. Press ESC to stop listening.")
-    speak("Ready. I'm listening")
+    # The mic must not hear us while it measures the room
+    speak("Calibrating microphone, please wait", wait=True)
+    service.calibrate(duration=2)
+  
+  if not kws.enrolled:
+    enroll_wake_word(service, kws)
+  
+  print("Calibration complete! Listening continuously. Press ESC to stop listening.")
+  speak("Ready. I'm listening")
+
+def barge_in_hook(service, kws):
+  """Spot "jj" while the utterance is still being captured and silence any TTS"""
+  resampler = Resampler(service.source.SAMPLE_RATE, kws.sample_rate)
+  spotting = [False]
+  
+  def on_speech(block, first):
+    if first or not speaker.speaking:
+      spotting[0] = False
+    if not speaker.speaking:
+      return
+    # Start clean whenever spotting begins, even if TTS started mid-utterance,
+    # so a trigger left over from the last detect() can't fire
+    if not spotting[0]:
+      kws.reset()
+      resampler.reset()
+      spotting[0] = True
+    if kws.feed(resampler.process(block)):
+      speaker.interrupt()
+  
+  return on_speech
+
+def get_voice_input_continuous():
+  service = get_audio_service()
+  kws = get_spotter()
+  on_speech = barge_in_hook(service, kws)
   
   while True:
     if keyboard.is_pressed("esc"):
       print("Stopping continuous listening...")
+      if kws.enrolled:
+        print(f"📊 Wake word stats: {kws.stats()}")
+      print(f"📊 Endpointing stats: {service.stats()}")
+      print(f"📊 Recognition stats: {get_asr().stats()}")
+      if listener:
+        print(f"📊 Command queue stats: {listener.stats()}")
+      print(f"📊 Speech stats: {speaker.stats()}")
+      print(f"📊 Output stats: {bus.stats()}")
+      print(f"📊 Command stats: {router.stats()}")
+      print(f"📊 Fuzzy match stats: {intents.stats()}")
+      print(f"📊 Plugin stats: {plugins.stats()}")
       speak("Goodbye")
       return None
     
     try:
-      with mic as source:
-        if first_run:
-          r.adjust_for_ambient_noise(source, duration=0.5)
-        print("🎤 Listening... say 'jj' to give a command")
-        audio = r.listen(source, timeout=10, phrase_time_limit=20)
-        
-        print("🔄 Processing...")
-        text = r.recognize_google(audio)
-        print(f"📢 Heard: {text}")
-        
-        if text.lower().strip().startswith("jj"):
-          return text
-        else:
-          print("❌ Command ignored (didn't start with 'jj')\n")
+      print("🎤 Listening... say 'jj' to give a command")
+      audio_data = service.listen(timeout=10, phrase_time_limit=20, on_speech=on_speech)
+      
+      # Only pay for a cloud round trip when "jj" was spotted locally
+      if not kws.detect(audio_data.get_raw_data(convert_rate=kws.sample_rate, convert_width=2)):
+        print("💤 No wake word, skipped\n")
+        continue
+      
+      print("🔄 Processing...")
+      text = recognize(audio_data)
+      if not text:
+        print("❓ Could not understand, still listening...\n")
+        continue
+      print(f"📢 Heard: {text}")
+      
+      if text.lower().strip().startswith("jj"):
+        return text
+      else:
+        if kws.enrolled:
+          kws.report_false_accept()
+        print("❌ Command ignored (didn't start with 'jj')\n")
           
     except sr.WaitTimeoutError:
       continue
-    except sr.UnknownValueError:
-      print("❓ Could not understand, still listening...\n")
-      continue
-    except sr.RequestError as e:
+    except ASRError as e:
       print(f"❌ Recognition service error: {e}")
       speak("Recognition service error")
       time.sleep(1)
@@ -91,8 +217,8 @@ def get_voice_input_continuous(first_run=False):
       continue
 
 def get_voice_input_button():
-  r = sr.Recognizer()
-  mic = sr.Microphone()
+  get_asr().warm()
+  service = get_audio_service()
   
   max_retries = 3
   retry_count = 0
@@ -112,410 +238,50 @@ def get_voice_input_button():
 
       if keyboard.is_pressed("space"):
         print("Listening...")
-        with mic as source:
-          r.adjust_for_ambient_noise(source, duration=0.5)
-          start_time = time.time()
-          try:
-            audio = r.listen(source, timeout=30, phrase_time_limit=20)
-            duration = time.time() - start_time
-            print(f"Recognizing ({duration:.1f}s)...")
-            
-            text = r.recognize_google(audio)
-            print("You said:", text)
-            return text
-            
-          except sr.WaitTimeoutError:
-            print("No speech detected.")
-            retry_count += 1
-            break
-          except sr.UnknownValueError:
+        # Stream stays open between presses, so drop whatever queued up while idle
+        service.flush()
+        start_time = time.time()
+        try:
+          audio_data = service.listen(timeout=30, phrase_time_limit=20)
+          duration = time.time() - start_time
+          print(f"Recognizing ({duration:.1f}s)...")
+          
+          text = recognize(audio_data)
+          if not text:
             print("Could not understand. Please try again...")
             retry_count += 1
             break
-          except sr.RequestError as e:
-            print(f"Recognition service error: {e}")
-            return None
-          finally:
-            while keyboard.is_pressed("space"):
-              time.sleep(0.01)
+          print("You said:", text)
+          return text
+          
+        except sr.WaitTimeoutError:
+          print("No speech detected.")
+          retry_count += 1
+          break
+        except ASRError as e:
+          print(f"Recognition service error: {e}")
+          return None
+        finally:
+          while keyboard.is_pressed("space"):
+            time.sleep(0.01)
   
   print(f"Failed after {max_retries} attempts.")
   return None
 
-def has_protocol(name):
-  try:
-    key = winreg.OpenKey(winreg.HKEY_CLASSES_ROOT, f"{name}")
-    try:
-      winreg.QueryValueEx(key, "URL Protocol")
-      winreg.CloseKey(key)
-      return True
-    except:
-      winreg.CloseKey(key)
-      return False
-  except:
-    return False
-
-def create_driver():
-  options = Options()
-  options.binary_location = CHROME_PATH
-  
-  if not os.path.exists(USER_DATA_DIR):
-    os.makedirs(USER_DATA_DIR)
-  
-  options.add_argument(f"--user-data-dir={USER_DATA_DIR}")
-  options.add_argument("--profile-directory=Default")
-  options.add_argument("--remote-allow-origins=*")
-  options.add_argument("--no-sandbox")
-  options.add_argument("--disable-gpu")
-  options.add_argument("--disable-dev-shm-usage")
-  options.add_argument("--disable-software-rasterizer")
-  options.add_argument("--disable-blink-features=AutomationControlled")
-  options.add_argument("--start-maximized")
-  options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
-  options.add_experimental_option("useAutomationExtension", False)
-  
-  try:
-    new_driver = webdriver.Chrome(
-      service=Service(ChromeDriverManager().install()), 
-      options=options
-    )
-    print("Chrome opened successfully!")
-    return new_driver
-  except Exception as e:
-    print(f"Error creating driver: {e}. Trying alternative method...")
-    
-    try:
-      options2 = Options()
-      options2.binary_location = CHROME_PATH
-      options2.add_argument("--remote-allow-origins=*")
-      options2.add_argument("--no-sandbox")
-      options2.add_argument("--disable-dev-shm-usage")
-      options2.add_argument("--start-maximized")
-      options2.add_experimental_option('excludeSwitches', ['enable-logging'])
-      
-      new_driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()), 
-        options=options2
-      )
-      print("Chrome opened (temporary session)")
-      return new_driver
-    except Exception as e2:
-      print(f"Failed to open Chrome: {e2}")
-      if input_mode == "voice_continuous":
-        speak("Failed to open Chrome")
-      return None
-
 def cleanup_driver():
-  global driver, whatsapp_logged_in
-  if driver:
-    try:
-      driver.quit()
-    except:
-      pass
-    driver = None
-    whatsapp_logged_in = False
-
-# ============= SPOTIFY FUNCTIONS =============
-def play_spotify_song(query):
-  """Play a song on Spotify app"""
-  msg = f"🎵 Searching Spotify for: {query}"
-  if input_mode == "voice_continuous":
-    speak(f"Playing {query} on Spotify")
-  else:
-    print(msg)
-  
-  try:
-    search_query = urllib.parse.quote(query)
-    spotify_uri = f"spotify:search:{search_query}"
-    os.startfile(spotify_uri)
-    
-    time.sleep(2)
-    pyautogui.press('enter')
-    
-    msg = f"✅ Playing: {query} on Spotify\n"
-    if input_mode != "voice_continuous":
-      print(msg)
-      
-  except Exception as e:
-    msg = f"❌ Error: {e}. Make sure Spotify is installed.\n"
-    if input_mode == "voice_continuous":
-      speak("Error opening Spotify. Make sure it's installed.")
-    else:
-      print(msg)
-
-def control_spotify(action):
-  """Control Spotify playback using media keys"""
-  try:
-    if action == "pause":
-      pyautogui.press('playpause')
-      msg = "⏸️ Spotify paused"
-    elif action == "play":
-      pyautogui.press('playpause')
-      msg = "▶️ Spotify playing"
-    elif action == "next":
-      pyautogui.press('nexttrack')
-      msg = "⏭️ Next song"
-    elif action == "previous" or action == "prev" or action == "back":
-      pyautogui.press('prevtrack')
-      msg = "⏮️ Previous song"
-    else:
-      msg = "❌ Unknown action"
-    
-    if input_mode == "voice_continuous":
-      speak(msg)
-    else:
-      print(msg + "\n")
-      
-  except Exception as e:
-    msg = f"❌ Error controlling Spotify: {e}"
-    if input_mode == "voice_continuous":
-      speak("Error controlling Spotify")
-    else:
-      print(msg + "\n")
-
-def open_spotify():
-  """Open Spotify app"""
-  try:
-    os.startfile("spotify:")
-    msg = "✅ Opened Spotify"
-    if input_mode == "voice_continuous":
-      speak("Opened Spotify")
-    else:
-      print(msg + "\n")
-  except Exception as e:
-    msg = f"❌ Error opening Spotify: {e}"
-    if input_mode == "voice_continuous":
-      speak("Error opening Spotify")
-    else:
-      print(msg + "\n")
-# ============================================
-
-def send_whatsapp_message(contact, message):
-  """Send WhatsApp message via WhatsApp Web - Always clicks first search result"""
-  global driver, whatsapp_logged_in
-  
-  if not driver:
-    driver = create_driver()
-  
-  if driver:
-    try:
-      # Open WhatsApp Web if not already there
-      if not whatsapp_logged_in:
-        driver.get("https://web.whatsapp.com")
-        msg = "📱 Opening WhatsApp Web..."
-        if input_mode == "voice_continuous":
-          speak("Opening WhatsApp Web")
-        else:
-          print(msg)
-        
-        wait = WebDriverWait(driver, 60)
-        try:
-          wait.until(
-            EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]'))
-          )
-          whatsapp_logged_in = True
-          msg = "✅ WhatsApp Web logged in successfully!"
-          if input_mode == "voice_continuous":
-            speak("WhatsApp logged in")
-          else:
-            print(msg)
-        except Exception:
-          msg = "⏳ Please scan the QR code on WhatsApp Web to continue..."
-          if input_mode == "voice_continuous":
-            speak("Please scan QR code")
-          else:
-            print(msg)
-          
-          wait = WebDriverWait(driver, 120)
-          wait.until(
-            EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]'))
-          )
-          whatsapp_logged_in = True
-          msg = "✅ QR code scanned! WhatsApp ready!"
-          if input_mode == "voice_continuous":
-            speak("WhatsApp ready")
-          else:
-            print(msg)
-      
-      # Now send the message
-      wait = WebDriverWait(driver, 15)
-      
-      # Find and click search box
-      search_box = wait.until(
-        EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]'))
-      )
-      search_box.click()
-      time.sleep(0.5)
-      
-      # Clear any existing search
-      search_box.send_keys(Keys.CONTROL + "a")
-      search_box.send_keys(Keys.BACKSPACE)
-      time.sleep(0.3)
-      
-      # Type contact name
-      search_box.send_keys(contact)
-      msg = f"🔍 Searching for contact: {contact}"
-      if input_mode == "voice_continuous":
-        speak(f"Searching for {contact}")
-      else:
-        print(msg)
-      time.sleep(2.5)  # Wait for search results to load
-      
-      # ALWAYS click the first result - Try multiple strategies
-      contact_clicked = False
-      
-      # Strategy 1: Click first visible chat span with title
-      try:
-        first_result = wait.until(
-          EC.element_to_be_clickable((By.XPATH, '(//span[@title])[1]'))
-        )
-        first_result.click()
-        contact_clicked = True
-        msg = f"✅ Selected first result for '{contact}'"
-        if input_mode == "voice_continuous":
-          speak("Contact selected")
-        else:
-          print(msg)
-      except Exception:
-        pass
-      
-      # Strategy 2: Click using the specific structure
-      if not contact_clicked:
-        try:
-          first_result = wait.until(
-            EC.element_to_be_clickable((By.XPATH, '//div[@id="pane-side"]//div[@role="listitem"][1]'))
-          )
-          first_result.click()
-          contact_clicked = True
-          msg = f"✅ Selected first result for '{contact}'"
-          if input_mode == "voice_continuous":
-            speak("Contact selected")
-          else:
-            print(msg)
-        except Exception:
-          pass
-      
-      # Strategy 3: Press DOWN arrow and ENTER (most reliable!)
-      if not contact_clicked:
-        try:
-          search_box.send_keys(Keys.DOWN)
-          time.sleep(0.3)
-          search_box.send_keys(Keys.RETURN)
-          contact_clicked = True
-          msg = f"✅ Selected first result for '{contact}'"
-          if input_mode == "voice_continuous":
-            speak("Contact selected")
-          else:
-            print(msg)
-        except Exception:
-          pass
-      
-      # If nothing worked
-      if not contact_clicked:
-        msg = f"❌ No search results found for '{contact}'\n"
-        if input_mode == "voice_continuous":
-          speak(f"No results for {contact}")
-        else:
-          print(msg)
-        # Clear the search
-        search_box.send_keys(Keys.ESCAPE)
-        return
-      
-      time.sleep(1)
-      
-      # Find message input box and send message
-      try:
-        message_box = wait.until(
-          EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true"][@data-tab="10"]'))
-        )
-      except Exception:
-        # Alternative: Try finding by role
-        message_box = wait.until(
-          EC.presence_of_element_located((By.XPATH, '//div[@role="textbox"][@contenteditable="true"]'))
-        )
-      
-      message_box.click()
-      time.sleep(0.3)
-      
-      # Type and send message
-      message_box.send_keys(message)
-      time.sleep(0.5)
-      message_box.send_keys(Keys.RETURN)
-      
-      msg = f"✅ Message sent: '{message}'\n"
-      if input_mode == "voice_continuous":
-        speak("Message sent")
-      else:
-        print(msg)
-        
-    except Exception as e:
-      msg = f"❌ Error sending WhatsApp message: {e}\n"
-      if input_mode == "voice_continuous":
-        speak("Error sending WhatsApp message")
-      else:
-        print(msg)
-      whatsapp_logged_in = False
-
-def play_youtube_video(query):
-  """Play a YouTube video with the given query"""
-  global driver, whatsapp_logged_in
-  
-  if not driver:
-    driver = create_driver()
-  
-  if driver:
-    try:
-      driver.get("https://www.youtube.com")
-      whatsapp_logged_in = False  # Reset WhatsApp status when navigating away
-      
-      msg = f"✅ Opening YouTube to play: {query}"
-      if input_mode == "voice_continuous":
-        speak(f"Playing {query} on YouTube")
-      else:
-        print(msg)
-      
-      wait = WebDriverWait(driver, 10)
-      search_box = wait.until(
-        EC.presence_of_element_located((By.NAME, "search_query"))
-      )
-      search_box.clear()
-      search_box.send_keys(query)
-      search_box.send_keys(Keys.RETURN)
-      
-      time.sleep(3)
-      try:
-        first_video = wait.until(
-          EC.element_to_be_clickable((By.XPATH, '(//a[@id="video-title"])[1]'))
-        )
-        video_title = first_video.get_attribute("title")
-        first_video.click()
-        msg = f"▶️ Now playing: {video_title}\n"
-        if input_mode == "voice_continuous":
-          speak(f"Now playing {video_title}")
-        else:
-          print(msg)
-      except Exception:
-        msg = "✅ Search results displayed\n"
-        if input_mode == "voice_continuous":
-          speak("Search results displayed")
-        else:
-          print(msg)
-    except Exception as e:
-      msg = f"❌ Error playing video: {e}\n"
-      if input_mode == "voice_continuous":
-        speak("Error playing video")
-      else:
-        print(msg)
-      cleanup_driver()
+  context.close_browser()
 
 def get_user_input(prompt_text):
   """Get input from user based on current input mode"""
   if input_mode == "voice_continuous":
+    asked_at = time.perf_counter()
     speak(prompt_text)
     print(f"\n{prompt_text}")
     print("🎤 Say 'jj' followed by your response...")
     
-    voice_input = get_voice_input_continuous(first_run=False)
+    # The listener thread never stopped; commands queued before the prompt
+    # aren't the answer and run once it's done
+    voice_input = listener.answer(asked_at)
     if voice_input is None:
       return None
     
@@ -543,243 +309,38 @@ def get_user_input(prompt_text):
   else:  # typing mode
     return input(f"{prompt_text}: ").strip()
 
+# ============= COMMAND TABLE =============
+# Earlier routes win when several patterns match, like the old if/elif order
+router = CommandRouter()
+# Near-miss names ("druv", "crome") snap to the known ones
+router.slot_type("contact", snap_to(FuzzyIndex(load_names(os.path.join(JJ_DATA_DIR, "contacts.txt")))))
+router.slot_type("app", snap_to(FuzzyIndex(APPS)))
+
+# Commands live in jj_plugins; each plugin is imported the first time it's needed
+context = Context(notify, get_user_input)
+plugins = PluginLoader(router, context, notify)
+
+for plugin in PLUGINS:
+  plugins.register(plugin)
+
+@router.fallback
+def cmd_unknown(command):
+  # "pawse" or "in spotty fly": try the closest command before giving up
+  corrected, _, run = intents.match(command)
+  if run:
+    notify(f"🔧 Heard '{command}', running '{corrected}'\n", level="progress")
+    return router.dispatch(corrected)
+  if corrected:
+    notify(f"❓ Unknown command. Did you mean: {corrected}?\n", f"Did you mean {corrected}?", level="error")
+    return
+  notify("❌ Unknown command. Available commands: play <song> in spotify, play <video> in youtube, spotify pause/next/prev, search <query>, open <name>, message <contact>, exit\n", "Unknown command", level="error")
+
+# Misheard keywords are matched against every word the patterns use
+intents = IntentMatcher(router, FuzzyIndex(router.keywords() + APPS), accept_for=FUZZY_ACCEPT)
+
 def execute_command(command):
-  global driver, whatsapp_logged_in
-  
-  if command == "exit":
-    cleanup_driver()
-    msg = "Goodbye!"
-    if input_mode == "voice_continuous":
-      speak(msg)
-    else:
-      print(msg)
-    return False  
-  
-  elif command.startswith("message"):
-    # Parse: "message dhruv" - extract contact name
-    rest = command.replace("message", "", 1).strip()
-    
-    if rest:
-      contact = rest
-      
-      # Ask for message
-      msg = f"What message do you want to send to {contact}?"
-      if input_mode == "voice_continuous":
-        speak(msg)
-      print(msg)
-      
-      message = get_user_input("Enter message")
-      
-      if not message:
-        msg = "❌ No message provided. Message cancelled.\n"
-        if input_mode == "voice_continuous":
-          speak("Message cancelled")
-        else:
-          print(msg)
-        return True
-      
-      # Send the message - will automatically select first search result
-      send_whatsapp_message(contact, message)
-    else:
-      msg = "❌ No contact provided. Format: message <contact>\n"
-      if input_mode == "voice_continuous":
-        speak("No contact provided")
-      else:
-        print(msg)
-  
-  # ============= SPOTIFY COMMANDS (NEW FORMAT) =============
-  elif " in spotify" in command or " on spotify" in command:
-    # Extract song name before "in spotify" or "on spotify"
-    if " in spotify" in command:
-      query = command.split(" in spotify")[0].strip()
-    else:
-      query = command.split(" on spotify")[0].strip()
-    
-    # Remove "play" prefix if present
-    if query.startswith("play "):
-      query = query.replace("play ", "", 1).strip()
-    
-    if query:
-      play_spotify_song(query)
-    else:
-      msg = "❌ No song name provided.\n"
-      if input_mode == "voice_continuous":
-        speak("No song name provided")
-      else:
-        print(msg)
-  
-  elif command.startswith("spotify "):
-    action = command.replace("spotify ", "").strip()
-    if action in ["pause", "play", "next", "previous", "prev", "back"]:
-      control_spotify(action)
-    else:
-      msg = f"❌ Unknown Spotify command: {action}\n"
-      if input_mode == "voice_continuous":
-        speak(f"Unknown Spotify command")
-      else:
-        print(msg)
-  
-  elif command in ["pause", "pause music"]:
-    control_spotify("pause")
-  
-  elif command in ["next", "next song", "skip"]:
-    control_spotify("next")
-  
-  elif command in ["previous", "previous song", "back", "go back"]:
-    control_spotify("previous")
-  
-  elif command == "open spotify":
-    open_spotify()
-  # ============================================
-  
-  # ============= YOUTUBE COMMANDS (NEW FORMAT) =============
-  elif " in youtube" in command or " on youtube" in command:
-    # Extract video name before "in youtube" or "on youtube"
-    if " in youtube" in command:
-      query = command.split(" in youtube")[0].strip()
-    else:
-      query = command.split(" on youtube")[0].strip()
-    
-    # Remove "play" prefix if present
-    if query.startswith("play "):
-      query = query.replace("play ", "", 1).strip()
-    
-    if query:
-      play_youtube_video(query)
-    else:
-      msg = "❌ No video name provided.\n"
-      if input_mode == "voice_continuous":
-        speak("No video name provided")
-      else:
-        print(msg)
-  # =========================================================
-  
-  elif command.startswith("search "):
-    query = command.replace("search ", "", 1).strip()
-    if query:
-      if not driver:
-        driver = create_driver()
-      
-      if driver:
-        try:
-          driver.get("https://www.google.com")
-          whatsapp_logged_in = False  # Reset WhatsApp status
-          
-          wait = WebDriverWait(driver, 10)
-          search_box = wait.until(
-            EC.presence_of_element_located((By.NAME, "q"))
-          )
-          search_box.clear()
-          search_box.send_keys(query)
-          search_box.send_keys(Keys.RETURN)
-          msg = f"✅ Searching Google for: {query}\n"
-          if input_mode == "voice_continuous":
-            speak(f"Searching for {query}")
-          else:
-            print(msg)
-        except Exception as e:
-          msg = f"❌ Error during search: {e}\n"
-          if input_mode == "voice_continuous":
-            speak("Error during search")
-          else:
-            print(msg)
-          cleanup_driver()
-    else:
-      msg = "❌ No search query provided.\n"
-      if input_mode == "voice_continuous":
-        speak("No search query provided")
-      else:
-        print(msg)
-  
-  elif command.startswith("open "):
-    name = command.replace("open ", "", 1).strip()
-    app_path = shutil.which(name)
-    
-    if app_path:
-      os.startfile(app_path)
-      msg = f"✅ Opened {name}\n"
-      if input_mode == "voice_continuous":
-        speak(f"Opened {name}")
-      else:
-        print(msg)
-    
-    elif name in ["chrome", "msedge", "firefox"]:
-      os.system(f"start {name}")
-      msg = f"✅ Opened {name}\n"
-      if input_mode == "voice_continuous":
-        speak(f"Opened {name}")
-      else:
-        print(msg)
-    
-    elif has_protocol(name):
-      os.system(f"start {name}://")
-      msg = f"✅ Opened {name}\n"
-      if input_mode == "voice_continuous":
-        speak(f"Opened {name}")
-      else:
-        print(msg)
-    
-    elif "youtube" in name:
-      if not driver:
-        driver = create_driver()
-      
-      if driver:
-        try:
-          driver.get("https://www.youtube.com")
-          whatsapp_logged_in = False  # Reset WhatsApp status
-          
-          msg = "✅ Opened YouTube\n"
-          if input_mode == "voice_continuous":
-            speak("Opened YouTube")
-          else:
-            print(msg)
-        except Exception as e:
-          msg = f"❌ Error opening YouTube: {e}\n"
-          if input_mode == "voice_continuous":
-            speak("Error opening YouTube")
-          else:
-            print(msg)
-          cleanup_driver()
-    
-    elif "whatsapp" in name:
-      if not driver:
-        driver = create_driver()
-      
-      if driver:
-        try:
-          driver.get("https://web.whatsapp.com")
-          whatsapp_logged_in = False  # Will need to verify login
-          
-          msg = "✅ Opening WhatsApp Web\n"
-          if input_mode == "voice_continuous":
-            speak("Opening WhatsApp")
-          else:
-            print(msg)
-        except Exception as e:
-          msg = f"❌ Error opening WhatsApp: {e}\n"
-          if input_mode == "voice_continuous":
-            speak("Error opening WhatsApp")
-          else:
-            print(msg)
-          cleanup_driver()
-    
-    else:
-      url = f"https://www.{name}.com" if "." not in name else f"https://{name}"
-      webbrowser.open(url)
-      msg = f"✅ Opened {url}\n"
-      if input_mode == "voice_continuous":
-        speak(f"Opened {name}")
-      else:
-        print(msg)
-  
-  else:
-    msg = "❌ Unknown command. Available commands: play <song> in spotify, play <video> in youtube, spotify pause/next/prev, search <query>, open <name>, message <contact>, exit\n"
-    if input_mode == "voice_continuous":
-      speak("Unknown command")
-    else:
-      print(msg)
-  
-  return True 
+  """Run one command; False means exit"""
+  return router.dispatch(command) is not False
 
 try:
   print("=" * 60)
@@ -811,6 +372,24 @@ try:
       break
     else:
       print("❌ Invalid choice. Please enter 1, 2, or 3.")
+  context.input_mode = input_mode
+  
+  if input_mode != "typing":
+    # Voice-only dependencies; typing mode never loads them
+    start = time.perf_counter()
+    import keyboard
+    import speech_recognition as sr
+    from audio_service import AudioService
+    from wake_word import KeywordSpotter
+    from asr_engines import ASRError, EngineSelector, ENGINES
+    from command_grammar import CommandGrammar
+    from noise_profile import NoiseProfileStore
+    from command_listener import CommandListener
+    from resampler import Resampler
+    print(f"⏱️ Voice modules loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+  
+  print(f"⏱️ Startup imports took {STARTUP_IMPORT_MS:.0f} ms; command plugins load on first use:")
+  print(plugins.report())
   
   print("\nCommands:")
   print("  • play <song> in spotify       - Play song on Spotify")
@@ -828,12 +407,16 @@ try:
   print("\n💡 TIP: Make sure Spotify is installed for music playback!")
   print("💡 TIP: WhatsApp will ALWAYS message the first person in search results!\n")
   
-  first_voice_command = True
+  if input_mode == "voice_continuous":
+    # Model loading and calibration take a while anyway; import plugins meanwhile
+    plugins.preload()
+    bus.add_sink(SpeechSink(speaker))
+    # Capture and recognition keep going while commands execute
+    listener = CommandListener(get_voice_input_continuous, setup=prepare_continuous).start()
   
   while True:
     if input_mode == "voice_continuous":
-      voice_input = get_voice_input_continuous(first_run=first_voice_command)
-      first_voice_command = False
+      voice_input = listener.get()
       
       if voice_input is None:  
         cleanup_driver()
@@ -871,4 +454,13 @@ except KeyboardInterrupt:
 except Exception as e:
   print(f"\n❌ Unexpected error: {e}")
   cleanup_driver()
+finally:
+  if listener:
+    listener.stop()
+  # Let the last confirmation (e.g. "Goodbye") finish
+  bus.close()
+  print(f"\n📦 Plugins:\n{plugins.report()}")
+  speaker.close()
+  if audio:
+    audio.close()
 
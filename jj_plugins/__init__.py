@@ -0,0 +1,84 @@
+"""jj's command plugins
+
+Importing this package is cheap: it only holds the manifest. Each plugin
+module imports its heavy dependencies at the top and is itself imported
+by plugin_loader the first time one of its commands runs.
+"""
+from command_router import choice
+from plugin_loader import Plugin
+
+# Registration order is route precedence, as in the old if/elif chain.
+# command_grammar builds Whisper's command vocabulary from this table too.
+PLUGINS = [
+  Plugin("core", "jj_plugins.core", routes={
+    "exit": "goodbye",
+  }),
+  Plugin("whatsapp", "jj_plugins.whatsapp", requires=["selenium", "webdriver_manager"], routes={
+    "message": "message",
+    "message {contact:contact}": "message",
+  }),
+  Plugin("spotify", "jj_plugins.spotify", requires=["pyautogui"], routes={
+    "play {query} in spotify": "play",
+    "play {query} on spotify": "play",
+    "{query} in spotify": "play",
+    "{query} on spotify": "play",
+    "spotify {action:spotify_action}": "control",
+    "spotify {action}": "unknown_action",
+    "pause": "pause",
+    "pause music": "pause",
+    "next": "next_song",
+    "next song": "next_song",
+    "skip": "next_song",
+    "previous": "previous_song",
+    "previous song": "previous_song",
+    "back": "previous_song",
+    "go back": "previous_song",
+    "open spotify": "open_app",
+  }, slot_types={
+    "spotify_action": choice("pause", "play", "next", "previous", prev="previous", back="previous"),
+  }),
+  Plugin("youtube", "jj_plugins.youtube", requires=["selenium", "webdriver_manager"], routes={
+    "play {query} in youtube": "play",
+    "play {query} on youtube": "play",
+    "{query} in youtube": "play",
+    "{query} on youtube": "play",
+  }),
+  Plugin("search", "jj_plugins.search", requires=["selenium", "webdriver_manager"], routes={
+    "search {query}": "search",
+  }),
+  # Chrome only comes in for "open youtube" / "open whatsapp", and then lazily
+  Plugin("launcher", "jj_plugins.launcher", requires=["winreg"], routes={
+    "open {name:app}": "open_name",
+  }),
+]
+
+# How sure a fuzzy match must be before the command runs unasked (see
+# fuzzy_intent.IntentMatcher). A wrong guess at exit or message can't be
+# undone, so those are only suggested; a lone word like "text" is too
+# little to skip a song on.
+FUZZY_ACCEPT = {
+  "core.goodbye": None,
+  "whatsapp.message": None,
+  "spotify.next_song": 0.8,
+  "spotify.previous_song": 0.8,
+}
+
+
+class Context:
+  """What plugins get from jj: output, prompts, the input mode and one shared Chrome"""
+
+  def __init__(self, notify, get_user_input):
+    self.notify = notify
+    self.get_user_input = get_user_input
+    self.input_mode = None
+    self._browser = None
+
+  def browser(self):
+    if self._browser is None:
+      from jj_plugins.browser import Browser
+      self._browser = Browser(self.notify)
+    return self._browser
+
+  def close_browser(self):
+    if self._browser is not None:
+      self._browser.cleanup()
@@ -0,0 +1,80 @@
+import os
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+CHROME_PATH = r"C:\Program Files\Google\Chrome\Application\chrome.exe"
+USER_DATA_DIR = os.path.join(os.path.expanduser("~"), "ChromeAutomation")
+
+
+class Browser:
+  """The one Chrome window the youtube, whatsapp, search and launcher plugins share"""
+
+  def __init__(self, notify):
+    self.notify = notify
+    self.driver = None
+    self.whatsapp_logged_in = False
+
+  def get(self):
+    """The driver, opening Chrome if needed; None if it couldn't be opened"""
+    if not self.driver:
+      self.driver = self.create()
+    return self.driver
+
+  def create(self):
+    options = Options()
+    options.binary_location = CHROME_PATH
+
+    if not os.path.exists(USER_DATA_DIR):
+      os.makedirs(USER_DATA_DIR)
+
+    options.add_argument(f"--user-data-dir={USER_DATA_DIR}")
+    options.add_argument("--profile-directory=Default")
+    options.add_argument("--remote-allow-origins=*")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-software-rasterizer")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--start-maximized")
+    options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
+    options.add_experimental_option("useAutomationExtension", False)
+
+    try:
+      new_driver = webdriver.Chrome(
+        service=Service(ChromeDriverManager().install()),
+        options=options
+      )
+      print("Chrome opened successfully!")
+      return new_driver
+    except Exception as e:
+      print(f"Error creating driver: {e}. Trying alternative method...")
+
+      try:
+        options2 = Options()
+        options2.binary_location = CHROME_PATH
+        options2.add_argument("--remote-allow-origins=*")
+        options2.add_argument("--no-sandbox")
+        options2.add_argument("--disable-dev-shm-usage")
+        options2.add_argument("--start-maximized")
+        options2.add_experimental_option('excludeSwitches', ['enable-logging'])
+
+        new_driver = webdriver.Chrome(
+          service=Service(ChromeDriverManager().install()),
+          options=options2
+        )
+        print("Chrome opened (temporary session)")
+        return new_driver
+      except Exception as e2:
+        self.notify(f"Failed to open Chrome: {e2}", "Failed to open Chrome", level="error")
+        return None
+
+  def cleanup(self):
+    if self.driver:
+      try:
+        self.driver.quit()
+      except:
+        pass
+      self.driver = None
+      self.whatsapp_logged_in = False
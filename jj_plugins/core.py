@@ -0,0 +1,5 @@
+def goodbye(ctx):
+  """exit: close Chrome and stop the main loop"""
+  ctx.close_browser()
+  ctx.notify("Goodbye!")
+  return False
@@ -0,0 +1,60 @@
+import os
+import shutil
+import winreg
+import webbrowser
+
+
+def has_protocol(name):
+  try:
+    key = winreg.OpenKey(winreg.HKEY_CLASSES_ROOT, f"{name}")
+    try:
+      winreg.QueryValueEx(key, "URL Protocol")
+      winreg.CloseKey(key)
+      return True
+    except:
+      winreg.CloseKey(key)
+      return False
+  except:
+    return False
+
+def open_in_browser(ctx, url, label, spoken, error, topic):
+  """Open a site in the shared Chrome window (which pulls in selenium)"""
+  browser = ctx.browser()
+  driver = browser.get()
+  
+  if driver:
+    try:
+      driver.get(url)
+      browser.whatsapp_logged_in = False  # Reset (or re-verify) WhatsApp status
+      
+      ctx.notify(f"✅ {label}\n", spoken, topic=topic)
+    except Exception as e:
+      ctx.notify(f"❌ {error}: {e}\n", error, level="error", topic=topic)
+      browser.cleanup()
+
+def open_name(ctx, name):
+  """Open an application, registered protocol or website"""
+  app_path = shutil.which(name)
+  
+  if app_path:
+    os.startfile(app_path)
+    ctx.notify(f"✅ Opened {name}\n", f"Opened {name}")
+  
+  elif name in ["chrome", "msedge", "firefox"]:
+    os.system(f"start {name}")
+    ctx.notify(f"✅ Opened {name}\n", f"Opened {name}")
+  
+  elif has_protocol(name):
+    os.system(f"start {name}://")
+    ctx.notify(f"✅ Opened {name}\n", f"Opened {name}")
+  
+  elif "youtube" in name:
+    open_in_browser(ctx, "https://www.youtube.com", "Opened YouTube", "Opened YouTube", "Error opening YouTube", "youtube")
+  
+  elif "whatsapp" in name:
+    open_in_browser(ctx, "https://web.whatsapp.com", "Opening WhatsApp Web", "Opening WhatsApp", "Error opening WhatsApp", "whatsapp")
+  
+  else:
+    url = f"https://www.{name}.com" if "." not in name else f"https://{name}"
+    webbrowser.open(url)
+    ctx.notify(f"✅ Opened {url}\n", f"Opened {name}")
@@ -0,0 +1,27 @@
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+
+def search(ctx, query):
+  """Google search in the shared Chrome window"""
+  browser = ctx.browser()
+  driver = browser.get()
+  
+  if driver:
+    try:
+      driver.get("https://www.google.com")
+      browser.whatsapp_logged_in = False  # Reset WhatsApp status
+      
+      wait = WebDriverWait(driver, 10)
+      search_box = wait.until(
+        EC.presence_of_element_located((By.NAME, "q"))
+      )
+      search_box.clear()
+      search_box.send_keys(query)
+      search_box.send_keys(Keys.RETURN)
+      ctx.notify(f"✅ Searching Google for: {query}\n", f"Searching for {query}", topic="search")
+    except Exception as e:
+      ctx.notify(f"❌ Error during search: {e}\n", "Error during search", level="error", topic="search")
+      browser.cleanup()
@@ -0,0 +1,65 @@
+import os
+import time
+import urllib.parse
+import pyautogui
+
+
+def play(ctx, query):
+  """Play a song on Spotify app"""
+  ctx.notify(f"🎵 Searching Spotify for: {query}", f"Searching Spotify for {query}", level="progress", topic="spotify")
+  
+  try:
+    search_query = urllib.parse.quote(query)
+    spotify_uri = f"spotify:search:{search_query}"
+    os.startfile(spotify_uri)
+    
+    time.sleep(2)
+    pyautogui.press('enter')
+    
+    ctx.notify(f"✅ Playing: {query} on Spotify\n", f"Playing {query} on Spotify", level="result", topic="spotify")
+      
+  except Exception as e:
+    ctx.notify(f"❌ Error: {e}. Make sure Spotify is installed.\n", "Error opening Spotify. Make sure it's installed.", level="error", topic="spotify")
+
+def control(ctx, action):
+  """Control Spotify playback using media keys"""
+  try:
+    if action == "pause":
+      pyautogui.press('playpause')
+      msg = "⏸️ Spotify paused"
+    elif action == "play":
+      pyautogui.press('playpause')
+      msg = "▶️ Spotify playing"
+    elif action == "next":
+      pyautogui.press('nexttrack')
+      msg = "⏭️ Next song"
+    elif action == "previous" or action == "prev" or action == "back":
+      pyautogui.press('prevtrack')
+      msg = "⏮️ Previous song"
+    else:
+      msg = "❌ Unknown action"
+    
+    ctx.notify(msg + "\n", msg, level="error" if msg.startswith("❌") else "result", topic="spotify")
+      
+  except Exception as e:
+    ctx.notify(f"❌ Error controlling Spotify: {e}", "Error controlling Spotify", level="error", topic="spotify")
+
+def unknown_action(ctx, action):
+  ctx.notify(f"❌ Unknown Spotify command: {action}\n", f"Unknown Spotify command", level="error", topic="spotify")
+
+def pause(ctx):
+  control(ctx, "pause")
+
+def next_song(ctx):
+  control(ctx, "next")
+
+def previous_song(ctx):
+  control(ctx, "previous")
+
+def open_app(ctx):
+  """Open Spotify app"""
+  try:
+    os.startfile("spotify:")
+    ctx.notify("✅ Opened Spotify", "Opened Spotify", topic="spotify")
+  except Exception as e:
+    ctx.notify(f"❌ Error opening Spotify: {e}", "Error opening Spotify", level="error", topic="spotify")
@@ -0,0 +1,144 @@
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+
+def send_message(ctx, contact, message):
+  """Send WhatsApp message via WhatsApp Web - Always clicks first search result"""
+  browser = ctx.browser()
+  driver = browser.get()
+  
+  if driver:
+    try:
+      # Open WhatsApp Web if not already there
+      if not browser.whatsapp_logged_in:
+        driver.get("https://web.whatsapp.com")
+        ctx.notify("📱 Opening WhatsApp Web...", "Opening WhatsApp Web", level="progress", topic="whatsapp")
+        
+        wait = WebDriverWait(driver, 60)
+        try:
+          wait.until(
+            EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]'))
+          )
+          browser.whatsapp_logged_in = True
+          ctx.notify("✅ WhatsApp Web logged in successfully!", "WhatsApp logged in", topic="whatsapp")
+        except Exception:
+          ctx.notify("⏳ Please scan the QR code on WhatsApp Web to continue...", "Please scan QR code", level="progress", topic="whatsapp")
+          
+          wait = WebDriverWait(driver, 120)
+          wait.until(
+            EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]'))
+          )
+          browser.whatsapp_logged_in = True
+          ctx.notify("✅ QR code scanned! WhatsApp ready!", "WhatsApp ready", topic="whatsapp")
+      
+      # Now send the message
+      wait = WebDriverWait(driver, 15)
+      
+      # Find and click search box
+      search_box = wait.until(
+        EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]'))
+      )
+      search_box.click()
+      time.sleep(0.5)
+      
+      # Clear any existing search
+      search_box.send_keys(Keys.CONTROL + "a")
+      search_box.send_keys(Keys.BACKSPACE)
+      time.sleep(0.3)
+      
+      # Type contact name
+      search_box.send_keys(contact)
+      ctx.notify(f"🔍 Searching for contact: {contact}", f"Searching for {contact}", level="progress", topic="whatsapp")
+      time.sleep(2.5)  # Wait for search results to load
+      
+      # ALWAYS click the first result - Try multiple strategies
+      contact_clicked = False
+      
+      # Strategy 1: Click first visible chat span with title
+      try:
+        first_result = wait.until(
+          EC.element_to_be_clickable((By.XPATH, '(//span[@title])[1]'))
+        )
+        first_result.click()
+        contact_clicked = True
+        ctx.notify(f"✅ Selected first result for '{contact}'", "Contact selected", topic="whatsapp")
+      except Exception:
+        pass
+      
+      # Strategy 2: Click using the specific structure
+      if not contact_clicked:
+        try:
+          first_result = wait.until(
+            EC.element_to_be_clickable((By.XPATH, '//div[@id="pane-side"]//div[@role="listitem"][1]'))
+          )
+          first_result.click()
+          contact_clicked = True
+          ctx.notify(f"✅ Selected first result for '{contact}'", "Contact selected", topic="whatsapp")
+        except Exception:
+          pass
+      
+      # Strategy 3: Press DOWN arrow and ENTER (most reliable!)
+      if not contact_clicked:
+        try:
+          search_box.send_keys(Keys.DOWN)
+          time.sleep(0.3)
+          search_box.send_keys(Keys.RETURN)
+          contact_clicked = True
+          ctx.notify(f"✅ Selected first result for '{contact}'", "Contact selected", topic="whatsapp")
+        except Exception:
+          pass
+      
+      # If nothing worked
+      if not contact_clicked:
+        ctx.notify(f"❌ No search results found for '{contact}'\n", f"No results for {contact}", level="error", topic="whatsapp")
+        # Clear the search
+        search_box.send_keys(Keys.ESCAPE)
+        return
+      
+      time.sleep(1)
+      
+      # Find message input box and send message
+      try:
+        message_box = wait.until(
+          EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true"][@data-tab="10"]'))
+        )
+      except Exception:
+        # Alternative: Try finding by role
+        message_box = wait.until(
+          EC.presence_of_element_located((By.XPATH, '//div[@role="textbox"][@contenteditable="true"]'))
+        )
+      
+      message_box.click()
+      time.sleep(0.3)
+      
+      # Type and send message
+      message_box.send_keys(message)
+      time.sleep(0.5)
+      message_box.send_keys(Keys.RETURN)
+      
+      ctx.notify(f"✅ Message sent: '{message}'\n", "Message sent", topic="whatsapp")
+        
+    except Exception as e:
+      ctx.notify(f"❌ Error sending WhatsApp message: {e}\n", "Error sending WhatsApp message", level="error", topic="whatsapp")
+      browser.whatsapp_logged_in = False
+
+def message(ctx, contact=None):
+  # Parse: "message dhruv" - contact name is the slot
+  if not contact:
+    ctx.notify("❌ No contact provided. Format: message <contact>\n", "No contact provided", level="error", topic="whatsapp")
+    return
+  
+  # Ask for message
+  ctx.notify(f"What message do you want to send to {contact}?", topic="whatsapp")
+  
+  text = ctx.get_user_input("Enter message")
+  
+  if not text:
+    ctx.notify("❌ No message provided. Message cancelled.\n", "Message cancelled", level="error", topic="whatsapp")
+    return
+  
+  # Send the message - will automatically select first search result
+  send_message(ctx, contact, text)
@@ -0,0 +1,40 @@
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+
+def play(ctx, query):
+  """Play a YouTube video with the given query"""
+  browser = ctx.browser()
+  driver = browser.get()
+  
+  if driver:
+    try:
+      driver.get("https://www.youtube.com")
+      browser.whatsapp_logged_in = False  # Reset WhatsApp status when navigating away
+      
+      ctx.notify(f"✅ Opening YouTube to play: {query}", f"Playing {query} on YouTube", level="progress", topic="youtube")
+      
+      wait = WebDriverWait(driver, 10)
+      search_box = wait.until(
+        EC.presence_of_element_located((By.NAME, "search_query"))
+      )
+      search_box.clear()
+      search_box.send_keys(query)
+      search_box.send_keys(Keys.RETURN)
+      
+      time.sleep(3)
+      try:
+        first_video = wait.until(
+          EC.element_to_be_clickable((By.XPATH, '(//a[@id="video-title"])[1]'))
+        )
+        video_title = first_video.get_attribute("title")
+        first_video.click()
+        ctx.notify(f"▶️ Now playing: {video_title}\n", f"Now playing {video_title}", topic="youtube")
+      except Exception:
+        ctx.notify("✅ Search results displayed\n", "Search results displayed", topic="youtube")
+    except Exception as e:
+      ctx.notify(f"❌ Error playing video: {e}\n", "Error playing video", level="error", topic="youtube")
+      browser.cleanup()
@@ -0,0 +1,52 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+
+
+class NoiseProfileStore:
+  """Ambient noise profiles per input device, kept in one small JSON file
+
+  A profile is the VAD noise floor plus the mean noise power spectrum.
+  Profiles older than max_age_days are ignored so a moved laptop gets a
+  fresh calibration.
+  """
+
+  def __init__(self, path, max_age_days=30):
+    self.path = path
+    self.max_age = max_age_days * 86400
+    self._lock = threading.Lock()
+
+  def _read(self):
+    try:
+      with open(self.path, encoding="utf-8") as f:
+        return json.load(f)
+    except (FileNotFoundError, ValueError):
+      return {}
+
+  def load(self, device):
+    profile = self._read().get(device)
+    if not profile or time.time() - profile.get("updated", 0) > self.max_age:
+      return None
+    spectrum = profile.get("spectrum")
+    return {
+      "noise_floor": float(profile["noise_floor"]),
+      "spectrum": np.array(spectrum, dtype=np.float32) if spectrum else None,
+      "updated": profile["updated"],
+    }
+
+  def save(self, device, noise_floor, spectrum=None):
+    """Write atomically so a crash never leaves a half-written file"""
+    with self._lock:
+      profiles = self._read()
+      profiles[device] = {
+        "noise_floor": float(noise_floor),
+        "spectrum": [float(x) for x in spectrum] if spectrum is not None else None,
+        "updated": time.time(),
+      }
+      os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+      tmp = self.path + ".tmp"
+      with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(profiles, f)
+      os.replace(tmp, self.path)
@@ -0,0 +1,234 @@
+import json
+import time
+import heapq
+import threading
+from collections import Counter
+import numpy as np
+
+# Lower is more urgent
+PRIORITIES = {"error": 0, "result": 1, "progress": 2}
+
+
+class Message:
+  def __init__(self, text, spoken=None, level="result", topic=None):
+    self.text = text
+    self.spoken = spoken if spoken is not None else text.strip()
+    self.level = level
+    self.priority = PRIORITIES[level]
+    self.topic = topic
+    self.created = time.time()
+    self.posted = time.perf_counter()
+
+
+class Sink:
+  """One output channel with its own thread and a priority queue
+
+  offer() never blocks. Errors jump ahead of everything else, and a new
+  message on a topic drops any progress message for that topic still
+  waiting, so "Searching for ..." isn't read out after "Message sent".
+  A synchronous sink skips all that and emits on the poster's thread, in
+  order.
+  """
+
+  name = "sink"
+  # Logs and counters want every message, even superseded ones
+  coalesce = True
+  synchronous = False
+
+  def __init__(self, max_pending=32):
+    self.max_pending = max_pending
+    self._heap = []
+    self._seq = 0
+    self._cond = threading.Condition()
+    self._closed = False
+    self._busy = False
+    self._thread = None
+    if not self.synchronous:
+      self._thread = threading.Thread(target=self._run, daemon=True)
+      self._thread.start()
+
+    self.emitted = 0
+    self.coalesced = 0
+    self.overflowed = 0
+    self.failures = 0
+    self.delay_ms = []
+
+  def offer(self, message):
+    if self.synchronous:
+      self._emit(message)
+      return
+    with self._cond:
+      if self.coalesce and message.topic is not None:
+        stale = [e for e in self._heap if e[2].topic == message.topic and e[2].level == "progress"]
+        if stale:
+          self._heap = [e for e in self._heap if e not in stale]
+          heapq.heapify(self._heap)
+          self.coalesced += len(stale)
+      if len(self._heap) >= self.max_pending:
+        # Shed the least urgent message, the oldest of those if several tie
+        worst = max(self._heap, key=lambda e: (e[0], -e[1]))
+        self._heap.remove(worst)
+        heapq.heapify(self._heap)
+        self.overflowed += 1
+      heapq.heappush(self._heap, (message.priority, self._seq, message))
+      self._seq += 1
+      self._cond.notify()
+    self.preempt(message)
+
+  def preempt(self, message):
+    """Called on the poster's thread; sinks that can cut output short override this"""
+
+  def emit(self, message):
+    raise NotImplementedError
+
+  def _run(self):
+    while True:
+      with self._cond:
+        while not self._heap and not self._closed:
+          self._cond.wait()
+        if not self._heap:
+          return
+        _, _, message = heapq.heappop(self._heap)
+        self._busy = True
+      try:
+        self._emit(message)
+      finally:
+        with self._cond:
+          self._busy = False
+          self._cond.notify_all()
+
+  def _emit(self, message):
+    self.delay_ms.append((time.perf_counter() - message.posted) * 1000)
+    try:
+      self.emit(message)
+      self.emitted += 1
+    except Exception as e:
+      self.failures += 1
+      print(f"⚠️ {self.name} output failed: {e}")
+
+  def flush(self, timeout=None):
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with self._cond:
+      while self._heap or self._busy:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+          return False
+        self._cond.wait(remaining)
+    return True
+
+  def close(self, timeout=5.0):
+    self.flush(timeout)
+    with self._cond:
+      self._closed = True
+      self._cond.notify_all()
+    if self._thread is not None:
+      self._thread.join(timeout=1.0)
+
+  def stats(self):
+    delays = np.array(self.delay_ms or [0.0])
+    return {
+      "emitted": self.emitted,
+      "coalesced": self.coalesced,
+      "overflowed": self.overflowed,
+      "failures": self.failures,
+      "delay_ms_p95": float(np.percentile(delays, 95)),
+    }
+
+
+class ConsoleSink(Sink):
+  """Prints in posting order, before notify() returns, so a prompt that follows comes after it"""
+
+  name = "console"
+  synchronous = True
+  coalesce = False
+
+  def emit(self, message):
+    print(message.text)
+
+
+class SpeechSink(Sink):
+  """Speaks messages through a tts.Speaker; an error cuts off progress chatter"""
+
+  name = "speech"
+
+  def __init__(self, speaker, max_pending=8):
+    self.speaker = speaker
+    self._current = None
+    super().__init__(max_pending)
+
+  def preempt(self, message):
+    current = self._current
+    if current is not None and message.priority < current.priority:
+      self.speaker.interrupt()
+
+  def emit(self, message):
+    self._current = message
+    try:
+      self.speaker.speak(message.spoken, wait=True)
+    finally:
+      self._current = None
+
+
+class JsonlSink(Sink):
+  """Appends every message as one JSON line"""
+
+  name = "jsonl"
+  coalesce = False
+
+  def __init__(self, path, max_pending=256):
+    self.path = path
+    super().__init__(max_pending)
+
+  def emit(self, message):
+    record = {"time": message.created, "level": message.level, "topic": message.topic,
+              "text": message.text.strip(), "spoken": message.spoken}
+    with open(self.path, "a", encoding="utf-8") as f:
+      f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class MetricsSink(Sink):
+  name = "metrics"
+  coalesce = False
+
+  def __init__(self):
+    self.by_level = Counter()
+    self.by_topic = Counter()
+    super().__init__(max_pending=1024)
+
+  def emit(self, message):
+    self.by_level[message.level] += 1
+    self.by_topic[message.topic or "-"] += 1
+
+  def stats(self):
+    stats = super().stats()
+    stats["by_level"] = dict(self.by_level)
+    stats["by_topic"] = dict(self.by_topic)
+    return stats
+
+
+class OutputBus:
+  """Fans notifications out to every sink without waiting on any of them"""
+
+  def __init__(self, sinks=()):
+    self.sinks = list(sinks)
+
+  def add_sink(self, sink):
+    self.sinks.append(sink)
+    return sink
+
+  def notify(self, text, spoken=None, level="result", topic=None):
+    message = Message(text, spoken, level, topic)
+    for sink in self.sinks:
+      sink.offer(message)
+    return message
+
+  def flush(self, timeout=None):
+    for sink in self.sinks:
+      sink.flush(timeout)
+
+  def close(self, timeout=5.0):
+    for sink in self.sinks:
+      sink.close(timeout)
+
+  def stats(self):
+    return {sink.name: sink.stats() for sink in self.sinks}
@@ -0,0 +1,124 @@
+import time
+import importlib
+import threading
+
+
+class Plugin:
+  """Manifest entry: which module, what it needs, and which patterns it serves
+
+  routes maps each pattern to the name of a function in `module`; the
+  function is called as handler(context, **slots). Nothing here imports
+  the module, so the router can be built at startup for free.
+  """
+
+  def __init__(self, name, module, requires=(), routes=None, slot_types=None):
+    self.name = name
+    self.module = module
+    self.requires = list(requires)
+    self.routes = routes or {}
+    self.slot_types = slot_types or {}
+
+
+class PluginLoader:
+  """Registers plugin routes up front and imports each plugin on first use
+
+  The first command a plugin handles pays for its imports (selenium,
+  pyautogui, ...); every later one goes straight to the loaded module.
+  Import times are recorded per dependency so report() shows what each
+  plugin costs.
+  """
+
+  def __init__(self, router, context, notify):
+    self.router = router
+    self.context = context
+    self.notify = notify
+    self.plugins = {}
+    self.modules = {}
+    self.failed = {}
+    self.import_ms = {}
+    # One lock per plugin: a slow selenium import in preload() mustn't hold up spotify
+    self._locks = {}
+
+  def register(self, plugin):
+    self.plugins[plugin.name] = plugin
+    self._locks[plugin.name] = threading.Lock()
+    for name, convert in plugin.slot_types.items():
+      self.router.slot_type(name, convert)
+    for pattern, function in plugin.routes.items():
+      self.router.add(pattern, self._lazy(plugin, function))
+
+  def _lazy(self, plugin, function):
+    def handler(**slots):
+      module = self.load(plugin.name)
+      if module is None:
+        return None
+      return getattr(module, function)(self.context, **slots)
+    handler.__name__ = f"{plugin.name}.{function}"
+    return handler
+
+  def load(self, name):
+    """The plugin's module, importing it (and its dependencies) the first time"""
+    with self._locks[name]:
+      if name in self.modules:
+        return self.modules[name]
+      if name in self.failed:
+        self.notify(f"❌ {name} is unavailable: {self.failed[name]}\n", f"{name} is unavailable", level="error")
+        return None
+      plugin = self.plugins[name]
+      timings = {}
+      try:
+        for dependency in plugin.requires + [plugin.module]:
+          start = time.perf_counter()
+          importlib.import_module(dependency)
+          timings[dependency] = (time.perf_counter() - start) * 1000
+      except Exception as e:
+        self.failed[name] = e
+        self.import_ms[name] = timings
+        self.notify(f"❌ Couldn't load {name}: {e}\n", f"{name} is unavailable", level="error")
+        return None
+      self.import_ms[name] = timings
+      self.modules[name] = importlib.import_module(plugin.module)
+      return self.modules[name]
+
+  def preload(self, names=None):
+    """Import plugins on a background thread so the first command doesn't wait"""
+    names = list(self.plugins) if names is None else names
+
+    def run():
+      for name in names:
+        self.load(name)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+  def state(self, name):
+    if name in self.modules:
+      return "loaded"
+    if name in self.failed:
+      return "failed"
+    return "deferred"
+
+  def report(self):
+    """One line per plugin: state and import time, dependency by dependency"""
+    lines = []
+    for name, plugin in self.plugins.items():
+      timings = self.import_ms.get(name)
+      if name in self.failed:
+        detail = str(self.failed[name])
+      elif timings is None:
+        detail = f"needs {', '.join(plugin.requires) or 'nothing extra'}"
+      else:
+        # A dependency another plugin already imported shows up as ~0 ms
+        detail = ", ".join(f"{dep} {ms:.0f} ms" for dep, ms in timings.items())
+        detail = f"{sum(timings.values()):.0f} ms ({detail})"
+      lines.append(f"{name:<10} {self.state(name):<9} {detail}")
+    return "\n".join(lines)
+
+  def stats(self):
+    return {
+      name: {
+        "state": self.state(name),
+        "import_ms": sum(self.import_ms.get(name, {}).values()),
+      }
+      for name in self.plugins
+    }
@@ -0,0 +1,133 @@
+import time
+from collections import deque
+import numpy as np
+from audio_utils import to_float
+
+# Per-block stats cover the latest blocks only; the listener never stops
+STATS_BLOCKS = 4096
+
+
+class Preprocessor:
+  """Block-streaming high-pass, noise suppression and AGC for capture audio
+
+  Blocks of any size go through one 50%-overlap STFT: bins below
+  highpass_hz (DC, rumble, mains hum) are faded out and a spectral
+  subtraction gain removes the tracked noise spectrum. The resynthesised
+  audio then gets a smoothed automatic gain towards target_dbfs. process()
+  writes its output back into the block it was given, so steady state
+  allocates only the FFT buffers. Output lags input by exactly `delay`
+  samples whatever the block sizes.
+  """
+
+  def __init__(self, sample_rate=16000, highpass_hz=80.0, target_dbfs=-20.0, max_gain_db=20.0,
+               over_subtraction=1.5, gain_floor=0.1, noise_adapt=0.05):
+    self.sample_rate = sample_rate
+    # ~32 ms frames, a power of two for the FFT
+    self.frame = 1 << int(np.round(np.log2(sample_rate * 0.032)))
+    self.hop = self.frame // 2
+    # Half a frame waiting for its overlap plus a hop of slack for odd block sizes
+    self.delay = self.frame
+    self.window = np.sqrt(np.hanning(self.frame + 1)[:-1]).astype(np.float32)
+
+    freqs = np.fft.rfftfreq(self.frame, 1 / sample_rate)
+    self.highpass = np.clip(freqs / highpass_hz, 0.0, 1.0).astype(np.float32) if highpass_hz else None
+    self.target_rms = 10 ** (target_dbfs / 20)
+    self.max_gain = 10 ** (max_gain_db / 20)
+    self.over_subtraction = over_subtraction
+    self.gain_floor = gain_floor
+    self.noise_adapt = noise_adapt
+    self.noise = None            # per-bin noise power, same scaling as this STFT
+
+    self.compute_ms = deque(maxlen=STATS_BLOCKS)
+    self.gain_db = deque(maxlen=STATS_BLOCKS)
+    self.reset()
+
+  def reset(self):
+    """Start a new recording; the noise estimate is kept"""
+    self._pending = np.zeros(self.frame - self.hop, dtype=np.float32)
+    self._tail = np.zeros(self.hop, dtype=np.float32)
+    self._out = np.zeros(self.hop, dtype=np.float32)
+    self._agc = 1.0
+
+  def set_noise(self, spectrum, n_fft=512):
+    """Seed suppression from a vad.noise_spectrum (Hann-windowed power, n_fft points)"""
+    if spectrum is None:
+      return
+    spectrum = np.asarray(spectrum, dtype=np.float64)
+    src = np.linspace(0, 1, spectrum.size)
+    dst = np.linspace(0, 1, self.frame // 2 + 1)
+    # Rescale from a Hann window of n_fft to our sqrt-Hann window of self.frame
+    hann = np.hanning(n_fft)
+    scale = (self.window.astype(np.float64) ** 2).sum() / (hann ** 2).sum()
+    self.noise = (np.interp(dst, src, spectrum) * scale).astype(np.float32)
+
+  def _suppress(self, frames):
+    spectra = np.fft.rfft(frames * self.window, axis=1)
+    power = spectra.real ** 2 + spectra.imag ** 2
+    if self.noise is None:
+      self.noise = power[0].astype(np.float32)
+    for i in range(power.shape[0]):
+      # Only quiet frames teach the noise estimate; quieter-than-noise ones pull it down fast
+      level = power[i].sum() / max(float(self.noise.sum()), 1e-12)
+      if level < 1.0:
+        self.noise += 0.3 * (power[i] - self.noise)
+      elif level < 2.5:
+        self.noise += self.noise_adapt * (power[i] - self.noise)
+    gain = 1.0 - self.over_subtraction * self.noise / np.maximum(power, 1e-12)
+    np.maximum(gain, self.gain_floor ** 2, out=gain)
+    np.sqrt(gain, out=gain)
+    if self.highpass is not None:
+      gain *= self.highpass
+    spectra *= gain
+    return np.fft.irfft(spectra, n=self.frame, axis=1).astype(np.float32) * self.window
+
+  def _apply_agc(self, out):
+    rms = float(np.sqrt(np.mean(out * out))) if out.size else 0.0
+    target = self._agc
+    # Don't pump silence up to speech level
+    if rms > self.target_rms / self.max_gain:
+      target = min(self.max_gain, self.target_rms / rms)
+    # Fast attack when the gain has to drop, slow release when it rises
+    step = 0.5 if target < self._agc else 0.05
+    new = self._agc + step * (target - self._agc)
+    out *= np.linspace(self._agc, new, out.size, dtype=np.float32)
+    np.clip(out, -1.0, 1.0, out=out)
+    self._agc = new
+    self.gain_db.append(20 * np.log10(new))
+
+  def process(self, block):
+    """Condition one block in place (float32) and return it"""
+    start = time.perf_counter()
+    if not (isinstance(block, np.ndarray) and block.dtype == np.float32 and block.flags.writeable):
+      block = to_float(block).copy()
+    buf = np.concatenate((self._pending, block))
+    n = (buf.size - (self.frame - self.hop)) // self.hop
+    if n > 0:
+      frames = np.lib.stride_tricks.as_strided(
+        buf, shape=(n, self.frame), strides=(buf.strides[0] * self.hop, buf.strides[0]), writeable=False)
+      y = self._suppress(frames)
+      # 50% overlap-add: each hop is this frame's head plus the previous frame's tail
+      produced = y[:, :self.hop].copy()
+      produced[0] += self._tail
+      produced[1:] += y[:-1, self.hop:]
+      self._tail = y[-1, self.hop:].copy()
+      produced = produced.reshape(-1)
+      self._apply_agc(produced)
+      self._out = np.concatenate((self._out, produced))
+      self._pending = buf[n * self.hop:].copy()
+    else:
+      self._pending = buf
+    # The hop of slack in _out guarantees a full block is always ready
+    block[:] = self._out[:block.size]
+    self._out = self._out[block.size:]
+    self.compute_ms.append((time.perf_counter() - start) * 1000)
+    return block
+
+  def stats(self):
+    compute = np.array(self.compute_ms or [0.0])
+    gains = np.array(self.gain_db or [0.0])
+    return {
+      "compute_ms_per_block": float(compute.mean()),
+      "agc_gain_db_mean": float(gains.mean()),
+      "noise_power": float(self.noise.sum()) if self.noise is not None else 0.0,
+    }
@@ -0,0 +1,103 @@
+from math import gcd, ceil
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from audio_utils import to_float
+
+HALF_WIDTH = 16
+KAISER_BETA = 8.0
+
+_filters = {}
+
+def polyphase_filter(orig_sr, target_sr, half_width=HALF_WIDTH, beta=KAISER_BETA):
+  """Kaiser-windowed sinc split into polyphase branches, built once per rate pair
+
+  Returns (up, down, bank) where bank[p] holds the time-reversed taps of
+  branch p, ready to be dotted with a window of input samples.
+  """
+  key = (orig_sr, target_sr, half_width, beta)
+  if key not in _filters:
+    g = gcd(orig_sr, target_sr)
+    up, down = target_sr // g, orig_sr // g
+    taps = int(ceil(2 * half_width * max(up, down) / up))
+    n = taps * up
+    cutoff = 0.5 / max(up, down) * 0.94
+    # Centre on a whole output sample so the delay can be trimmed exactly
+    centre = round((n - 1) / 2 / down) * down
+    t = np.arange(n) - centre
+    half = max(centre, n - 1 - centre) + 1
+    window = np.i0(beta * np.sqrt(1 - (t / half) ** 2)) / np.i0(beta)
+    h = up * 2 * cutoff * np.sinc(2 * cutoff * t) * window
+    bank = h.reshape(taps, up).T[:, ::-1]
+    _filters[key] = (up, down, np.ascontiguousarray(bank, dtype=np.float32))
+  return _filters[key]
+
+
+class Resampler:
+  """Streaming polyphase FIR resampler
+
+  Feed capture blocks to process() as they arrive and call flush() at the
+  end; only the filter history is carried between blocks.
+  """
+
+  def __init__(self, orig_sr, target_sr=16000):
+    self.orig_sr = orig_sr
+    self.target_sr = target_sr
+    self.up, self.down, self.bank = polyphase_filter(orig_sr, target_sr)
+    self.taps = self.bank.shape[1]
+    # Group delay of the filter, in output samples
+    self.delay = round((self.taps * self.up - 1) / 2 / self.down)
+    self.reset()
+
+  def reset(self):
+    self._history = np.zeros(self.taps - 1, dtype=np.float32)
+    self._consumed = 0
+    self._produced = 0
+
+  def process(self, block):
+    """Resample the next block; returns whatever output is complete so far"""
+    block = to_float(block)
+    if self.up == self.down:
+      return block.copy()
+    buf = np.concatenate((self._history, block))
+    total = self._consumed + block.size
+    n_end = (total * self.up + self.down - 1) // self.down
+    count = n_end - self._produced
+    out = np.empty(max(count, 0), dtype=np.float32)
+    if count > 0 and count < 4 * self.up:
+      # Few outputs per branch (e.g. 44.1k): gather all windows at once
+      n = np.arange(self._produced, n_end)
+      starts = (n * self.down) // self.up - self._consumed
+      windows = sliding_window_view(buf, self.taps)[starts]
+      np.einsum("ij,ij->i", windows, self.bank[(n * self.down) % self.up], out=out)
+    elif count > 0:
+      windows = sliding_window_view(buf, self.taps)
+      for j in range(min(self.up, count)):
+        n0 = self._produced + j
+        phase = (n0 * self.down) % self.up
+        start = (n0 * self.down) // self.up - self._consumed
+        branch = out[j::self.up]
+        branch[:] = windows[start::self.down][:branch.size] @ self.bank[phase]
+    self._history = buf[buf.size - (self.taps - 1):]
+    self._consumed = total
+    self._produced = n_end
+    return out
+
+  def flush(self):
+    """Push the filter tail out (zero padding) after the last block"""
+    pad = int(ceil((self.delay + 1) * self.down / self.up)) + 1
+    return self.process(np.zeros(pad, dtype=np.float32))
+
+  def resample(self, samples):
+    """One-shot resample with the filter delay compensated"""
+    samples = to_float(samples)
+    if self.up == self.down:
+      return samples.copy()
+    self.reset()
+    out = np.concatenate((self.process(samples), self.flush()))
+    n_out = samples.size * self.up // self.down
+    self.reset()
+    return out[self.delay:self.delay + n_out]
+
+
+def resample(samples, orig_sr, target_sr=16000):
+  return Resampler(orig_sr, target_sr).resample(samples)
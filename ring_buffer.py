@@ -0,0 +1,201 @@
+import threading
+import numpy as np
+
+
+class AudioRingBuffer:
+  """Fixed-capacity float32 sample store that the CapturePump sink writes in place
+
+  With overwrite=False (push-to-talk) writes stop once the buffer is full and
+  the excess is counted in `dropped`, so the data is always contiguous and
+  read() can hand back a view. With overwrite=True the oldest samples are
+  replaced, which suits an always-on pre-roll.
+  """
+
+  def __init__(self, capacity, overwrite=False, dtype=np.float32):
+    self.capacity = int(capacity)
+    self.overwrite = overwrite
+    self._data = np.zeros(self.capacity, dtype=dtype)
+    self.clear()
+
+  @classmethod
+  def for_duration(cls, seconds, sample_rate=16000, **kwargs):
+    return cls(int(seconds * sample_rate), **kwargs)
+
+  def clear(self):
+    self._end = 0        # total samples ever written since clear()
+    self.dropped = 0
+
+  def __len__(self):
+    return min(self._end, self.capacity)
+
+  @property
+  def full(self):
+    return self._end >= self.capacity
+
+  def write(self, block):
+    """Copy one block into the buffer without allocating"""
+    n = len(block)
+    if n == 0:
+      return 0
+    if not self.overwrite:
+      room = self.capacity - self._end
+      if n > room:
+        self.dropped += n - room
+        n = room
+      self._data[self._end:self._end + n] = block[:n]
+      self._end += n
+      return n
+    # Samples pushed out of the window count as dropped
+    self.dropped += max(0, self._end + n - self.capacity) - max(0, self._end - self.capacity)
+    if n >= self.capacity:
+      # Keep the tail aligned so read() unrolls from _end % capacity
+      tail = block[n - self.capacity:]
+      shift = (self._end + n) % self.capacity
+      self._data[shift:] = tail[:self.capacity - shift]
+      self._data[:shift] = tail[self.capacity - shift:]
+      self._end += n
+      return n
+    start = self._end % self.capacity
+    first = min(n, self.capacity - start)
+    self._data[start:start + first] = block[:first]
+    self._data[:n - first] = block[first:n]
+    self._end += n
+    return n
+
+  def read(self, copy=False):
+    """Return the recorded samples in order
+
+    A view into the buffer is returned whenever the data is contiguous and
+    copy is False; a wrapped buffer is unrolled into one new array.
+    """
+    size = len(self)
+    if self._end <= self.capacity:
+      data = self._data[:size]
+      return data.copy() if copy else data
+    start = self._end % self.capacity
+    return np.concatenate((self._data[start:], self._data[:start]))
+
+
+class SPSCRingBuffer:
+  """Single-producer/single-consumer handoff between an audio callback and a worker
+
+  Both sides only ever advance their own counter, and the producer publishes
+  its counter after the samples are in place, so no lock is taken in the
+  audio thread and nothing is allocated there. A block that doesn't fit is
+  dropped whole and counted as an overrun. `underruns` is left to consumers
+  that wait on a fixed frame size and can tell a stall from a pause: the
+  AssemblyAI sender counts one when capture stalls past two frames.
+  CapturePump doesn't, as push-to-talk capture stops between recordings,
+  so its buffers always report 0.
+  """
+
+  def __init__(self, capacity, dtype=np.float32):
+    self.capacity = int(capacity)
+    self._data = np.zeros(self.capacity, dtype=dtype)
+    self._written = 0    # producer-owned
+    self._read = 0       # consumer-owned
+    self.overruns = 0
+    self.overrun_samples = 0
+    self.device_overruns = 0
+    self.underruns = 0
+
+  def available(self):
+    return self._written - self._read
+
+  def write(self, block):
+    """Producer side: copy a block in, or drop it if the consumer has fallen behind"""
+    n = len(block)
+    if n > self.capacity - (self._written - self._read):
+      self.overruns += 1
+      self.overrun_samples += n
+      return False
+    start = self._written % self.capacity
+    first = min(n, self.capacity - start)
+    self._data[start:start + first] = block[:first]
+    self._data[:n - first] = block[first:]
+    self._written += n
+    return True
+
+  def read_into(self, out):
+    """Consumer side: copy up to len(out) samples; returns how many were read"""
+    want = min(len(out), self._written - self._read)
+    start = self._read % self.capacity
+    first = min(want, self.capacity - start)
+    out[:first] = self._data[start:start + first]
+    out[first:want] = self._data[:want - first]
+    self._read += want
+    return want
+
+  def discard(self):
+    """Consumer side: skip everything currently buffered"""
+    self._read = self._written
+
+  def stats(self):
+    return {
+      "overruns": self.overruns,
+      "overrun_samples": self.overrun_samples,
+      "device_overruns": self.device_overruns,
+      "underruns": self.underruns,
+      "fill": self.available() / self.capacity,
+    }
+
+
+class CapturePump:
+  """Consumer thread that moves captured blocks out of an SPSCRingBuffer
+
+  sink(block) runs here instead of in the audio callback. The block passed
+  to sink is a reused scratch array, so sinks must copy what they keep.
+  Hold `lock` to pause the pump while resetting downstream state.
+  """
+
+  def __init__(self, source, sink, block=1024, interval=0.005):
+    self.source = source
+    self.sink = sink
+    self.interval = interval
+    self.lock = threading.Lock()
+    self._scratch = np.zeros(block, dtype=source._data.dtype)
+    self._stop = threading.Event()
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._thread.start()
+
+  def drain(self):
+    """Move everything available right now; returns the sample count"""
+    moved = 0
+    with self.lock:
+      while True:
+        n = self.source.read_into(self._scratch)
+        if n == 0:
+          return moved
+        self.sink(self._scratch[:n])
+        moved += n
+
+  def _run(self):
+    while not self._stop.is_set():
+      if not self.drain():
+        self._stop.wait(self.interval)
+
+  def stop(self):
+    self._stop.set()
+    self._thread.join(timeout=1.0)
+
+
+class CallbackTimer:
+  """Preallocated record of how long each audio callback took"""
+
+  def __init__(self, block_seconds, size=4096):
+    self.block_ms = block_seconds * 1000
+    self._samples = np.zeros(size)
+    self._count = 0
+
+  def record(self, seconds):
+    self._samples[self._count % self._samples.size] = seconds
+    self._count += 1
+
+  def stats(self, percentiles=(50, 95, 99)):
+    data = self._samples[:min(self._count, self._samples.size)] * 1000
+    if data.size == 0:
+      return {"callbacks": 0}
+    result = {"callbacks": self._count, "budget_ms": self.block_ms, "max_ms": float(data.max())}
+    for q, value in zip(percentiles, np.percentile(data, percentiles)):
+      result[f"p{q}_ms"] = float(value)
+    return result
@@ -0,0 +1,135 @@
+import time
+import queue
+import threading
+from collections import deque
+import numpy as np
+
+
+class TranscriptionScheduler:
+  """Fixed-size worker pool for decoding utterances, with ordered results
+
+  Jobs wait in a bounded pending list. When a newer utterance arrives and
+  the list is full, the stale work is either dropped (policy="drop") or
+  merged with the new audio into one decode (policy="coalesce"). Results are
+  delivered strictly in submission order, whatever order workers finish in.
+  """
+
+  def __init__(self, transcribe, workers=1, max_pending=1, policy="drop", on_result=None):
+    if policy not in ("drop", "coalesce"):
+      raise ValueError("policy must be 'drop' or 'coalesce'")
+    self.transcribe = transcribe
+    self.max_pending = max_pending
+    self.policy = policy
+    self.on_result = on_result
+    self.results = queue.Queue()
+
+    self._pending = deque()
+    self._cond = threading.Condition()
+    # Held from picking a result to handing it out, so two workers can't
+    # hand out consecutive results in the wrong order. Reentrant because
+    # on_result may submit().
+    self._deliver_lock = threading.RLock()
+    self._next_seq = 0
+    self._deliver_seq = 0
+    self._finished = {}
+    self._skipped = set()
+    self._closed = False
+
+    self.submitted = 0
+    self.dropped = 0
+    self.coalesced = 0
+    self.max_depth = 0
+    self.wait_ms = []
+    self.decode_ms = []
+
+    self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+    for worker in self._workers:
+      worker.start()
+
+  @property
+  def depth(self):
+    with self._cond:
+      return len(self._pending)
+
+  def submit(self, audio):
+    """Queue one utterance; returns its sequence number"""
+    with self._cond:
+      self.submitted += 1
+      if self._pending and self.policy == "coalesce":
+        job = self._pending[-1]
+        job["audio"] = np.concatenate((job["audio"], audio))
+        self.coalesced += 1
+        return job["seq"]
+      while len(self._pending) >= self.max_pending:
+        stale = self._pending.popleft()
+        self._skipped.add(stale["seq"])
+        self.dropped += 1
+      seq = self._next_seq
+      self._next_seq += 1
+      self._pending.append({"seq": seq, "audio": audio, "queued": time.perf_counter()})
+      self.max_depth = max(self.max_depth, len(self._pending))
+      self._cond.notify()
+    self._deliver()
+    return seq
+
+  def _work(self):
+    while True:
+      with self._cond:
+        while not self._pending and not self._closed:
+          self._cond.wait()
+        if self._closed and not self._pending:
+          return
+        job = self._pending.popleft()
+      started = time.perf_counter()
+      self.wait_ms.append((started - job["queued"]) * 1000)
+      try:
+        result, error = self.transcribe(job["audio"]), None
+      except Exception as e:
+        result, error = None, e
+      self.decode_ms.append((time.perf_counter() - started) * 1000)
+      with self._cond:
+        self._finished[job["seq"]] = (result, error)
+      self._deliver()
+
+  def _deliver(self):
+    """Hand out every finished result whose predecessors are all accounted for"""
+    with self._deliver_lock:
+      while True:
+        with self._cond:
+          item = None
+          while item is None:
+            seq = self._deliver_seq
+            if seq in self._skipped:
+              self._skipped.discard(seq)
+            elif seq in self._finished:
+              item = (seq,) + self._finished.pop(seq)
+            else:
+              break
+            self._deliver_seq += 1
+        if item is None:
+          return
+        self.results.put(item)
+        if self.on_result:
+          self.on_result(*item)
+
+  def shutdown(self, wait=True):
+    with self._cond:
+      self._closed = True
+      self._cond.notify_all()
+    if wait:
+      for worker in self._workers:
+        worker.join()
+
+  def stats(self):
+    waits = np.array(self.wait_ms or [0.0])
+    decodes = np.array(self.decode_ms or [0.0])
+    return {
+      "submitted": self.submitted,
+      "dropped": self.dropped,
+      "coalesced": self.coalesced,
+      "queue_depth": self.depth,
+      "max_queue_depth": self.max_depth,
+      "wait_ms_mean": float(waits.mean()),
+      "wait_ms_p95": float(np.percentile(waits, 95)),
+      "decode_ms_mean": float(decodes.mean()),
+    }
@@ -0,0 +1,87 @@
+import os
+import struct
+
+
+class SessionRecorder:
+  """Writes PCM frames to disk as they arrive, with constant memory use
+
+  WAV output keeps a valid RIFF header on disk: sizes are patched and the
+  file flushed every sync_seconds, so a crash loses at most that much
+  audio. FLAC output goes through soundfile (if installed), which streams
+  compressed blocks the same way.
+  """
+
+  def __init__(self, path, sample_rate=16000, channels=1, sample_width=2, format="wav", sync_seconds=1.0):
+    self.path = path
+    self.sample_rate = sample_rate
+    self.channels = channels
+    self.sample_width = sample_width
+    self.format = format.lower()
+    self.sync_bytes = int(sync_seconds * sample_rate * channels * sample_width)
+    self.bytes_written = 0
+    self._unsynced = 0
+    self._file = None
+    self._sf = None
+
+    if self.format == "flac":
+      import soundfile as sf
+      self._sf = sf.SoundFile(path, "w", samplerate=sample_rate, channels=channels,
+                              format="FLAC", subtype="PCM_16")
+    elif self.format == "wav":
+      self._file = open(path, "wb")
+      self._write_header()
+    else:
+      raise ValueError(f"Unsupported recording format: {format}")
+
+  @property
+  def duration(self):
+    return self.bytes_written / (self.sample_rate * self.channels * self.sample_width)
+
+  def _write_header(self):
+    block_align = self.channels * self.sample_width
+    self._file.seek(0)
+    self._file.write(struct.pack(
+      "<4sI4s4sIHHIIHH4sI",
+      b"RIFF", 36 + self.bytes_written, b"WAVE",
+      b"fmt ", 16, 1, self.channels, self.sample_rate,
+      self.sample_rate * block_align, block_align, self.sample_width * 8,
+      b"data", self.bytes_written,
+    ))
+    self._file.seek(0, os.SEEK_END)
+
+  def write(self, frames):
+    """Append raw little-endian PCM bytes"""
+    if self._sf is not None:
+      import numpy as np
+      self._sf.write(np.frombuffer(frames, dtype="<i2").reshape(-1, self.channels))
+    else:
+      self._file.write(frames)
+    self.bytes_written += len(frames)
+    self._unsynced += len(frames)
+    if self._unsynced >= self.sync_bytes:
+      self.sync()
+
+  def sync(self):
+    """Make everything written so far readable even if the process dies"""
+    if self._sf is not None:
+      self._sf.flush()
+    else:
+      self._write_header()
+      self._file.flush()
+      os.fsync(self._file.fileno())
+    self._unsynced = 0
+
+  def close(self):
+    if self._sf is not None:
+      self._sf.close()
+      self._sf = None
+    elif self._file is not None:
+      self._write_header()
+      self._file.close()
+      self._file = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
@@ -3,21 +3,28 @@
 # pip install websocket-client pyaudio
 
 import pyaudio
-import websocket
+import numpy as np
 import json
+import os
+import sys
 import threading
 import time
-import wave
 from urllib.parse import urlencode
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from session_recorder import SessionRecorder
+from streaming_session import StreamingSession
+from ring_buffer import SPSCRingBuffer, CallbackTimer
+
 # Replace with your chosen API key, this is the "default" account api key
 API_KEY = "1058c267b17849eaa1f3daeb94135c8f"
 CONNECTION_PARAMS = {
     "sample_rate": 16000,
     "format_turns": True
 }
-API_ENDPOINT_BASE_URL = "wss://streaming.assemblyai.com/v3/ws"
+# Point ASSEMBLYAI_WS_URL at a local stand-in server to test without the real service
+API_ENDPOINT_BASE_URL = os.environ.get("ASSEMBLYAI_WS_URL", "wss://streaming.assemblyai.com/v3/ws")
 API_ENDPOINT = f"{API_ENDPOINT_BASE_URL}?{urlencode(CONNECTION_PARAMS)}"
 
 # Audio Configuration
@@ -29,45 +36,70 @@ FORMAT = pyaudio.paInt16
 # Global variables for audio stream and websocket
 audio = None
 stream = None
-ws_app = None
+session = None
 audio_thread = None
 stop_event = threading.Event()  # To signal the audio thread to stop
 
-# WAV recording variables
-recorded_frames = []  # Store audio frames for WAV file
-recording_lock = threading.Lock()  # Thread-safe access to recorded_frames
+# PyAudio's callback only copies into this preallocated handoff; overflows are
+# counted instead of being swallowed by exception_on_overflow=False
+capture = SPSCRingBuffer(SAMPLE_RATE * 2, dtype=np.int16)
+callback_timer = CallbackTimer(FRAMES_PER_BUFFER / SAMPLE_RATE)
+
+# Recording variables: frames go straight to disk, nothing is kept in memory
+RECORD_FORMAT = "wav"  # or "flac" (needs the soundfile package)
+recorder = None
+recording_lock = threading.Lock()  # Thread-safe access to recorder
 
 # --- WebSocket Event Handlers ---
 
 def on_open(ws):
-    """Called when the WebSocket connection is established."""
-    print("WebSocket connection opened.")
-    print(f"Connected to: {API_ENDPOINT}")
-
-    # Start sending audio data in a separate thread
-    def stream_audio():
-        global stream
-        print("Starting audio streaming...")
-        while not stop_event.is_set():
-            try:
-                audio_data = stream.read(FRAMES_PER_BUFFER, exception_on_overflow=False)
-
-                # Store audio data for WAV recording
-                with recording_lock:
-                    recorded_frames.append(audio_data)
-
-                # Send audio data as binary message
-                ws.send(audio_data, websocket.ABNF.OPCODE_BINARY)
-            except Exception as e:
-                print(f"Error streaming audio: {e}")
-                # If stream read fails, likely means it's closed, stop the loop
-                break
-        print("Audio streaming stopped.")
-
-    global audio_thread
-    audio_thread = threading.Thread(target=stream_audio)
-    audio_thread.daemon = True
-    audio_thread.start()
+    """Called when the WebSocket connection is established (again after a drop)."""
+    if session and session.reconnects:
+        print(f"\nWebSocket reconnected (#{session.reconnects}), replaying {session.stats()['buffered_ms']:.0f} ms of buffered audio.")
+    else:
+        print("WebSocket connection opened.")
+        print(f"Connected to: {API_ENDPOINT}")
+
+def audio_callback(in_data, frame_count, time_info, status_flags):
+    """Runs on PyAudio's thread: count overflows, copy the block, nothing else."""
+    start = time.perf_counter()
+    if status_flags & pyaudio.paInputOverflow:
+        capture.device_overruns += 1
+    capture.write(np.frombuffer(in_data, dtype=np.int16))
+    callback_timer.record(time.perf_counter() - start)
+    return (None, pyaudio.paContinue)
+
+def stream_audio():
+    """Capture audio regardless of connection state; the session buffers across drops."""
+    print("Starting audio streaming...")
+    frame = np.zeros(FRAMES_PER_BUFFER, dtype=np.int16)
+    frame_seconds = FRAMES_PER_BUFFER / SAMPLE_RATE
+    last_frame = time.perf_counter()
+    while not stop_event.is_set():
+        try:
+            if capture.available() < FRAMES_PER_BUFFER:
+                # Capture stalled for more than two frames
+                if time.perf_counter() - last_frame > 2 * frame_seconds:
+                    capture.underruns += 1
+                    last_frame = time.perf_counter()
+                time.sleep(0.005)
+                continue
+            capture.read_into(frame)
+            last_frame = time.perf_counter()
+            audio_data = frame.tobytes()
+
+            # Append audio data to the session recording on disk
+            with recording_lock:
+                if recorder:
+                    recorder.write(audio_data)
+
+            # Queue for sending; batched and replayed by the session
+            session.send_audio(audio_data)
+        except Exception as e:
+            print(f"Error streaming audio: {e}")
+            # If stream read fails, likely means it's closed, stop the loop
+            break
+    print("Audio streaming stopped.")
 
 def on_message(ws, message):
     try:
@@ -98,63 +130,46 @@ def on_message(ws, message):
         print(f"Error handling message: {e}")
 
 def on_error(ws, error):
-    """Called when a WebSocket error occurs."""
-    print(f"\nWebSocket Error: {error}")
-    # Attempt to signal stop on error
-    stop_event.set()
+    """Called when a WebSocket error occurs; the session reconnects by itself."""
+    print(f"\nWebSocket Error: {error} (reconnecting...)")
 
 def on_close(ws, close_status_code, close_msg):
-    """Called when the WebSocket connection is closed."""
+    """Called when a live connection drops. Audio keeps buffering until reconnect."""
     print(f"\nWebSocket Disconnected: Status={close_status_code}, Msg={close_msg}")
 
-    # Save recorded audio to WAV file
-    save_wav_file()
-
-    # Ensure audio resources are released
-    global stream, audio
-    stop_event.set()  # Signal audio thread just in case it's still running
-
-    if stream:
-        if stream.is_active():
-            stream.stop_stream()
-        stream.close()
-        stream = None
-    if audio:
-        audio.terminate()
-        audio = None
-    # Try to join the audio thread to ensure clean exit
-    if audio_thread and audio_thread.is_alive():
-        audio_thread.join(timeout=1.0)
+def start_recording():
+    """Open the session recording file; frames are appended as they are captured."""
+    global recorder
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"recorded_audio_{timestamp}.{RECORD_FORMAT}"
+    try:
+        with recording_lock:
+            recorder = SessionRecorder(filename, SAMPLE_RATE, CHANNELS, 2, format=RECORD_FORMAT)
+        print(f"Recording session to: {filename}")
+    except Exception as e:
+        print(f"Error opening recording file: {e}")
 
 def save_wav_file():
-    """Save recorded audio frames to a WAV file."""
+    """Finalize the session recording (header sizes, flush, close)."""
+    global recorder
     with recording_lock:
-        if not recorded_frames:
-            print("No audio data recorded.")
+        if recorder is None:
             return
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"recorded_audio_{timestamp}.wav"
-
         try:
-            with wave.open(filename, 'wb') as wf:
-                wf.setnchannels(CHANNELS)
-                wf.setsampwidth(2)  # 16-bit = 2 bytes
-                wf.setframerate(SAMPLE_RATE)
-
-                # Write all recorded frames
-                wf.writeframes(b''.join(recorded_frames))
-
-            print(f"Audio saved to: {filename}")
-            print(f"Duration: {len(recorded_frames) * FRAMES_PER_BUFFER / SAMPLE_RATE:.2f} seconds")
-
+            recorder.close()
+            if recorder.bytes_written:
+                print(f"Audio saved to: {recorder.path}")
+                print(f"Duration: {recorder.duration:.2f} seconds")
+            else:
+                print("No audio data recorded.")
+                os.remove(recorder.path)
         except Exception as e:
-            print(f"Error saving WAV file: {e}")
+            print(f"Error saving recording: {e}")
+        recorder = None
 
 # --- Main Execution ---
 def run():
-    global audio, stream, ws_app
+    global audio, stream, session, audio_thread
 
     # Initialize PyAudio
     audio = pyaudio.PyAudio()
@@ -167,72 +182,65 @@ def run():
             channels=CHANNELS,
             format=FORMAT,
             rate=SAMPLE_RATE,
+            stream_callback=audio_callback,
         )
         print("Microphone stream opened successfully.")
         print("Speak into your microphone. Press Ctrl+C to stop.")
-        print("Audio will be saved to a WAV file when the session ends.")
+        start_recording()
     except Exception as e:
         print(f"Error opening microphone stream: {e}")
         if audio:
             audio.terminate()
         return  # Exit if microphone cannot be opened
 
-    # Create WebSocketApp
-    ws_app = websocket.WebSocketApp(
+    # Reconnecting session: sends in batches and replays audio captured during outages
+    session = StreamingSession(
         API_ENDPOINT,
         header={"Authorization": API_KEY},
         on_open=on_open,
         on_message=on_message,
         on_error=on_error,
         on_close=on_close,
+        sample_rate=SAMPLE_RATE,
     )
+    session.start()
 
-    # Run WebSocketApp in a separate thread to allow main thread to catch KeyboardInterrupt
-    ws_thread = threading.Thread(target=ws_app.run_forever)
-    ws_thread.daemon = True
-    ws_thread.start()
+    # Capture in a separate thread to allow main thread to catch KeyboardInterrupt
+    audio_thread = threading.Thread(target=stream_audio)
+    audio_thread.daemon = True
+    audio_thread.start()
 
     try:
         # Keep main thread alive until interrupted
-        while ws_thread.is_alive():
+        while audio_thread.is_alive():
             time.sleep(0.1)
     except KeyboardInterrupt:
         print("\nCtrl+C received. Stopping...")
-        stop_event.set()  # Signal audio thread to stop
-
-        # Send termination message to the server
-        if ws_app and ws_app.sock and ws_app.sock.connected:
-            try:
-                terminate_message = {"type": "Terminate"}
-                print(f"Sending termination message: {json.dumps(terminate_message)}")
-                ws_app.send(json.dumps(terminate_message))
-                # Give a moment for messages to process before forceful close
-                time.sleep(0.5)
-            except Exception as e:
-                print(f"Error sending termination message: {e}")
-
-        # Close the WebSocket connection (will trigger on_close)
-        if ws_app:
-            ws_app.close()
-
-        # Wait for WebSocket thread to finish
-        ws_thread.join(timeout=2.0)
-
     except Exception as e:
         print(f"\nAn unexpected error occurred: {e}")
-        stop_event.set()
-        if ws_app:
-            ws_app.close()
-        ws_thread.join(timeout=2.0)
 
     finally:
-        # Final cleanup (already handled in on_close, but good as a fallback)
+        stop_event.set()  # Signal audio thread to stop
+        audio_thread.join(timeout=1.0)
+
+        # Flush buffered audio, send the termination message, and close
+        terminate_message = {"type": "Terminate"}
+        print(f"Sending termination message: {json.dumps(terminate_message)}")
+        session.stop(terminate_message=json.dumps(terminate_message))
+        stats = session.stats()
+        print(f"Session stats: reconnects={stats['reconnects']}, gap={stats['gap_s_total']:.1f}s, "
+              f"sends={stats['sends']}, avg batch={stats['avg_batch_ms']:.0f}ms")
+        print(f"Capture stats: {capture.stats()}")
+        print(f"Callback timing: {callback_timer.stats()}")
+
+        # Release audio resources and finalize the recording
         if stream and stream.is_active():
             stream.stop_stream()
         if stream:
             stream.close()
         if audio:
             audio.terminate()
+        save_wav_file()
         print("Cleanup complete. Exiting.")
 
 if __name__ == "__main__":
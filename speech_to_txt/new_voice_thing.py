@@ -1,14 +1,29 @@
-import whisper
 import sounddevice as sd
 import numpy as np
 from pynput import keyboard
-import threading
+import os
 import sys
-from collections import deque
+import time
 
-print("🔄 Loading Whisper model...")
-# Use 'small' model for best Hinglish accuracy
-model = whisper.load_model("small", device="cpu")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from decoding_profiles import ProfileSelector
+from resampler import Resampler
+from preprocessing import Preprocessor
+from ring_buffer import AudioRingBuffer, SPSCRingBuffer, CapturePump, CallbackTimer
+from vad import trim_silence
+from scheduler import TranscriptionScheduler
+
+# 'small' with beam 2 is the default; short commands drop to 'tiny' and
+# longer ones get whatever still fits the latency target on this machine
+DEVICE = "cpu"
+TARGET_LATENCY_MS = int(os.environ.get("JJ_WHISPER_TARGET_MS", "1500"))
+MAX_RECORD_SECONDS = 30
+BLOCK_SIZE = 1024
+
+# Load and calibrate in the background so the mic and keyboard listener come up right away
+print("🔄 Loading Whisper model in background...")
+profiles = ProfileSelector(target_ms=TARGET_LATENCY_MS, device=DEVICE)
+profiles.warm()
 
 # 🔍 Pick your mic
 mic_index = 15
@@ -32,62 +47,69 @@ print("Press ESC to quit.\n")
 
 # State variables
 is_recording = False
-recording_frames = deque()
+# Preallocated; holding SPACE longer than MAX_RECORD_SECONDS just stops filling it
+recording = AudioRingBuffer.for_duration(MAX_RECORD_SECONDS, 16000)
+# Blocks are resampled to 16kHz as they arrive, not after release
+resampler = Resampler(samplerate, 16000)
+# High-pass, noise suppression and AGC, also block by block on the pump thread
+preprocessor = Preprocessor(16000)
+# Samples of pipeline latency at the start of every recording
+LEAD = resampler.delay + preprocessor.delay
+# The callback only copies into this preallocated handoff; the pump thread
+# does the resampling, so nothing allocates or locks in the audio thread
+capture = SPSCRingBuffer(samplerate * 2)
+callback_timer = CallbackTimer(BLOCK_SIZE / samplerate)
 
-def audio_callback(indata, frames, time, status):
+def audio_callback(indata, frames, time_info, status):
     """Callback for audio stream"""
+    start = time.perf_counter()
+    if status.input_overflow:
+        capture.device_overruns += 1
     if is_recording:
-        recording_frames.append(indata[:, 0].astype(np.float32).copy())
+        capture.write(indata[:, 0])
+    callback_timer.record(time.perf_counter() - start)
 
-def transcribe_async(audio_data):
-    """Transcribe in background thread"""
-    try:
-        # Resample to 16kHz inline
-        if samplerate != 16000:
-            duration = len(audio_data) / samplerate
-            target_length = int(duration * 16000)
-            audio_data = np.interp(
-                np.linspace(0, len(audio_data), target_length),
-                np.arange(len(audio_data)),
-                audio_data
-            )
-        
-        # Normalize
-        max_val = np.max(np.abs(audio_data))
-        if max_val > 0:
-            audio_data = audio_data / max_val
-        
-        # Transcribe with auto language detection
-        # Whisper handles Hinglish naturally and outputs in Roman script
-        result = model.transcribe(
-            audio_data,
-            language=None,  # Auto-detect
-            fp16=False,
-            condition_on_previous_text=False,
-            temperature=0.0,
-            best_of=1,
-            beam_size=2,
-            patience=1.0,
-            task="transcribe"  # Keep original language, don't translate
-        )
-        
-        text = result["text"].strip()
-        
-        if text:
-            print(f"✅ You said: {text}\n")
-        else:
-            print("⚠️  No speech detected.\n")
-            
-    except Exception as e:
-        print(f"❌ Transcription error: {e}\n")
+pump = CapturePump(capture, lambda block: recording.write(preprocessor.process(resampler.process(block))), BLOCK_SIZE)
+
+def transcribe(audio_data):
+    """Transcribe one utterance on a scheduler worker"""
+    # Leading/trailing silence only slows the decoder down
+    audio_data = trim_silence(audio_data, 16000)
+    if audio_data.size == 0:
+        return ""
+    
+    # Language is auto-detected once, then kept for the session
+    # Whisper handles Hinglish naturally and outputs in Roman script
+    result = profiles.decode(audio_data)
+    print(f"⏱️  {result['profile']} profile, {result['latency_ms']:.0f}ms")
+    return result["text"].strip()
+
+def show_result(seq, text, error):
+    """Called in press order, even if decodes finish out of order"""
+    if error is not None:
+        print(f"❌ Transcription error: {error}\n")
+    elif text:
+        print(f"✅ You said: {text}\n")
+    else:
+        print("⚠️  No speech detected.\n")
+
+# One Whisper decode at a time (it already uses every core); if SPACE is pressed
+# again before the last one starts, the stale recording is dropped
+scheduler = TranscriptionScheduler(transcribe, workers=1, max_pending=1, policy="drop", on_result=show_result)
 
 def on_press(key):
     global is_recording
     
     try:
         if key == keyboard.Key.space and not is_recording:
+            with pump.lock:
+                capture.discard()
+                recording.clear()
+                resampler.reset()
+                preprocessor.reset()
             is_recording = True
-            recording_frames.clear()
+            # Reload now if the models were unloaded while idle
+            profiles.warm(calibrate=False)
             print("🎙️  Recording... (release SPACE to stop)")
     except AttributeError:
         pass
@@ -103,21 +125,28 @@ def on_release(key):
         if key == keyboard.Key.space and is_recording:
             is_recording = False
             
-            if not recording_frames:
+            pump.drain()
+            with pump.lock:
+                recording.write(preprocessor.process(resampler.flush()))
+                # Push the last frame out of the preprocessor
+                recording.write(preprocessor.process(np.zeros(preprocessor.delay, dtype=np.float32)))
+            if len(recording) <= LEAD:
                 print("⚠️  No audio captured, try again.\n")
                 return
+            if recording.dropped:
+                print(f"⚠️  Recording capped at {MAX_RECORD_SECONDS}s")
             
-            audio_data = np.concatenate(list(recording_frames))
+            # One contiguous copy, since the next press reuses the buffer
+            audio_data = recording.read(copy=True)[LEAD:]
             
-            if len(audio_data) < samplerate * 0.3:
+            if len(audio_data) < 16000 * 0.3:
                 print("⚠️  Recording too short, try again.\n")
                 return
             
+            if scheduler.depth:
+                print("⏳ Replacing the recording still waiting to be transcribed")
             print("🧠 Transcribing...")
-            
-            # Transcribe in background
-            thread = threading.Thread(target=transcribe_async, args=(audio_data,), daemon=True)
-            thread.start()
+            scheduler.submit(audio_data)
                     
     except AttributeError:
         pass
@@ -131,7 +160,7 @@ try:
         channels=1,
         samplerate=samplerate,
         callback=audio_callback,
-        blocksize=1024,
+        blocksize=BLOCK_SIZE,
         dtype='float32'
     )
     
@@ -151,5 +180,12 @@ finally:
     if 'stream' in locals():
         stream.stop()
         stream.close()
+    pump.stop()
+    print(f"📊 Capture stats: {capture.stats()}")
+    print(f"📊 Callback timing: {callback_timer.stats()}")
+    print(f"📊 Preprocessing stats: {preprocessor.stats()}")
+    print(f"📊 Scheduler stats: {scheduler.stats()}")
+    print(f"📊 Decoding stats: {profiles.stats()}")
+    scheduler.shutdown(wait=False)
 
 print("👋 Goodbye!")
\ No newline at end of file
@@ -1,4 +1,3 @@
-import whisper
 import sounddevice as sd
 import numpy as np
 from pynput import keyboard
@@ -6,11 +5,25 @@ import tempfile
 import wavio
 import os
 import sys
-import queue
-import threading
+import time
 
-print("🔄 Loading Whisper model...")
-model = whisper.load_model("small", device="cpu")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from whisper_cache import warm_model, get_model
+from resampler import Resampler
+from preprocessing import Preprocessor
+from ring_buffer import AudioRingBuffer, SPSCRingBuffer, CapturePump, CallbackTimer
+from vad import trim_silence
+
+MODEL_SIZE = "small"
+DEVICE = "cpu"
+MAX_RECORD_SECONDS = 30
+BLOCK_SIZE = 2048
+# Also time the old temp-WAV route on each command to show what it would cost
+MEASURE_TEMPFILE_OVERHEAD = False
+
+# Load in the background so the mic and keyboard listener come up right away
+print("🔄 Loading Whisper model in background...")
+warm_model(MODEL_SIZE, DEVICE)
 
 # 🔍 Pick your mic (try 1, 7, or 15)
 mic_index = 15
@@ -34,41 +47,67 @@ print("Press ESC to quit.\n")
 
 # State variables
 is_recording = False
-audio_queue = queue.Queue()
-recording_frames = []
+# Preallocated; holding SPACE longer than MAX_RECORD_SECONDS just stops filling it
+recording = AudioRingBuffer.for_duration(MAX_RECORD_SECONDS, 16000)
+# Blocks are resampled to 16kHz as they arrive, not after release
+resampler = Resampler(samplerate, 16000)
+# High-pass, noise suppression and AGC, also block by block on the pump thread
+preprocessor = Preprocessor(16000)
+# Samples of pipeline latency at the start of every recording
+LEAD = resampler.delay + preprocessor.delay
+# The callback only copies into this preallocated handoff; the pump thread
+# does the resampling, so nothing allocates, prints or locks in the audio thread
+capture = SPSCRingBuffer(samplerate * 2)
+callback_timer = CallbackTimer(BLOCK_SIZE / samplerate)
 
-def audio_callback(indata, frames, time, status):
+def audio_callback(indata, frames, time_info, status):
     """Callback for audio stream"""
-    if status:
-        print(f"⚠️  Audio status: {status}")
+    start = time.perf_counter()
+    if status.input_overflow:
+        capture.device_overruns += 1
     if is_recording:
-        audio_queue.put(indata.copy())
+        capture.write(indata[:, 0])
+    callback_timer.record(time.perf_counter() - start)
 
-def resample_audio(audio, orig_sr, target_sr=16000):
-    """Resample audio to target sample rate"""
-    if orig_sr == target_sr:
-        return audio, target_sr
-    
-    duration = len(audio) / orig_sr
-    target_length = int(duration * target_sr)
-    resampled = np.interp(
-        np.linspace(0, len(audio), target_length),
-        np.arange(len(audio)),
-        audio
-    )
-    return resampled, target_sr
+pump = CapturePump(capture, lambda block: recording.write(preprocessor.process(resampler.process(block))), BLOCK_SIZE)
+
+def transcribe_via_tempfile(model, audio, sr):
+    """Fallback: write a temporary WAV and let Whisper re-read it through ffmpeg"""
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        temp_path = f.name
+    try:
+        wavio.write(temp_path, audio, sr, sampwidth=2)
+        return model.transcribe(temp_path, language="en", fp16=False)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+def tempfile_overhead_ms(audio, sr):
+    """Time of the disk write + ffmpeg decode that the in-memory path skips"""
+    import whisper
+    start = time.perf_counter()
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        temp_path = f.name
+    try:
+        wavio.write(temp_path, audio, sr, sampwidth=2)
+        whisper.load_audio(temp_path, sr=sr)
+    finally:
+        os.unlink(temp_path)
+    return (time.perf_counter() - start) * 1000
 
 def on_press(key):
-    global is_recording, recording_frames
+    global is_recording
     
     try:
         if key == keyboard.Key.space and not is_recording:
+            with pump.lock:
+                capture.discard()
+                recording.clear()
+                resampler.reset()
+                preprocessor.reset()
             is_recording = True
-            recording_frames = []
-            
-            # Clear queue
-            while not audio_queue.empty():
-                audio_queue.get()
+            # Reload now if the model was unloaded while idle
+            warm_model(MODEL_SIZE, DEVICE)
             
             print("🎙️  Recording... (release SPACE to stop)")
             
@@ -76,7 +115,7 @@ def on_press(key):
         pass
 
 def on_release(key):
-    global is_recording, recording_frames
+    global is_recording
     
     # Exit on ESC
     if key == keyboard.Key.esc:
@@ -87,40 +126,46 @@ def on_release(key):
         if key == keyboard.Key.space and is_recording:
             is_recording = False
             
-            # Collect all queued audio
-            while not audio_queue.empty():
-                recording_frames.append(audio_queue.get())
-            
-            if not recording_frames:
+            pump.drain()
+            with pump.lock:
+                recording.write(preprocessor.process(resampler.flush()))
+                # Push the last frame out of the preprocessor
+                recording.write(preprocessor.process(np.zeros(preprocessor.delay, dtype=np.float32)))
+            if len(recording) <= LEAD:
                 print("⚠️  No audio captured, try again.\n")
                 return
+            if recording.dropped:
+                print(f"⚠️  Recording capped at {MAX_RECORD_SECONDS}s")
             
-            # Concatenate all frames
-            audio_data = np.concatenate(recording_frames, axis=0).flatten()
+            # Zero-copy view (already at 16kHz); transcription below is synchronous
+            audio_data = recording.read()[LEAD:]
             
-            if len(audio_data) < samplerate * 0.5:
+            if len(audio_data) < 16000 * 0.5:
                 print("⚠️  Recording too short, try again.\n")
                 return
             
             print("🧠 Transcribing...")
             
             try:
-                # Resample to 16kHz if needed
-                audio_resampled, final_sr = resample_audio(audio_data, samplerate, 16000)
-                
-                # Normalize audio
-                audio_resampled = audio_resampled / np.max(np.abs(audio_resampled) + 1e-8)
-                
-                # Write to temporary file
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-                    temp_path = f.name
-                    wavio.write(temp_path, audio_resampled, final_sr, sampwidth=2)
-                
-                # Transcribe
-                result = model.transcribe(temp_path, language="en", fp16=False)
+                # Leading/trailing silence only slows the decoder down
+                audio_resampled, final_sr = trim_silence(audio_data, 16000), 16000
+                if audio_resampled.size == 0:
+                    print("⚠️  No speech detected.\n")
+                    return
                 
-                # Clean up temp file
-                os.unlink(temp_path)
+                # Transcribe straight from memory; Whisper takes 16kHz float32 arrays
+                model = get_model(MODEL_SIZE, DEVICE)
+                start = time.perf_counter()
+                try:
+                    result = model.transcribe(audio_resampled, language="en", fp16=False)
+                    route = "in-memory"
+                except Exception as e:
+                    print(f"⚠️  In-memory transcription failed ({e}), retrying via temp file")
+                    result = transcribe_via_tempfile(model, audio_resampled, final_sr)
+                    route = "temp file"
+                print(f"⏱️  {route}: {(time.perf_counter() - start) * 1000:.0f} ms")
+                if MEASURE_TEMPFILE_OVERHEAD and route == "in-memory":
+                    print(f"   temp-file route would add {tempfile_overhead_ms(audio_resampled, final_sr):.0f} ms")
                 
                 # Display result
                 text = result["text"].strip()
@@ -131,8 +176,6 @@ def on_release(key):
                     
             except Exception as e:
                 print(f"❌ Transcription error: {e}\n")
-                if 'temp_path' in locals() and os.path.exists(temp_path):
-                    os.unlink(temp_path)
                     
     except AttributeError:
         pass
@@ -146,7 +189,7 @@ try:
         channels=1,
         samplerate=samplerate,
         callback=audio_callback,
-        blocksize=2048,
+        blocksize=BLOCK_SIZE,
         dtype='float32'
     )
     
@@ -173,5 +216,9 @@ finally:
     if 'stream' in locals():
         stream.stop()
         stream.close()
+    pump.stop()
+    print(f"📊 Capture stats: {capture.stats()}")
+    print(f"📊 Callback timing: {callback_timer.stats()}")
+    print(f"📊 Preprocessing stats: {preprocessor.stats()}")
 
 print("👋 Goodbye!")
\ No newline at end of file
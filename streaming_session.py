@@ -0,0 +1,242 @@
+import time
+import threading
+import numpy as np
+
+
+def _create_connection(url, header=None, timeout=10):
+  import websocket
+  return websocket.create_connection(url, header=header, timeout=timeout)
+
+def _binary_opcode():
+  try:
+    import websocket
+    return websocket.ABNF.OPCODE_BINARY
+  except ImportError:
+    return 0x2
+
+
+class StreamingSession:
+  """Realtime ASR websocket that survives drops
+
+  Audio goes into a bounded outgoing buffer and a sender thread ships it in
+  batches. If the socket drops, the sender reconnects with exponential
+  backoff and sends what piled up meanwhile, so speech from the outage is
+  still transcribed. The batch length adapts: it grows while a backlog
+  exists or sends are slow, and shrinks back once the link keeps up.
+
+  `connect` defaults to websocket.create_connection; pass another factory
+  (or a local URL) to run against a stand-in server.
+  """
+
+  def __init__(self, url, header=None, on_open=None, on_message=None, on_error=None, on_close=None,
+               sample_rate=16000, sample_width=2, min_batch_ms=100, max_batch_ms=500,
+               max_buffer_seconds=60, backoff_initial=0.5, backoff_max=8.0, connect=None):
+    self.url = url
+    self.header = header
+    self.on_open = on_open
+    self.on_message = on_message
+    self.on_error = on_error
+    self.on_close = on_close
+    self.bytes_per_ms = sample_rate * sample_width / 1000
+    self.sample_width = sample_width
+    self.min_batch_ms = min_batch_ms
+    self.max_batch_ms = max_batch_ms
+    self.batch_ms = min_batch_ms
+    self.max_buffer_bytes = int(max_buffer_seconds * 1000 * self.bytes_per_ms)
+    self.backoff_initial = backoff_initial
+    self.backoff_max = backoff_max
+    self.connect = connect or _create_connection
+
+    self.ws = None
+    self._buffer = bytearray()
+    self._cond = threading.Condition()
+    self._ws_lock = threading.Lock()
+    self._stopping = threading.Event()
+    self._sender = None
+    self._receivers = []
+    self._gap_start = None
+    self._terminate_message = None
+
+    self.connects = 0
+    self.reconnects = 0
+    self.gaps = []
+    self.sends = 0
+    self.bytes_sent = 0
+    self.bytes_dropped = 0
+
+  # ---------- public API ----------
+  def start(self):
+    self._sender = threading.Thread(target=self._run, daemon=True)
+    self._sender.start()
+
+  def send_audio(self, pcm):
+    """Queue captured PCM; never blocks on the network"""
+    with self._cond:
+      self._buffer.extend(pcm)
+      overflow = len(self._buffer) - self.max_buffer_bytes
+      if overflow > 0:
+        overflow += (-overflow) % self.sample_width
+        del self._buffer[:overflow]
+        self.bytes_dropped += overflow
+      self._cond.notify()
+
+  def stop(self, terminate_message=None, timeout=2.0):
+    """Flush buffered audio, optionally send a terminate message, then close"""
+    self._terminate_message = terminate_message
+    self._stopping.set()
+    with self._cond:
+      self._cond.notify_all()
+    if self._sender:
+      self._sender.join(timeout=timeout + 5)
+    for receiver in self._receivers:
+      receiver.join(timeout=timeout)
+    with self._ws_lock:
+      ws, self.ws = self.ws, None
+    if ws is not None:
+      try:
+        ws.close()
+      except Exception:
+        pass
+
+  @property
+  def connected(self):
+    return self.ws is not None
+
+  def stats(self):
+    gaps = np.array(self.gaps or [0.0])
+    return {
+      "connects": self.connects,
+      "reconnects": self.reconnects,
+      "gap_s_total": float(gaps.sum()),
+      "gap_s_max": float(gaps.max()),
+      "sends": self.sends,
+      "avg_batch_ms": self.bytes_sent / self.bytes_per_ms / max(self.sends, 1),
+      "bytes_sent": self.bytes_sent,
+      "bytes_dropped": self.bytes_dropped,
+      "buffered_ms": len(self._buffer) / self.bytes_per_ms,
+    }
+
+  # ---------- connection management ----------
+  def _open(self):
+    ws = self.connect(self.url, header=self.header, timeout=10)
+    with self._ws_lock:
+      self.ws = ws
+    self.connects += 1
+    if self._gap_start is not None:
+      self.reconnects += 1
+      self.gaps.append(time.monotonic() - self._gap_start)
+      self._gap_start = None
+    receiver = threading.Thread(target=self._receive, args=(ws,), daemon=True)
+    self._receivers = [r for r in self._receivers if r.is_alive()] + [receiver]
+    receiver.start()
+    if self.on_open:
+      self.on_open(ws)
+
+  def _drop(self, ws, error):
+    """Forget a dead socket once, whichever thread noticed first"""
+    with self._ws_lock:
+      if self.ws is not ws:
+        return
+      self.ws = None
+    try:
+      ws.close()
+    except Exception:
+      pass
+    if self._stopping.is_set():
+      return
+    self._gap_start = time.monotonic()
+    if self.on_error and error is not None:
+      self.on_error(ws, error)
+    if self.on_close:
+      self.on_close(ws, None, str(error) if error else None)
+
+  def _receive(self, ws):
+    error = None
+    while True:
+      try:
+        message = ws.recv()
+      except Exception as e:
+        error = e
+        break
+      if not message:
+        break
+      if self.on_message:
+        self.on_message(ws, message)
+    self._drop(ws, error)
+
+  # ---------- sending ----------
+  def _take_batch(self, wait=True):
+    batch_bytes = int(self.batch_ms * self.bytes_per_ms)
+    batch_bytes -= batch_bytes % self.sample_width
+    with self._cond:
+      deadline = time.monotonic() + self.batch_ms / 1000
+      while wait and len(self._buffer) < batch_bytes and not self._stopping.is_set():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+          break
+        self._cond.wait(remaining)
+      if not self._buffer:
+        return None
+      n = min(len(self._buffer), batch_bytes)
+      batch = bytes(self._buffer[:n])
+      del self._buffer[:n]
+      return batch
+
+  def _requeue(self, batch):
+    with self._cond:
+      self._buffer[:0] = batch
+
+  def _adapt(self, send_seconds):
+    batch_s = self.batch_ms / 1000
+    backlog_ms = len(self._buffer) / self.bytes_per_ms
+    if backlog_ms > 2 * self.batch_ms or send_seconds > batch_s / 2:
+      self.batch_ms = min(self.max_batch_ms, self.batch_ms * 2)
+    elif backlog_ms < self.batch_ms and send_seconds < batch_s / 10:
+      self.batch_ms = max(self.min_batch_ms, int(self.batch_ms * 0.75))
+
+  def _send(self, ws, batch):
+    start = time.perf_counter()
+    try:
+      ws.send(batch, _binary_opcode())
+    except Exception as e:
+      self._requeue(batch)
+      self._drop(ws, e)
+      return False
+    self.sends += 1
+    self.bytes_sent += len(batch)
+    self._adapt(time.perf_counter() - start)
+    return True
+
+  def _run(self):
+    backoff = self.backoff_initial
+    while not self._stopping.is_set():
+      ws = self.ws
+      if ws is None:
+        try:
+          self._open()
+          backoff = self.backoff_initial
+        except Exception as e:
+          if self._gap_start is None and self.connects:
+            self._gap_start = time.monotonic()
+          if self.on_error:
+            self.on_error(None, e)
+          self._stopping.wait(backoff)
+          backoff = min(self.backoff_max, backoff * 2)
+        continue
+      batch = self._take_batch()
+      if batch is not None:
+        self._send(ws, batch)
+
+    # Shutting down: ship whatever is still buffered, then say goodbye
+    ws = self.ws
+    if ws is None:
+      return
+    while True:
+      batch = self._take_batch(wait=False)
+      if batch is None or not self._send(ws, batch):
+        break
+    if self._terminate_message and self.ws is ws:
+      try:
+        ws.send(self._terminate_message)
+      except Exception:
+        pass
@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from asr_engines import ASREngine, ASRError, EngineSelector, Transcript
+
+
+class FakeEngine(ASREngine):
+  """Answers with fixed text after `delay` seconds, or fails while `broken`"""
+
+  def __init__(self, name, text="", delay=0.0, broken=False):
+    super().__init__()
+    self.name = name
+    self.text = text
+    self.delay = delay
+    self.broken = broken
+    self.loaded = False
+    self.calls = 0
+
+  def load(self):
+    self.loaded = True
+
+  def _transcribe(self, samples):
+    self.calls += 1
+    time.sleep(self.delay)
+    if self.broken:
+      raise ASRError(f"{self.name}: offline")
+    return self.text
+
+
+class PartialEngine(FakeEngine):
+  """Streams one partial per block, like the AssemblyAI backend"""
+
+  def stream(self, blocks, sample_rate=16000):
+    words = []
+    for block in blocks:
+      words.append(f"w{len(words)}")
+      yield Transcript(" ".join(words), False, self.name)
+    yield Transcript(" ".join(words), True, self.name)
+
+
+def utterance(seconds=0.5):
+  return np.zeros(int(16000 * seconds), dtype=np.int16)
+
+
+def test_first_utterance_answered_by_one_engine_others_measured_in_background():
+  slow = FakeEngine("slow", "from slow", delay=0.05)
+  fast = FakeEngine("fast", "from fast", delay=0.0)
+  selector = EngineSelector([slow, fast])
+
+  assert selector.transcribe(utterance()) == "from slow"
+  assert slow.calls == 1
+  selector.wait_measured(timeout=5)
+  assert fast.loaded and fast.calls == 1
+
+
+def test_ranking_prefers_the_fastest_measured_engine():
+  slow = FakeEngine("slow", "from slow", delay=0.05)
+  fast = FakeEngine("fast", "from fast", delay=0.0)
+  selector = EngineSelector([slow, fast])
+  selector.transcribe(utterance())
+  selector.wait_measured(timeout=5)
+
+  assert selector.current is fast
+  assert selector.transcribe(utterance()) == "from fast"
+  assert [s["engine"] for s in selector.stats()] == ["fast", "slow"]
+
+
+def test_falls_back_after_failures():
+  broken = FakeEngine("broken", broken=True)
+  backup = FakeEngine("backup", "from backup")
+  selector = EngineSelector([broken, backup])
+
+  assert selector.transcribe(utterance()) == "from backup"
+  assert broken.failures == 1
+  # A failing engine drops behind one that works
+  assert selector.current is backup
+  assert selector.transcribe(utterance()) == "from backup"
+  assert broken.calls == 1
+
+
+def test_raises_when_every_engine_fails():
+  selector = EngineSelector([FakeEngine("a", broken=True), FakeEngine("b", broken=True)])
+  with pytest.raises(ASRError):
+    selector.transcribe(utterance())
+
+
+def test_default_stream_yields_a_single_final():
+  engine = FakeEngine("fake", "  play circles  ")
+  results = list(engine.stream([utterance(0.2), utterance(0.2)]))
+
+  assert len(results) == 1
+  assert results[0].is_final and results[0].text == "play circles"
+  assert results[0].engine == "fake"
+
+
+def test_stream_partials_then_final():
+  engine = PartialEngine("partial")
+  results = list(engine.stream([utterance(0.1)] * 3))
+
+  assert [r.is_final for r in results] == [False, False, False, True]
+  assert [r.text for r in results[:3]] == ["w0", "w0 w1", "w0 w1 w2"]
+  assert results[-1].text == "w0 w1 w2"
@@ -0,0 +1,98 @@
+import os
+import re
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from command_grammar import CommandGrammar, GrammarFilter, commands_from, expand
+from command_router import choice
+from plugin_loader import Plugin
+from jj_plugins import PLUGINS
+
+
+def test_phrases_follow_the_plugin_routes():
+  plugins = [
+    Plugin("a", "a", routes={"exit": "x", "search {query}": "x", "{query} in spotify": "x"}),
+    Plugin("b", "b", routes={"spotify {action:act}": "x", "spotify {action}": "x", "open {name:app}": "x"},
+           slot_types={"act": choice("next", prev="previous")}),
+  ]
+  assert commands_from(plugins) == [
+    "exit", "search *", "spotify next", "spotify prev", "open {app}", "open *",
+  ]
+
+
+def test_every_fixed_route_is_in_the_grammar():
+  commands = set(commands_from(PLUGINS))
+  for plugin in PLUGINS:
+    for pattern in plugin.routes:
+      if "{" not in pattern:
+        assert pattern in commands
+
+
+def test_slots_expand_to_known_names():
+  phrases = expand(commands_from(PLUGINS), {"contact": ["dhruv"], "app": ["chrome"]})
+  assert "message dhruv" in phrases and "open chrome" in phrases
+
+
+class FakeTokenizer:
+  """One token per word or punctuation mark, numbered as they're first seen"""
+
+  eot = 0
+
+  def __init__(self):
+    self.vocab = {}
+
+  def encode(self, text):
+    pieces = re.findall(r" ?\w+|[.!?]", text)
+    return [self.vocab.setdefault(piece, len(self.vocab) + 1) for piece in pieces]
+
+
+def walk(grammar_filter, tokenizer, text):
+  return grammar_filter.allowed(tokenizer.encode(text))
+
+
+@pytest.fixture
+def grammar():
+  tokenizer = FakeTokenizer()
+  grammar = CommandGrammar(["spotify next", "spotify pause", "search *", "message {contact}", "message *"],
+                           slots={"contact": ["dhruv"]})
+  return GrammarFilter(grammar._build(tokenizer), 0, tokenizer.eot), tokenizer
+
+
+def test_fixed_commands_are_strict_until_complete(grammar):
+  grammar_filter, tok = grammar
+  allowed, strict = walk(grammar_filter, tok, " jj")
+  assert strict and set(allowed) == set(tok.encode(" spotify search message"))
+
+  allowed, strict = walk(grammar_filter, tok, " jj spotify")
+  assert strict and set(allowed) == set(tok.encode(" next pause"))
+  # No end of text before the phrase is complete
+  assert tok.eot not in allowed
+
+
+def test_end_of_text_only_after_a_complete_phrase(grammar):
+  grammar_filter, tok = grammar
+  allowed, strict = walk(grammar_filter, tok, " jj spotify next")
+  assert strict and set(allowed) == set(tok.encode(".!?")) | {tok.eot}
+
+  allowed, strict = walk(grammar_filter, tok, " jj spotify next.")
+  assert strict and allowed == [tok.eot]
+
+
+def test_slot_nodes_boost_names_without_forcing_them(grammar):
+  grammar_filter, tok = grammar
+  # "message" leads into a free slot, so the name under it is softened
+  allowed, strict = walk(grammar_filter, tok, " jj message")
+  assert not strict and allowed == tok.encode(" dhruv")
+
+  allowed, strict = walk(grammar_filter, tok, " jj search")
+  assert not strict and allowed == []
+
+
+def test_decoding_is_free_once_off_the_trie(grammar):
+  grammar_filter, tok = grammar
+  assert walk(grammar_filter, tok, " jj search cats") is None
+  assert walk(grammar_filter, tok, " jj message mom") is None
+  # A full name is a phrase of its own, but still only boosted
+  allowed, strict = walk(grammar_filter, tok, " jj message dhruv")
+  assert not strict and set(allowed) == set(tok.encode(".!?"))
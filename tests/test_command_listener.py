@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from command_listener import CommandListener
+
+
+def scripted(lines, gate):
+  """capture() returning `lines` in order; entries marked True wait for `gate` first"""
+  lines = list(lines)
+
+  def capture():
+    if not lines:
+      return None
+    text, wait = lines.pop(0)
+    if wait:
+      gate.wait(5)
+    return text
+  return capture
+
+
+def test_prompt_skips_commands_said_before_it():
+  prompted = threading.Event()
+  listener = CommandListener(scripted([("message mom", False), ("pause", False),
+                                       ("see you at six", True)], prompted)).start()
+
+  assert listener.get(timeout=5) == "message mom"
+  # Wait until "pause" is queued, as if said while the message command ran
+  while listener.commands.qsize() < 1:
+    time.sleep(0.01)
+  asked_at = time.perf_counter()
+  prompted.set()
+
+  assert listener.answer(asked_at, timeout=5) == "see you at six"
+  assert listener.get(timeout=5) == "pause"
+  assert listener.get(timeout=5) is None
+
+
+def test_stop_sentinel_survives_a_prompt():
+  listener = CommandListener(scripted([], threading.Event())).start()
+
+  assert listener.answer(time.perf_counter(), timeout=5) is None
+  assert listener.get(timeout=5) is None
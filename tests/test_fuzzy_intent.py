@@ -0,0 +1,56 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from command_router import CommandRouter
+from command_grammar import APPS
+from fuzzy_intent import FuzzyIndex, IntentMatcher
+from plugin_loader import PluginLoader
+from jj_plugins import PLUGINS, FUZZY_ACCEPT
+
+
+@pytest.fixture
+def intents():
+  # The same table jj builds, without importing any plugin
+  router = CommandRouter()
+  router.slot_type("contact", str)
+  router.slot_type("app", str)
+  loader = PluginLoader(router, None, print)
+  for plugin in PLUGINS:
+    loader.register(plugin)
+  return IntentMatcher(router, FuzzyIndex(router.keywords() + APPS), accept_for=FUZZY_ACCEPT)
+
+
+@pytest.mark.parametrize("heard", ["exist", "exits", "excite"])
+def test_exit_is_only_suggested(intents, heard):
+  assert intents.match(heard) == ("exit", pytest.approx(0.89, abs=0.02), False)
+
+
+def test_message_is_only_suggested(intents):
+  corrected, _, run = intents.match("passage dhruv")
+  assert corrected == "message dhruv" and not run
+
+
+def test_lone_word_does_not_skip_a_song(intents):
+  corrected, _, run = intents.match("text")
+  assert corrected == "next" and not run
+
+
+@pytest.mark.parametrize("heard, meant", [
+  ("pawse", "pause"),
+  ("skipp", "skip"),
+  ("circles in spotty fly", "circles in spotify"),
+  ("serch cats", "search cats"),
+])
+def test_harmless_near_misses_run(intents, heard, meant):
+  corrected, _, run = intents.match(heard)
+  assert corrected == meant and run
+
+
+def test_stats_count_runs_and_suggestions(intents):
+  intents.match("pawse")
+  intents.match("exist")
+  intents.match("zzzz")
+  stats = intents.stats()
+  assert (stats["recovered"], stats["suggested"], stats["failed"]) == (1, 1, 1)
@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import threading
+import importlib.util
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from command_router import CommandRouter
+from plugin_loader import Plugin, PluginLoader
+
+
+class SlowImports:
+  """Meta path finder serving in-memory modules: name -> (import delay in seconds, functions)"""
+
+  def __init__(self, modules):
+    self.modules = modules
+
+  def find_spec(self, name, path=None, target=None):
+    if name not in self.modules:
+      return None
+    return importlib.util.spec_from_loader(name, self)
+
+  def create_module(self, spec):
+    return None
+
+  def exec_module(self, module):
+    delay, functions = self.modules[module.__name__]
+    time.sleep(delay)
+    module.__dict__.update(functions)
+
+
+def loader_with(modules, plugins):
+  finder = SlowImports(modules)
+  sys.meta_path.insert(0, finder)
+  router = CommandRouter()
+  loader = PluginLoader(router, context="ctx", notify=lambda *a, **k: None)
+  for plugin in plugins:
+    loader.register(plugin)
+  return loader, router, finder
+
+
+def teardown_finder(finder):
+  sys.meta_path.remove(finder)
+  for name in finder.modules:
+    sys.modules.pop(name, None)
+
+
+def test_a_slow_plugin_import_does_not_hold_up_another_plugin():
+  loader, router, finder = loader_with({
+    "fake_heavy": (0.5, {}),
+    "fake_slow_plugin": (0.0, {"go": lambda ctx: "slow"}),
+    "fake_fast_plugin": (0.0, {"go": lambda ctx: "fast"}),
+  }, [
+    Plugin("slow", "fake_slow_plugin", requires=["fake_heavy"], routes={"slow": "go"}),
+    Plugin("fast", "fake_fast_plugin", routes={"fast": "go"}),
+  ])
+  try:
+    preload = loader.preload(["slow"])
+    time.sleep(0.05)
+    start = time.perf_counter()
+    assert router.dispatch("fast") == "fast"
+    assert time.perf_counter() - start < 0.25
+    preload.join(5)
+    assert loader.state("slow") == "loaded"
+    assert loader.import_ms["slow"]["fake_heavy"] >= 400
+  finally:
+    teardown_finder(finder)
+
+
+def test_concurrent_first_use_imports_once():
+  loader, router, finder = loader_with({
+    "fake_once_plugin": (0.1, {"go": lambda ctx: ctx}),
+  }, [Plugin("once", "fake_once_plugin", routes={"once": "go"})])
+  try:
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(router.dispatch("once"))) for _ in range(4)]
+    for t in threads:
+      t.start()
+    for t in threads:
+      t.join(5)
+    assert results == ["ctx"] * 4
+    assert list(loader.import_ms["once"]) == ["fake_once_plugin"]
+  finally:
+    teardown_finder(finder)
@@ -0,0 +1,25 @@
+import os
+import sys
+import time
+import random
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scheduler import TranscriptionScheduler
+
+
+def test_results_delivered_in_submission_order_with_many_workers():
+  delivered = []
+
+  def transcribe(audio):
+    time.sleep(random.random() * 0.005)
+    return int(audio[0])
+
+  scheduler = TranscriptionScheduler(transcribe, workers=4, max_pending=1000,
+                                     on_result=lambda seq, result, error: delivered.append(seq))
+  for i in range(200):
+    scheduler.submit(np.array([i]))
+  scheduler.shutdown()
+
+  assert delivered == list(range(200))
+  assert [scheduler.results.get_nowait()[1] for _ in range(200)] == list(range(200))
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from streaming_session import StreamingSession
+
+
+class FakeSocket:
+  """Stands in for a websocket; the link dies after `drop_after` sends"""
+
+  def __init__(self, server, drop_after=None):
+    self.server = server
+    self.drop_after = drop_after
+    self.sends = 0
+    self.closed = threading.Event()
+
+  def send(self, data, opcode=None):
+    if self.closed.is_set() or self.sends == self.drop_after:
+      self.closed.set()
+      raise ConnectionResetError("connection dropped")
+    self.sends += 1
+    if isinstance(data, bytes):
+      self.server.audio.extend(data)
+    else:
+      # A terminate message makes the server end the session
+      self.server.text.append(data)
+      self.closed.set()
+
+  def recv(self):
+    # The real server only talks when it has a transcript; this one waits to die
+    self.closed.wait()
+    raise ConnectionResetError("connection dropped")
+
+  def close(self):
+    self.closed.set()
+
+
+class FakeServer:
+  """connect= factory; `script` holds each connection's drop point, or an exception to refuse it"""
+
+  def __init__(self, script):
+    self.script = list(script)
+    self.audio = bytearray()
+    self.text = []
+    self.attempts = 0
+
+  def connect(self, url, header=None, timeout=10):
+    self.attempts += 1
+    step = self.script.pop(0) if self.script else None
+    if isinstance(step, Exception):
+      raise step
+    return FakeSocket(self, drop_after=step)
+
+
+def wait_for(condition, timeout=5):
+  deadline = time.monotonic() + timeout
+  while not condition() and time.monotonic() < deadline:
+    time.sleep(0.005)
+  return condition()
+
+
+def capture(session, blocks, block_bytes=640):
+  """Feed 20 ms blocks of distinct bytes, as the microphone callback would"""
+  audio = bytearray()
+  for i in range(blocks):
+    block = bytes([i % 256]) * block_bytes
+    audio.extend(block)
+    session.send_audio(block)
+    time.sleep(0.002)
+  return bytes(audio)
+
+
+def test_reconnects_mid_stream_and_replays_what_was_buffered():
+  # Drops after 3 sends, refuses the first reconnect, then stays up
+  server = FakeServer([3, OSError("refused"), None])
+  session = StreamingSession("ws://stand-in", connect=server.connect, min_batch_ms=20, max_batch_ms=80,
+                             backoff_initial=0.01, backoff_max=0.05)
+  session.start()
+  audio = capture(session, 100)
+  assert wait_for(lambda: session.bytes_sent == len(audio))
+  session.stop(terminate_message='{"terminate_session": true}')
+
+  stats = session.stats()
+  assert server.attempts == 3
+  assert stats["connects"] == 2 and stats["reconnects"] == 1
+  assert len(session.gaps) == 1 and stats["gap_s_total"] > 0
+  assert stats["gap_s_max"] == stats["gap_s_total"]
+  # Replayed and live audio add up to exactly what was captured, in order
+  assert stats["bytes_dropped"] == 0
+  assert bytes(server.audio) == audio
+  assert server.text == ['{"terminate_session": true}']
+
+
+def test_drops_oldest_audio_when_the_outage_outlasts_the_buffer():
+  # Drops on the first send and stays down for 200 ms, far longer than the buffer
+  server = FakeServer([0, OSError("refused"), None])
+  session = StreamingSession("ws://stand-in", connect=server.connect, min_batch_ms=20,
+                             max_buffer_seconds=0.2, backoff_initial=0.2, backoff_max=0.2)
+  session.start()
+  audio = capture(session, 30)
+  assert wait_for(lambda: session.bytes_sent + session.bytes_dropped == len(audio))
+  session.stop(timeout=0.1)
+
+  assert session.reconnects == 1
+  assert session.bytes_dropped > 0
+  # What got through is the newest audio, intact
+  assert bytes(server.audio) == audio[session.bytes_dropped:]
@@ -0,0 +1,277 @@
+import os
+import time
+import wave
+import queue
+import json
+import hashlib
+import threading
+import numpy as np
+
+
+class PhraseCache:
+  """Fixed phrases rendered to WAV once and played back from memory
+
+  Files live in `directory`, named by a hash of text, voice, rate and
+  volume, so changing any of them renders fresh audio. Only texts in
+  `phrases` are cached; anything else is synthesised live as before.
+  """
+
+  def __init__(self, directory, phrases=()):
+    self.directory = directory
+    self.phrases = set(phrases)
+    self._audio = {}
+    self._index_path = os.path.join(directory, "index.json")
+    # How long each file took to synthesise, which is what a hit saves
+    try:
+      with open(self._index_path, encoding="utf-8") as f:
+        self.render_ms = json.load(f)
+    except (FileNotFoundError, ValueError):
+      self.render_ms = {}
+
+    self.hits = 0
+    self.misses = 0
+    self.live = 0
+    self.saved_ms = 0.0
+
+  def key(self, text, voice, rate, volume):
+    return hashlib.sha1(f"{text}|{voice}|{rate}|{volume}".encode("utf-8")).hexdigest()
+
+  def path(self, text, voice, rate, volume):
+    return os.path.join(self.directory, self.key(text, voice, rate, volume) + ".wav")
+
+  def get(self, text, voice, rate, volume):
+    """(pcm, sample_rate, sample_width, channels) if this phrase is ready, else None"""
+    if text not in self.phrases:
+      self.live += 1
+      return None
+    if text not in self._audio:
+      self._audio[text] = self._load(self.path(text, voice, rate, volume))
+    clip = self._audio[text]
+    if clip is None:
+      self.misses += 1
+      return None
+    self.hits += 1
+    # Whatever rendering it once cost, it didn't cost again
+    self.saved_ms += self.render_ms.get(self.key(text, voice, rate, volume), 0.0)
+    return clip
+
+  def _load(self, path):
+    try:
+      with wave.open(path, "rb") as f:
+        return f.readframes(f.getnframes()), f.getframerate(), f.getsampwidth(), f.getnchannels()
+    except (FileNotFoundError, wave.Error, EOFError):
+      return None
+
+  def missing(self, voice, rate, volume):
+    return [t for t in sorted(self.phrases) if self._audio.get(t) is None
+            and not os.path.exists(self.path(t, voice, rate, volume))]
+
+  def render(self, engine, text, voice, rate, volume):
+    """Synthesise one phrase to disk with the (worker-owned) engine"""
+    os.makedirs(self.directory, exist_ok=True)
+    path = self.path(text, voice, rate, volume)
+    tmp = path + ".tmp.wav"
+    start = time.perf_counter()
+    engine.save_to_file(text, tmp)
+    engine.runAndWait()
+    elapsed = (time.perf_counter() - start) * 1000
+    if not os.path.exists(tmp):
+      raise RuntimeError(f"engine wrote no audio for {text!r}")
+    os.replace(tmp, path)
+    self._audio[text] = self._load(path)
+    self.render_ms[self.key(text, voice, rate, volume)] = elapsed
+    with open(self._index_path, "w", encoding="utf-8") as f:
+      json.dump(self.render_ms, f)
+
+  def stats(self):
+    lookups = self.hits + self.misses
+    return {
+      "phrases": len(self.phrases),
+      "hits": self.hits,
+      "misses": self.misses,
+      "live": self.live,
+      "hit_rate": self.hits / lookups if lookups else 0.0,
+      "saved_ms": self.saved_ms,
+    }
+
+
+class Speaker:
+  """One pyttsx3 engine on its own thread, fed through a queue
+
+  speak() returns straight away so a handler can carry on with its browser
+  work while the confirmation is spoken. interrupt() (barge-in) drops
+  anything queued and stops the current sentence; the engine is stopped
+  from its own word callback, the one place pyttsx3 allows it, and the
+  time until it actually goes quiet is recorded.
+
+  With a PhraseCache, cached phrases are played straight from memory and
+  missing ones are rendered while the queue is idle.
+  """
+
+  def __init__(self, rate=175, volume=0.9, cache=None):
+    self.rate = rate
+    self.volume = volume
+    self.cache = cache
+    self.voice = None
+    self._player = None
+    self._streams = {}
+    self.speaking = False
+    self._queue = queue.Queue()
+    self._engine = None
+    self._thread = None
+    self._cancel = threading.Event()
+    self._interrupted_at = None
+    self._start_lock = threading.Lock()
+
+    self.utterances = 0
+    self.interrupted = 0
+    self.dropped = 0
+    self.silence_ms = []
+    self.queue_ms = []
+
+  def _start(self):
+    with self._start_lock:
+      if self._thread is None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+  def speak(self, text, wait=False):
+    """Queue text; with wait=True block until it has been spoken (or cut off)"""
+    self._start()
+    done = threading.Event()
+    self._queue.put((text, time.perf_counter(), done))
+    if wait:
+      done.wait()
+
+  def _run(self):
+    try:
+      import pyttsx3
+      # COM-based drivers want the engine used on the thread that made it
+      engine = pyttsx3.init()
+      engine.setProperty('rate', self.rate)
+      engine.setProperty('volume', self.volume)
+      engine.connect('started-word', self._on_word)
+      self.voice = engine.getProperty('voice')
+    except Exception as e:
+      print(f"Speech error: {e}")
+      engine = None
+    self._engine = engine
+
+    while True:
+      try:
+        item = self._queue.get(timeout=0.5)
+      except queue.Empty:
+        self._render_next(engine)
+        continue
+      if item is None:
+        self._queue.task_done()
+        return
+      text, queued, done = item
+      try:
+        if engine is not None:
+          self._say(engine, text, queued)
+      except Exception as e:
+        print(f"Speech error: {e}")
+      finally:
+        done.set()
+        self._queue.task_done()
+
+  def _render_next(self, engine):
+    """Idle time: render one fixed phrase that isn't cached yet"""
+    if engine is None or self.cache is None:
+      return
+    missing = self.cache.missing(self.voice, self.rate, self.volume)
+    if missing:
+      try:
+        self.cache.render(engine, missing[0], self.voice, self.rate, self.volume)
+      except Exception as e:
+        print(f"Speech cache error: {e}")
+        self.cache.phrases.discard(missing[0])
+
+  def _say(self, engine, text, queued):
+    self._cancel.clear()
+    self._interrupted_at = None
+    self.queue_ms.append((time.perf_counter() - queued) * 1000)
+    clip = self.cache.get(text, self.voice, self.rate, self.volume) if self.cache else None
+    self.speaking = True
+    try:
+      if clip is not None:
+        self._play(*clip)
+      else:
+        engine.say(text)
+        engine.runAndWait()
+    finally:
+      self.speaking = False
+    self.utterances += 1
+    if self._interrupted_at is not None:
+      self.interrupted += 1
+      self.silence_ms.append((time.perf_counter() - self._interrupted_at) * 1000)
+
+  def _play(self, pcm, rate, width, channels, chunk_ms=20):
+    """Play cached PCM, checking for barge-in between short chunks"""
+    import pyaudio
+    if self._player is None:
+      self._player = pyaudio.PyAudio()
+    key = (rate, width, channels)
+    if key not in self._streams:
+      self._streams[key] = self._player.open(format=self._player.get_format_from_width(width),
+                                             channels=channels, rate=rate, output=True)
+    stream = self._streams[key]
+    step = int(rate * chunk_ms / 1000) * width * channels
+    for offset in range(0, len(pcm), step):
+      if self._cancel.is_set():
+        break
+      stream.write(pcm[offset:offset + step])
+
+  def _on_word(self, name, location, length):
+    if self._cancel.is_set():
+      self._engine.stop()
+
+  def interrupt(self):
+    """Barge-in: forget queued speech and stop the current sentence"""
+    while True:
+      try:
+        item = self._queue.get_nowait()
+      except queue.Empty:
+        break
+      if item is None:
+        self._queue.put(None)
+        self._queue.task_done()
+        break
+      item[2].set()
+      self.dropped += 1
+      self._queue.task_done()
+    if self.speaking and not self._cancel.is_set():
+      self._interrupted_at = time.perf_counter()
+      self._cancel.set()
+
+  def wait(self):
+    """Block until everything queued so far has been spoken"""
+    if self._thread is not None:
+      self._queue.join()
+
+  def close(self, timeout=10.0):
+    """Finish what's queued, then stop the worker"""
+    if self._thread is None:
+      return
+    self._queue.put(None)
+    self._thread.join(timeout=timeout)
+    for stream in self._streams.values():
+      stream.close()
+    if self._player is not None:
+      self._player.terminate()
+
+  def stats(self):
+    silence = np.array(self.silence_ms or [0.0])
+    waits = np.array(self.queue_ms or [0.0])
+    stats = {
+      "utterances": self.utterances,
+      "interrupted": self.interrupted,
+      "dropped": self.dropped,
+      "queue_ms_mean": float(waits.mean()),
+      "time_to_silence_ms_mean": float(silence.mean()),
+      "time_to_silence_ms_p95": float(np.percentile(silence, 95)),
+    }
+    if self.cache:
+      stats["cache"] = self.cache.stats()
+    return stats
@@ -0,0 +1,172 @@
+import time
+from collections import deque
+import numpy as np
+from audio_utils import to_float
+
+# compute_ms keeps this many blocks (~7 min of 100 ms blocks), not the whole session
+STATS_BLOCKS = 4096
+
+
+class VoiceActivityDetector:
+  """Streaming energy + zero-crossing VAD with hangover for endpointing
+
+  feed() consumes capture blocks of any size and keeps an adaptive noise
+  floor. An utterance starts after min_speech_ms of speech-like frames and
+  ends hangover_ms after the last one, which is usually far sooner than
+  speech_recognition's pause_threshold.
+  """
+
+  def __init__(self, sample_rate=16000, frame_ms=20, margin_db=9.0, hangover_ms=300,
+               min_speech_ms=60, pad_ms=150):
+    self.sample_rate = sample_rate
+    self.frame = int(sample_rate * frame_ms / 1000)
+    self.frame_ms = frame_ms
+    self.margin = 10 ** (margin_db / 10)
+    self.hangover_frames = max(1, hangover_ms // frame_ms)
+    self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+    self.pad = int(sample_rate * pad_ms / 1000)
+    self.noise_floor = 1e-6
+    self.noise_spectrum = None
+
+    self.trim_ratios = []
+    self.endpoint_ms = []
+    self.compute_ms = deque(maxlen=STATS_BLOCKS)
+    self.reset()
+
+  def calibrate(self, samples):
+    """Seed the noise floor (and spectrum) from a stretch of known silence"""
+    samples = to_float(samples)
+    energy = self._frame_energy(samples)
+    if energy.size:
+      self.noise_floor = float(np.median(energy)) + 1e-10
+      self.noise_spectrum = noise_spectrum(samples)
+    return self.noise_floor
+
+  def recalibrate(self, samples, weight=0.5):
+    """Blend a fresh stretch of silence into the current noise estimate"""
+    samples = to_float(samples)
+    energy = self._frame_energy(samples)
+    if energy.size:
+      floor = float(np.median(energy)) + 1e-10
+      self.noise_floor = (1 - weight) * self.noise_floor + weight * floor
+      self.noise_spectrum = noise_spectrum(samples)
+    return self.noise_floor
+
+  @property
+  def speech_pending(self):
+    """Speech-like frames seen that haven't (yet) started an utterance"""
+    return self._speech_run > 0
+
+  def reset(self):
+    """Start a new utterance"""
+    self._pending = np.zeros(0, dtype=np.float32)
+    self._frame_index = 0
+    self._speech_run = 0
+    self._silence_run = 0
+    self.in_speech = False
+    self.ended = False
+    self.start = None      # sample offsets since reset()
+    self.end = None
+    self._last_speech = None
+
+  def _frame_energy(self, samples):
+    n = samples.size // self.frame
+    frames = samples[:n * self.frame].reshape(n, self.frame)
+    return np.einsum("ij,ij->i", frames, frames) / self.frame
+
+  def classify(self, samples):
+    """Per-frame speech decision for a run of whole frames"""
+    n = samples.size // self.frame
+    frames = samples[:n * self.frame].reshape(n, self.frame)
+    energy = np.einsum("ij,ij->i", frames, frames) / self.frame
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame
+    loud = energy > self.noise_floor * self.margin
+    # Unvoiced consonants are quieter but cross zero a lot
+    fricative = (energy > self.noise_floor * self.margin ** 0.5) & (zcr > 0.25)
+    return loud | fricative, energy
+
+  def feed(self, block):
+    """Process the next capture block; returns True once the utterance has ended"""
+    if self.ended:
+      return True
+    start_time = time.perf_counter()
+    block = to_float(block)
+    self._pending = np.concatenate((self._pending, block)) if self._pending.size else block
+    n = self._pending.size // self.frame
+    if n == 0:
+      return False
+    speech, energy = self.classify(self._pending)
+    self._pending = self._pending[n * self.frame:].copy()
+
+    for i in range(n):
+      index = self._frame_index + i
+      if speech[i]:
+        self._speech_run += 1
+        self._silence_run = 0
+        self._last_speech = index
+        if not self.in_speech and self._speech_run >= self.min_speech_frames:
+          self.in_speech = True
+          self.start = (index - self._speech_run + 1) * self.frame
+      else:
+        self._speech_run = 0
+        self._silence_run += 1
+        if not self.in_speech:
+          # Track the room while nobody is talking
+          self.noise_floor = 0.95 * self.noise_floor + 0.05 * float(energy[i])
+        elif self._silence_run >= self.hangover_frames:
+          self.ended = True
+          self.end = (self._last_speech + 1) * self.frame
+          self.endpoint_ms.append((index - self._last_speech) * self.frame_ms)
+          break
+    self._frame_index += n
+    self.compute_ms.append((time.perf_counter() - start_time) * 1000)
+    return self.ended
+
+  def bounds(self, samples):
+    """(lo, hi) of the speech in samples, padded by pad_ms; (0, 0) if there is none"""
+    speech, _ = self.classify(to_float(samples))
+    active = np.flatnonzero(speech)
+    if active.size == 0:
+      self.trim_ratios.append(0.0)
+      return 0, 0
+    lo = max(0, active[0] * self.frame - self.pad)
+    hi = min(len(samples), (active[-1] + 1) * self.frame + self.pad)
+    self.trim_ratios.append(1.0 - (hi - lo) / max(len(samples), 1))
+    return lo, hi
+
+  def trim(self, samples):
+    """Drop leading and trailing silence (keeping pad_ms either side)"""
+    lo, hi = self.bounds(samples)
+    return samples[lo:hi]
+
+  def stats(self):
+    trims = np.array(self.trim_ratios or [0.0])
+    endpoints = np.array(self.endpoint_ms or [0.0])
+    compute = np.array(self.compute_ms or [0.0])
+    return {
+      "utterances": len(self.endpoint_ms),
+      "trim_ratio_mean": float(trims.mean()),
+      "endpoint_ms_mean": float(endpoints.mean()),
+      "endpoint_ms_p95": float(np.percentile(endpoints, 95)),
+      "compute_ms_per_block": float(compute.mean()),
+      "noise_floor": self.noise_floor,
+    }
+
+
+def noise_spectrum(samples, n_fft=512):
+  """Mean power spectrum of a stretch of background noise"""
+  samples = to_float(samples)
+  n = samples.size // n_fft
+  if n == 0:
+    return None
+  frames = samples[:n * n_fft].reshape(n, n_fft) * np.hanning(n_fft).astype(np.float32)
+  return (np.abs(np.fft.rfft(frames, axis=1)) ** 2).mean(axis=0)
+
+def trim_silence(samples, sample_rate=16000):
+  """One-shot trim of an array, seeding the noise floor from the quietest frames"""
+  vad = VoiceActivityDetector(sample_rate)
+  energy = vad._frame_energy(to_float(samples))
+  if energy.size:
+    vad.noise_floor = float(np.percentile(energy, 10)) + 1e-10
+  return vad.trim(samples)
@@ -0,0 +1,231 @@
+import os
+import time
+import numpy as np
+from audio_utils import to_float
+
+FRAME_MS = 25
+HOP_MS = 10
+N_BANDS = 20
+
+
+def _mel(hz):
+  return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+def _mel_to_hz(mel):
+  return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+_filterbanks = {}
+
+def mel_filterbank(sample_rate, n_fft, n_bands=N_BANDS):
+  """Triangular mel filters, built once per (rate, fft size)"""
+  key = (sample_rate, n_fft, n_bands)
+  if key not in _filterbanks:
+    edges = _mel_to_hz(np.linspace(_mel(80.0), _mel(sample_rate / 2 * 0.95), n_bands + 2))
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    bank = np.zeros((n_bands, bins.size), dtype=np.float32)
+    for i in range(n_bands):
+      lo, mid, hi = edges[i], edges[i + 1], edges[i + 2]
+      rising = (bins - lo) / (mid - lo)
+      falling = (hi - bins) / (hi - mid)
+      bank[i] = np.maximum(0.0, np.minimum(rising, falling))
+    _filterbanks[key] = bank
+  return _filterbanks[key]
+
+
+class KeywordSpotter:
+  """Streaming on-device "jj" detector matching log-mel frames against enrolled templates
+
+  Matching is an open-begin DTW that advances one input frame at a time, so
+  the spotter can stop as soon as the keyword is seen instead of waiting for
+  the whole utterance.
+  """
+
+  def __init__(self, sample_rate=16000, threshold=None, max_search_seconds=2.0, template_path=None):
+    self.sample_rate = sample_rate
+    self.frame_len = int(sample_rate * FRAME_MS / 1000)
+    self.hop = int(sample_rate * HOP_MS / 1000)
+    self.n_fft = 1 << (self.frame_len - 1).bit_length()
+    self.window = np.hanning(self.frame_len).astype(np.float32)
+    self.bank = mel_filterbank(sample_rate, self.n_fft)
+    self.max_search_frames = int(max_search_seconds * 1000 / HOP_MS)
+    self.default_threshold = threshold
+    self.threshold = threshold if threshold is not None else 0.35
+    self.template_path = template_path
+    self.templates = []
+
+    self.detections = 0
+    self.rejections = 0
+    self.false_accepts = 0
+    self.latencies_ms = []
+    self.compute_ms = []
+
+    if template_path and os.path.exists(template_path):
+      self.load(template_path)
+    self.reset()
+
+  @property
+  def enrolled(self):
+    return bool(self.templates)
+
+  # ---------- features ----------
+  def features(self, samples):
+    """Frame-normalised log-mel features, one row per 10 ms hop"""
+    samples = to_float(samples)
+    if samples.size < self.frame_len:
+      return np.zeros((0, N_BANDS), dtype=np.float32)
+    n_frames = 1 + (samples.size - self.frame_len) // self.hop
+    idx = np.arange(self.frame_len)[None, :] + self.hop * np.arange(n_frames)[:, None]
+    frames = samples[idx] * self.window
+    power = np.abs(np.fft.rfft(frames, n=self.n_fft, axis=1)) ** 2
+    feats = np.log(power @ self.bank.T + 1e-8)
+    feats -= feats.mean(axis=1, keepdims=True)
+    feats /= np.linalg.norm(feats, axis=1, keepdims=True) + 1e-8
+    return feats.astype(np.float32)
+
+  def _trim(self, samples):
+    """Cut an enrollment clip down to the span that actually has energy"""
+    samples = to_float(samples)
+    n = samples.size // self.hop
+    if n == 0:
+      return samples
+    rms = np.sqrt(np.mean(samples[:n * self.hop].reshape(n, self.hop) ** 2, axis=1))
+    active = np.flatnonzero(rms > 0.15 * rms.max())
+    if active.size == 0:
+      return samples
+    return samples[active[0] * self.hop:(active[-1] + 1) * self.hop + self.frame_len]
+
+  # ---------- enrollment ----------
+  def enroll(self, samples):
+    """Add one recording of the user saying "jj" as a template"""
+    feats = self.features(self._trim(samples))
+    if feats.shape[0] < 5:
+      raise ValueError("Enrollment clip too short")
+    self.templates.append(feats)
+    self._calibrate_threshold()
+    self.reset()
+
+  def _calibrate_threshold(self):
+    if self.default_threshold is not None or len(self.templates) < 2:
+      return
+    scores = []
+    for i, template in enumerate(self.templates):
+      others = [t for j, t in enumerate(self.templates) if j != i]
+      scores.append(self._best_score(template, others))
+    self.threshold = float(np.clip(max(scores) * 1.5, 0.15, 0.5))
+
+  def save(self, path=None):
+    path = path or self.template_path
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez(path, *self.templates, threshold=self.threshold)
+
+  def load(self, path):
+    with np.load(path) as data:
+      names = sorted((k for k in data.files if k.startswith("arr_")), key=lambda k: int(k[4:]))
+      self.templates = [data[k] for k in names]
+      if self.default_threshold is None and "threshold" in data.files:
+        self.threshold = float(data["threshold"])
+
+  # ---------- streaming detection ----------
+  def reset(self):
+    """Start a new utterance"""
+    self._pending = np.zeros(0, dtype=np.float32)
+    self._frames_seen = 0
+    self._triggered = False
+    lengths = [t.shape[0] for t in self.templates] or [1]
+    width = max(lengths)
+    self._tpl = np.zeros((len(self.templates), width, N_BANDS), dtype=np.float32)
+    for i, t in enumerate(self.templates):
+      self._tpl[i, :t.shape[0]] = t
+    self._last = np.array(lengths) - 1
+    self._cost = np.full((len(self.templates), width), np.inf, dtype=np.float32)
+    self._steps = np.zeros((len(self.templates), width), dtype=np.float32)
+
+  def _step(self, frame):
+    """Advance the DTW lattice by one input frame; returns the best normalised end score"""
+    local = 1.0 - self._tpl @ frame
+    prev_cost, prev_steps = self._cost, self._steps
+    # Allowed moves: stay on the template frame, advance one, or skip one
+    cands = np.stack([
+      prev_cost,
+      np.pad(prev_cost, ((0, 0), (1, 0)), constant_values=np.inf)[:, :-1],
+      np.pad(prev_cost, ((0, 0), (2, 0)), constant_values=np.inf)[:, :-2],
+    ])
+    steps = np.stack([
+      prev_steps,
+      np.pad(prev_steps, ((0, 0), (1, 0)))[:, :-1],
+      np.pad(prev_steps, ((0, 0), (2, 0)))[:, :-2],
+    ])
+    choice = np.argmin(cands, axis=0)
+    rows = np.arange(cands.shape[1])[:, None]
+    cols = np.arange(cands.shape[2])[None, :]
+    best = cands[choice, rows, cols]
+    self._cost = best + local
+    self._steps = steps[choice, rows, cols] + 1
+    # Open begin: the keyword may start on any input frame
+    self._cost[:, 0] = local[:, 0]
+    self._steps[:, 0] = 1
+    ends = np.arange(len(self.templates))
+    return float(np.min(self._cost[ends, self._last] / self._steps[ends, self._last]))
+
+  def feed(self, block):
+    """Feed the next block of captured audio; returns True once "jj" is detected"""
+    if self._triggered or not self.templates:
+      return self._triggered
+    block = to_float(block)
+    self._pending = np.concatenate((self._pending, block))
+    feats = self.features(self._pending)
+    if feats.shape[0]:
+      self._pending = self._pending[feats.shape[0] * self.hop:]
+    for frame in feats:
+      self._frames_seen += 1
+      if self._step(frame) < self.threshold:
+        self._triggered = True
+        break
+    return self._triggered
+
+  def detect(self, samples, block_ms=100):
+    """Run the streaming detector over one utterance, stopping early on a hit"""
+    if not self.templates:
+      return True
+    start = time.perf_counter()
+    self.reset()
+    samples = to_float(samples)
+    block = int(self.sample_rate * block_ms / 1000)
+    limit = self.max_search_frames * self.hop + self.frame_len
+    for offset in range(0, min(samples.size, limit), block):
+      if self.feed(samples[offset:offset + block]):
+        break
+    self.compute_ms.append((time.perf_counter() - start) * 1000)
+    if self._triggered:
+      self.detections += 1
+      self.latencies_ms.append(self._frames_seen * HOP_MS + FRAME_MS)
+    else:
+      self.rejections += 1
+    return self._triggered
+
+  def _best_score(self, feats, templates):
+    saved = self.templates
+    self.templates = templates
+    self.reset()
+    best = np.inf
+    for frame in feats:
+      best = min(best, self._step(frame))
+    self.templates = saved
+    self.reset()
+    return best
+
+  def report_false_accept(self):
+    """The recognizer disagreed with a detection (transcript didn't start with "jj")"""
+    self.false_accepts += 1
+
+  def stats(self):
+    latencies = np.array(self.latencies_ms or [0.0])
+    compute = np.array(self.compute_ms or [0.0])
+    return {
+      "detections": self.detections,
+      "rejections": self.rejections,
+      "false_accepts": self.false_accepts,
+      "latency_ms_mean": float(latencies.mean()),
+      "latency_ms_p95": float(np.percentile(latencies, 95)),
+      "compute_ms_mean": float(compute.mean()),
+    }
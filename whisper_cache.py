@@ -0,0 +1,118 @@
+import gc
+import time
+import threading
+
+
+def _load_whisper(size, device):
+  import whisper
+  return whisper.load_model(size, device=device)
+
+
+class ModelCache:
+  """Process-wide cache of loaded Whisper models keyed by (size, device)
+
+  Models can be warmed in a background thread, are kept resident while in
+  use and are dropped after idle_timeout seconds without a request.
+  """
+
+  def __init__(self, loader=_load_whisper, idle_timeout=600):
+    self.loader = loader
+    self.idle_timeout = idle_timeout
+    self.load_seconds = {}
+    self._models = {}
+    self._errors = {}
+    self._ready = {}
+    self._last_used = {}
+    self._lock = threading.Lock()
+    self._reaper = None
+
+  def _load(self, key):
+    start = time.perf_counter()
+    try:
+      model = self.loader(*key)
+    except Exception as e:
+      with self._lock:
+        self._errors[key] = e
+        self._ready.pop(key).set()
+      return
+    with self._lock:
+      self._models[key] = model
+      self._last_used[key] = time.monotonic()
+      self.load_seconds[key] = time.perf_counter() - start
+      self._errors.pop(key, None)
+      self._ready.pop(key).set()
+
+  def warm(self, size="small", device="cpu"):
+    """Start loading in the background; returns immediately"""
+    key = (size, device)
+    with self._lock:
+      if key in self._models:
+        self._last_used[key] = time.monotonic()
+        return
+      if key in self._ready:
+        return
+      self._ready[key] = threading.Event()
+      self._start_reaper()
+    threading.Thread(target=self._load, args=(key,), daemon=True).start()
+
+  def get(self, size="small", device="cpu"):
+    """Return the model, waiting for a warm-up in flight or loading it now"""
+    key = (size, device)
+    while True:
+      with self._lock:
+        if key in self._models:
+          self._last_used[key] = time.monotonic()
+          return self._models[key]
+        if key in self._errors:
+          raise self._errors.pop(key)
+        pending = self._ready.get(key)
+      if pending is None:
+        self.warm(size, device)
+        continue
+      pending.wait()
+
+  def is_loaded(self, size="small", device="cpu"):
+    with self._lock:
+      return (size, device) in self._models
+
+  def unload(self, size="small", device="cpu"):
+    with self._lock:
+      model = self._models.pop((size, device), None)
+      self._last_used.pop((size, device), None)
+    if model is not None:
+      del model
+      gc.collect()
+      if device.startswith("cuda"):
+        import torch
+        torch.cuda.empty_cache()
+
+  def release_idle(self):
+    """Drop every model nobody has asked for within idle_timeout"""
+    now = time.monotonic()
+    with self._lock:
+      idle = [k for k, t in self._last_used.items() if now - t > self.idle_timeout]
+    for key in idle:
+      print(f"💤 Unloading idle Whisper model {key[0]} ({key[1]})")
+      self.unload(*key)
+
+  def _start_reaper(self):
+    """Called with _lock held, so concurrent warm()s start one reaper between them"""
+    if self._reaper is not None or not self.idle_timeout:
+      return
+
+    def reap():
+      while True:
+        time.sleep(min(60, self.idle_timeout))
+        self.release_idle()
+
+    self._reaper = threading.Thread(target=reap, daemon=True)
+    self._reaper.start()
+
+
+cache = ModelCache()
+
+def warm_model(size="small", device="cpu"):
+  cache.warm(size, device)
+
+def get_model(size="small", device="cpu"):
+  return cache.get(size, device)